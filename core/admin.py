@@ -1,9 +1,28 @@
 from django.contrib import admin
-from .models import Cours
+from .models import ChangementCours, ConflitCours, Cours, SemaineScrapee
 
 @admin.register(Cours)
 class CoursAdmin(admin.ModelAdmin):
     list_display = ('jour', 'horaire', 'intitule', 'type_cours', 'niveau', 'enseignant')
-    list_filter = ('jour', 'type_cours', 'niveau')
+    list_filter = ('zone', 'jour', 'type_cours', 'niveau')
     search_fields = ('intitule', 'enseignant', 'salle')
-    ordering = ('-jour', 'horaire')
+    ordering = ('-jour', 'heure_debut', 'heure_fin')
+
+@admin.register(SemaineScrapee)
+class SemaineScrapeeAdmin(admin.ModelAdmin):
+    list_display = ('debut_semaine', 'zone', 'date_scraping', 'nombre_evenements')
+    list_filter = ('zone',)
+    ordering = ('-debut_semaine', 'zone')
+
+@admin.register(ConflitCours)
+class ConflitCoursAdmin(admin.ModelAdmin):
+    list_display = ('jour', 'debut', 'fin', 'type_conflit', 'cle', 'zone')
+    list_filter = ('zone', 'type_conflit', 'jour')
+    raw_id_fields = ('cours_a', 'cours_b')
+    ordering = ('-jour', 'debut')
+
+@admin.register(ChangementCours)
+class ChangementCoursAdmin(admin.ModelAdmin):
+    list_display = ('id', 'operation', 'zone', 'jour', 'horaire', 'ressource', 'date')
+    list_filter = ('zone', 'operation')
+    ordering = ('-id',)
@@ -0,0 +1,387 @@
+# core/benchmarks.py
+"""
+Mesures de performance du scraper et de l'API, hors réseau.
+Les pages viennent des fixtures enregistrées (core/fixtures/pages) ou du générateur
+de core/faux_grr.py, pour comparer les résultats d'un commit à l'autre.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from datetime import date, timedelta
+from pathlib import Path
+import asyncio
+import gc
+import itertools
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from . import faux_grr
+from .faux_grr import DOSSIER_PAGES, FauxServeurGRR, generer_page_semaine
+from .models import ChangementCours, ConflitCours, Cours, SemaineScrapee, VerrouScraping
+from .parseurs import PARSEURS
+from .renderers import ORJSONRenderer
+from .scraping import ExtracteurUPGC
+from .serializers import CoursSerializer, EmploiDuTempsSemaineResponseSerializer
+from .views import EmploiDuTempsDuJourAPIView
+
+LUNDI_SYNTHETIQUE = date(2026, 2, 16)
+
+# nom -> paramètres de generer_page_semaine
+SCENARIOS_SYNTHETIQUES = {
+    'synthetique-50': {'nombre_ressources': 50, 'cours_par_cellule': 2},
+    'synthetique-300': {'nombre_ressources': 300, 'cours_par_cellule': 3, 'taux_remplissage': 0.7},
+}
+
+
+# --- Enregistrement des résultats, pour comparer les commits ---
+
+def sortie_par_defaut(nom):
+    """Fichier JSON Lines des résultats d'un benchmark, sous BASE_DIR/benchmarks."""
+    return str(Path(settings.BASE_DIR) / 'benchmarks' / f'{nom}.jsonl')
+
+
+def commit_courant():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def enregistrer_mesure(sortie, resultats, **contexte):
+    """Ajoute à `sortie` une ligne : date, commit, version de Python, `contexte` et résultats."""
+    sortie = Path(sortie)
+    sortie.parent.mkdir(parents=True, exist_ok=True)
+    run = {
+        'date': timezone.now().isoformat(),
+        'commit': commit_courant(),
+        'python': platform.python_version(),
+        **contexte,
+        'resultats': resultats,
+    }
+    with sortie.open('a', encoding='utf-8') as f:
+        f.write(json.dumps(run, ensure_ascii=False) + '\n')
+    return sortie
+
+
+# --- Analyse des pages ---
+
+def scenarios(noms=None):
+    """Dict nom -> contenu (bytes) des pages à mesurer : fixtures puis pages synthétiques."""
+    pages = {f"fixture-{chemin.stem}": chemin.read_bytes() for chemin in sorted(DOSSIER_PAGES.glob('*.html'))}
+    for nom, options in SCENARIOS_SYNTHETIQUES.items():
+        pages[nom] = generer_page_semaine(LUNDI_SYNTHETIQUE, **options)
+    if noms:
+        inconnus = set(noms) - set(pages)
+        if inconnus:
+            raise ValueError(f"Scénarios inconnus: {', '.join(sorted(inconnus))}")
+        pages = {nom: pages[nom] for nom in noms}
+    return pages
+
+
+def cellules_cours(contenu):
+    """Cellules <td> qu'analyse extraire_depuis_cellule pour une page (parcours de référence)."""
+    table = BeautifulSoup(contenu, 'html.parser').select_one('div#planning2 table.semaine')
+    cellules = []
+    for row in table.find('tbody').find_all('tr', recursive=False):
+        for cell in row.find_all('td', recursive=False)[1:]:
+            imbriquees = cell.find_all('table', class_='pleine')
+            if not imbriquees:
+                cellules.append(cell)
+            else:
+                cellules.extend(t.find('td') for t in imbriquees if t.find('td'))
+    return cellules
+
+
+def _chronometrer(fonction, repetitions):
+    """Durées (s) de `repetitions` appels, GC désactivé pendant la mesure."""
+    durees = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repetitions):
+            debut = time.perf_counter()
+            fonction()
+            durees.append(time.perf_counter() - debut)
+    finally:
+        gc.enable()
+    return durees
+
+
+def _pic_memoire(fonction):
+    """Pic d'allocation Python (Mo) pendant un appel, mesuré à part du chronométrage."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fonction()
+        _, pic = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return pic / (1024 * 1024)
+
+
+def mesurer_tableau(contenu, parseur, repetitions=5):
+    """Parcours complet de la page (analyse HTML + tableau + cellules) avec un parseur."""
+    extracteur = ExtracteurUPGC(url_base='http://localhost/', parseur=parseur)
+    nombre_cellules = len(cellules_cours(contenu))
+    evenements = extracteur.extraire_evenements(contenu, 2)
+    durees = _chronometrer(lambda: extracteur.extraire_evenements(contenu, 2), repetitions)
+    mediane = statistics.median(durees)
+    return {
+        'mesure': 'tableau',
+        'parseur': parseur,
+        'octets': len(contenu),
+        'cellules': nombre_cellules,
+        'evenements': len(evenements),
+        'mediane_ms': round(mediane * 1000, 3),
+        'pages_par_s': round(1 / mediane, 2),
+        'cellules_par_s': round(nombre_cellules / mediane, 1),
+        'pic_memoire_mo': round(_pic_memoire(lambda: extracteur.extraire_evenements(contenu, 2)), 2),
+    }
+
+
+def mesurer_cellules(contenu, repetitions=5):
+    """extraire_depuis_cellule seul, sur des cellules déjà analysées (hors construction de l'arbre)."""
+    extracteur = ExtracteurUPGC(url_base='http://localhost/', parseur='html.parser')
+    cellules = cellules_cours(contenu)
+
+    def extraire_tout():
+        for cellule in cellules:
+            extracteur.extraire_depuis_cellule(cellule)
+
+    mediane = statistics.median(_chronometrer(extraire_tout, repetitions))
+    return {
+        'mesure': 'cellules',
+        'parseur': 'html.parser',
+        'octets': len(contenu),
+        'cellules': len(cellules),
+        'mediane_ms': round(mediane * 1000, 3),
+        'cellules_par_s': round(len(cellules) / mediane, 1) if mediane else None,
+        'pic_memoire_mo': round(_pic_memoire(extraire_tout), 2),
+    }
+
+
+def executer(noms_scenarios=None, parseurs=None, repetitions=5):
+    """Exécute toutes les mesures ; retourne une liste de dicts (une ligne par mesure)."""
+    parseurs = parseurs or list(PARSEURS)
+    resultats = []
+    for nom, contenu in scenarios(noms_scenarios).items():
+        for parseur in parseurs:
+            resultats.append({'scenario': nom, **mesurer_tableau(contenu, parseur, repetitions)})
+        resultats.append({'scenario': nom, **mesurer_cellules(contenu, repetitions)})
+    return resultats
+
+
+# --- Sérialisation des réponses de l'API ---
+
+ZONE_BENCHMARK = 999  # zone inexistante sur GRR, pour ne jamais croiser de vraies données
+
+
+def evenements_synthetiques(lundi, nombre):
+    """`nombre` cours répartis du lundi au samedi, avec les libellés du faux GRR."""
+    creneaux = itertools.cycle(faux_grr.CRENEAUX)
+    evenements = []
+    for i in range(nombre):
+        evenements.append({
+            'zone': ZONE_BENCHMARK,
+            'jour': lundi + timedelta(days=i % 6),
+            'horaire': next(creneaux),
+            'ressource': f"SALLE {100 + i // 6}",
+            'type_cours': faux_grr.TYPES[i % len(faux_grr.TYPES)],
+            'enseignant': faux_grr.ENSEIGNANTS[i % len(faux_grr.ENSEIGNANTS)],
+            'intitule': faux_grr.MATIERES[i % len(faux_grr.MATIERES)],
+            'niveau': faux_grr.NIVEAUX[i % len(faux_grr.NIVEAUX)],
+            'salle': f"SALLE {100 + i // 6}",
+        })
+    return evenements
+
+
+def _semaine_double_serialisation(vue, donnees, lundi):
+    """Ancien chemin : CoursSerializer sur des instances, puis re-validation de la réponse."""
+    par_jour = {}
+    for cours in donnees.order_by('jour', 'heure_debut', 'heure_fin', 'horaire'):
+        par_jour.setdefault(cours.jour, []).append(cours)
+    jours = []
+    for i in range(7):
+        d = lundi + timedelta(days=i)
+        evenements = CoursSerializer(par_jour.get(d, []), many=True).data
+        jours.append({'date': d.isoformat(), 'jour_semaine': vue._get_jour_semaine_fr(d),
+                      'nombre_evenements': len(evenements), 'source': 'cache', 'evenements': evenements})
+    serializer = EmploiDuTempsSemaineResponseSerializer(data={
+        'semaine': {'debut': lundi.isoformat(), 'fin': (lundi + timedelta(days=6)).isoformat(),
+                    'numero': lundi.isocalendar()[1], 'annee': lundi.isocalendar()[0]},
+        'zone': ZONE_BENCHMARK,
+        'nombre_total_evenements': sum(j['nombre_evenements'] for j in jours),
+        'jours': jours,
+        'timestamp': timezone.now(),
+    })
+    serializer.is_valid(raise_exception=True)
+    return JSONRenderer().render(serializer.data)
+
+
+def _semaine_directe(vue, donnees, lundi):
+    """Chemin actuel : lignes QuerySet.values() rendues par orjson."""
+    return ORJSONRenderer().render(vue._recuperer_semaine_complete(ZONE_BENCHMARK, lundi, donnees, 'cache'))
+
+
+def mesurer_serialisation(nombre_evenements=300, repetitions=5):
+    """
+    Construction + rendu JSON d'une réponse semaine de `nombre_evenements` cours,
+    requête SQL comprise, par l'ancien et le nouveau chemin. Les cours sont créés
+    dans une transaction annulée à la fin de la mesure.
+    """
+    lundi = LUNDI_SYNTHETIQUE
+    vue = EmploiDuTempsDuJourAPIView()
+    resultats = []
+    with transaction.atomic():
+        Cours.objects.bulk_create(Cours(**evt) for evt in evenements_synthetiques(lundi, nombre_evenements))
+        donnees = Cours.objects.filter(zone=ZONE_BENCHMARK, jour__range=(lundi, lundi + timedelta(days=6)))
+        for chemin, fonction in (('drf', _semaine_double_serialisation), ('values+orjson', _semaine_directe)):
+            appel = lambda: fonction(vue, donnees, lundi)
+            octets = len(appel())
+            mediane = statistics.median(_chronometrer(appel, repetitions))
+            resultats.append({
+                'scenario': f'semaine-{nombre_evenements}',
+                'mesure': 'serialisation',
+                'chemin': chemin,
+                'octets': octets,
+                'evenements': nombre_evenements,
+                'mediane_ms': round(mediane * 1000, 3),
+                'reponses_par_s': round(1 / mediane, 1),
+                'pic_memoire_mo': round(_pic_memoire(appel), 2),
+            })
+        transaction.set_rollback(True)
+    return resultats
+
+
+# --- Concurrence : vue synchrone (pool de workers) et vue asynchrone ---
+
+@contextmanager
+def base_jetable():
+    """Base de test créée pour la mesure (cache froid) puis détruite."""
+    nom_original = connection.settings_dict['NAME']
+    nom_test = connection.settings_dict['TEST']['NAME']
+    with tempfile.TemporaryDirectory() as dossier:
+        if connection.vendor == 'sqlite':
+            # Base fichier plutôt qu'en mémoire : les threads du serveur la partagent
+            connection.settings_dict['TEST']['NAME'] = str(Path(dossier) / 'mesure.sqlite3')
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            yield
+        finally:
+            connection.creation.destroy_test_db(nom_original, verbosity=0)
+            connection.settings_dict['TEST']['NAME'] = nom_test
+
+
+def centiles(durees, rangs=(50, 95, 99)):
+    """Centiles (rang le plus proche) d'une liste de durées, en ms."""
+    triees = sorted(durees)
+    if not triees:
+        return {f'p{r}_ms': None for r in rangs}
+    return {f'p{r}_ms': round(triees[min(len(triees) - 1, round(r / 100 * (len(triees) - 1)))] * 1000, 2)
+            for r in rangs}
+
+
+def _preparer_semaine_en_base(lundi):
+    _nettoyer_zone_benchmark()
+    Cours.objects.bulk_create(Cours(**evt) for evt in evenements_synthetiques(lundi, 60))
+    SemaineScrapee.enregistrer(ZONE_BENCHMARK, lundi, 60)
+
+
+def _nettoyer_zone_benchmark():
+    # Cours en premier : leur suppression alimente le journal, vidé ensuite
+    for modele in (Cours, ConflitCours, ChangementCours, SemaineScrapee, VerrouScraping):
+        modele.objects.filter(zone=ZONE_BENCHMARK).delete()
+
+
+def _urls_charge(prefixe, lundi, scrapings, lectures):
+    """Scrapings de semaines absentes de la base, puis lectures de la semaine en base."""
+    lentes = [lundi + timedelta(weeks=i + 1) for i in range(scrapings)]
+    return (
+        [f"/{prefixe}{jour:%d/%m/%Y}/?zone={ZONE_BENCHMARK}" for jour in lentes],
+        [f"/{prefixe}{lundi:%d/%m/%Y}/?zone={ZONE_BENCHMARK}&semaine=true"] * lectures,
+    )
+
+
+def _charge_synchrone(lentes, rapides, workers):
+    # Durée mesurée depuis l'arrivée de la requête : l'attente d'un worker libre compte
+    def appeler(url, debut):
+        try:
+            Client().get(url)
+        finally:
+            connections.close_all()
+        return time.perf_counter() - debut
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures_lentes = [pool.submit(appeler, url, time.perf_counter()) for url in lentes]
+        futures_rapides = [pool.submit(appeler, url, time.perf_counter()) for url in rapides]
+        return [f.result() for f in futures_lentes], [f.result() for f in futures_rapides]
+
+
+async def _charge_asynchrone(lentes, rapides):
+    client = AsyncClient()
+
+    async def appeler(url):
+        debut = time.perf_counter()
+        await client.get(url)
+        return time.perf_counter() - debut
+
+    taches_lentes = [asyncio.ensure_future(appeler(url)) for url in lentes]
+    taches_rapides = [asyncio.ensure_future(appeler(url)) for url in rapides]
+    return await asyncio.gather(*taches_lentes), await asyncio.gather(*taches_rapides)
+
+
+def mesurer_concurrence(latence=1.0, scrapings=8, lectures=40, workers=4, base_isolee=True):
+    """
+    Latence des lectures d'une semaine en base pendant `scrapings` scrapings lents
+    (faux GRR avec `latence` secondes par page), lancés en même temps :
+    - 'wsgi' : vue DRF synchrone sur un pool de `workers` threads, comme un serveur WSGI ;
+    - 'asgi' : vue asynchrone, toutes les requêtes dans une seule boucle d'événements.
+    Avec `base_isolee`, la mesure tourne dans une base de test jetable ; sinon les
+    données de la zone de benchmark sont supprimées de la base courante à la fin. Le
+    gouverneur est désactivé pour ne mesurer que le modèle d'exécution.
+    """
+    lundi = LUNDI_SYNTHETIQUE
+    resultats = []
+    with FauxServeurGRR(latence=latence) as serveur, override_settings(
+        UPGC_URL_BASE=serveur.url, UPGC_GOUVERNEUR_DEBIT=0,
+        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+    ), (base_jetable() if base_isolee else nullcontext()):
+        try:
+            for chemin, prefixe in (('wsgi', ''), ('asgi', 'async/')):
+                _preparer_semaine_en_base(lundi)
+                lentes, rapides = _urls_charge(prefixe, lundi, scrapings, lectures)
+                requetes_avant = serveur.requetes
+                debut = time.perf_counter()
+                if chemin == 'wsgi':
+                    durees_lentes, durees_rapides = _charge_synchrone(lentes, rapides, workers)
+                else:
+                    durees_lentes, durees_rapides = asyncio.run(_charge_asynchrone(lentes, rapides))
+                resultats.append({
+                    'scenario': f'latence-{latence}s',
+                    'mesure': 'concurrence',
+                    'chemin': f'{chemin}-{workers}-workers' if chemin == 'wsgi' else chemin,
+                    'scrapings': scrapings,
+                    'lectures': lectures,
+                    'requetes_grr': serveur.requetes - requetes_avant,
+                    'duree_totale_s': round(time.perf_counter() - debut, 3),
+                    'lectures_ms': centiles(durees_rapides, (50, 95, 100)),
+                    'scrapings_ms': centiles(durees_lentes, (50, 100)),
+                })
+        finally:
+            _nettoyer_zone_benchmark()
+    return resultats
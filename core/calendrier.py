@@ -0,0 +1,131 @@
+# core/calendrier.py
+"""
+Flux iCalendar (RFC 5545) des cours, pour les abonnements depuis les agendas.
+Le flux est assemblé semaine par semaine : le bloc VEVENT d'une semaine est mis en
+cache sous un jeton dérivé de ses cours (nombre et dernière mise à jour), si bien
+qu'une modification ne régénère que la semaine concernée.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from .models import ORDRE_CHRONOLOGIQUE, debut_semaine, normaliser
+
+DUREE_CACHE = 24 * 3600
+CHAMPS_ICS = ('zone', 'jour', 'horaire', 'heure_debut', 'heure_fin', 'ressource', 'type_cours',
+              'intitule', 'enseignant', 'niveau', 'salle', 'date_maj')
+
+
+def echapper(texte):
+    """Échappement d'une valeur TEXT (RFC 5545 §3.3.11)."""
+    return (texte or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def plier(ligne):
+    """Découpe une ligne de contenu en lignes de 75 octets au plus (RFC 5545 §3.1)."""
+    octets = ligne.encode('utf-8')
+    if len(octets) <= 75:
+        return ligne
+    morceaux = []
+    debut = 0
+    limite = 75
+    while debut < len(octets):
+        fin = min(debut + limite, len(octets))
+        # Ne pas couper un caractère UTF-8 en deux
+        while fin < len(octets) and (octets[fin] & 0xC0) == 0x80:
+            fin -= 1
+        morceaux.append(octets[debut:fin].decode('utf-8'))
+        debut = fin
+        limite = 74  # l'espace de continuation compte
+    return '\r\n '.join(morceaux)
+
+
+def _utc(jour, heure, fuseau):
+    return datetime.combine(jour, heure, tzinfo=fuseau).astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def evenement_ics(cours, fuseau):
+    """Lignes d'un VEVENT pour un cours (dict de CHAMPS_ICS)."""
+    cle = f"{cours['zone']}|{cours['jour']}|{cours['horaire']}|{cours['ressource']}"
+    lignes = [
+        'BEGIN:VEVENT',
+        f"UID:{hashlib.sha1(cle.encode()).hexdigest()}@upgc",
+        f"DTSTAMP:{cours['date_maj'].astimezone(dt_timezone.utc):%Y%m%dT%H%M%SZ}",
+    ]
+    if cours['heure_debut'] and cours['heure_fin']:
+        lignes.append(f"DTSTART:{_utc(cours['jour'], cours['heure_debut'], fuseau)}")
+        lignes.append(f"DTEND:{_utc(cours['jour'], cours['heure_fin'], fuseau)}")
+    else:
+        # Horaire illisible : événement sur la journée
+        lignes.append(f"DTSTART;VALUE=DATE:{cours['jour']:%Y%m%d}")
+    resume = f"{cours['type_cours']} {cours['intitule']}".strip()
+    description = f"{cours['enseignant']} - {cours['niveau']} ({cours['horaire']})"
+    lignes += [
+        f"SUMMARY:{echapper(resume)}",
+        f"LOCATION:{echapper(cours['salle'] or cours['ressource'])}",
+        f"DESCRIPTION:{echapper(description)}",
+        'END:VEVENT',
+    ]
+    return [plier(ligne) for ligne in lignes]
+
+
+def signature_flux(zone, filtres):
+    """Identifiant stable d'un flux (zone et filtres normalisés), pour les clés de cache."""
+    criteres = sorted((champ, sorted({normaliser(v) for v in valeurs})) for champ, valeurs in filtres.items())
+    return hashlib.sha1(repr((zone, criteres)).encode()).hexdigest()
+
+
+def jetons_semaines(cours, lundis):
+    """
+    Jeton de chaque semaine (nombre de cours, dernière mise à jour), en une requête.
+    Toute création ou modification avance la date, toute suppression change le nombre.
+    """
+    par_semaine = {lundi: [0, None] for lundi in lundis}
+    for ligne in cours.order_by().values('jour').annotate(nombre=Count('id'), maj=Max('date_maj')):
+        jeton = par_semaine[debut_semaine(ligne['jour'])]
+        jeton[0] += ligne['nombre']
+        if jeton[1] is None or ligne['maj'] > jeton[1]:
+            jeton[1] = ligne['maj']
+    return {lundi: f"{n}-{maj.timestamp() if maj else 0}" for lundi, (n, maj) in par_semaine.items()}
+
+
+def blocs_semaines(cours, signature, jetons):
+    """
+    Lignes VEVENT de chaque semaine, depuis le cache quand le jeton n'a pas changé.
+    Les semaines manquantes sont générées en une seule requête.
+    """
+    cles = {lundi: f"ics:{signature}:{lundi}:{jeton}" for lundi, jeton in jetons.items()}
+    en_cache = cache.get_many(list(cles.values()))
+    blocs = {lundi: en_cache[cle] for lundi, cle in cles.items() if cle in en_cache}
+    manquantes = sorted(set(jetons) - set(blocs))
+    if manquantes:
+        fuseau = ZoneInfo(settings.TIME_ZONE)
+        nouveaux = {lundi: [] for lundi in manquantes}
+        requete = cours.filter(jour__range=(manquantes[0], manquantes[-1] + timedelta(days=6)))
+        for c in requete.order_by('jour', *ORDRE_CHRONOLOGIQUE).values(*CHAMPS_ICS):
+            lundi = debut_semaine(c['jour'])
+            if lundi in nouveaux:
+                nouveaux[lundi].extend(evenement_ics(c, fuseau))
+        cache.set_many({cles[lundi]: lignes for lundi, lignes in nouveaux.items()}, DUREE_CACHE)
+        blocs.update(nouveaux)
+    return [blocs[lundi] for lundi in sorted(blocs)]
+
+
+def calendrier(nom, blocs):
+    """Document VCALENDAR complet (str, lignes terminées par CRLF)."""
+    lignes = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//UPGC//Emploi du temps//FR',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        plier(f"X-WR-CALNAME:{echapper(nom)}"),
+    ]
+    for bloc in blocs:
+        lignes.extend(bloc)
+    lignes.append('END:VCALENDAR')
+    return '\r\n'.join(lignes) + '\r\n'
@@ -0,0 +1,155 @@
+# core/charge.py
+"""
+Test de charge de bout en bout, sans solliciter upgc.mygrr.net.
+L'application est servie par un serveur WSGI multi-thread local (celui de runserver),
+branchée sur un faux GRR (core/faux_grr.py) et sur une base de test jetable. Un
+mélange de requêtes /aujourdhui/, par date et ?semaine=true est envoyé par des
+clients HTTP concurrents ; la latence est ventilée par source des données
+(cache, stale, scraping) pour séparer les lectures en base des scrapings.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from datetime import date, timedelta
+import random
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.test.utils import override_settings
+import requests
+
+from .benchmarks import base_jetable, centiles
+from .faux_grr import DOSSIER_PAGES, FauxServeurGRR
+from .models import debut_semaine
+
+# Part de chaque type d'URL dans le mélange
+MELANGE = {'aujourdhui': 0.5, 'date': 0.3, 'semaine': 0.2}
+MOTIF_FIXTURE = re.compile(r'week_all_zone(\d+)_(\d{4}-\d{2}-\d{2})\.html$')
+
+
+class _Gestionnaire(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def serveur_wsgi():
+    """L'application Django servie en HTTP sur un port libre ; renvoie l'URL de base."""
+    serveur = ThreadedWSGIServer(('127.0.0.1', 0), _Gestionnaire)
+    serveur.set_app(get_wsgi_application())
+    thread = threading.Thread(target=serveur.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{serveur.server_address[1]}"
+    finally:
+        serveur.shutdown()
+        serveur.server_close()
+
+
+def pages_fixtures():
+    """Pages enregistrées de core/fixtures/pages, par (zone, lundi) d'après leur nom."""
+    pages = {}
+    for chemin in sorted(DOSSIER_PAGES.glob('*.html')):
+        correspondance = MOTIF_FIXTURE.search(chemin.name)
+        if correspondance:
+            zone, jour = correspondance.groups()
+            pages[(int(zone), debut_semaine(date.fromisoformat(jour)))] = chemin.read_bytes()
+    return pages
+
+
+def melange_requetes(semaines, nombre, aujourdhui=None, graine=0):
+    """
+    `nombre` (type, URL) tirés selon MELANGE parmi les (zone, lundi) de `semaines`.
+    /aujourdhui/ n'est demandé que pour les zones dont la semaine courante est servie.
+    """
+    aujourdhui = aujourdhui or date.today()
+    alea = random.Random(graine)
+    zones_courantes = sorted(zone for zone, lundi in semaines if lundi == debut_semaine(aujourdhui))
+    types = [t for t in MELANGE if t != 'aujourdhui' or zones_courantes]
+    poids = [MELANGE[t] for t in types]
+    urls = []
+    for _ in range(nombre):
+        type_url = alea.choices(types, poids)[0]
+        if type_url == 'aujourdhui':
+            urls.append((type_url, f"/aujourdhui/?zone={alea.choice(zones_courantes)}"))
+            continue
+        zone, lundi = alea.choice(semaines)
+        jour = lundi + timedelta(days=alea.randrange(6))
+        suffixe = '&semaine=true' if type_url == 'semaine' else ''
+        urls.append((type_url, f"/{jour:%d/%m/%Y}/?zone={zone}{suffixe}"))
+    return urls
+
+
+def _source(reponse):
+    if reponse.status_code != 200:
+        return 'erreur'
+    corps = reponse.json()
+    # Réponse semaine : la source est portée par chaque jour
+    return corps.get('source') or corps['jours'][0]['source']
+
+
+def mesurer_charge(requetes=500, concurrence=8, zones=(2, 3), semaines=4, latence=0.5,
+                   pages='synthetique', nombre_ressources=50, cours_par_cellule=2,
+                   base_isolee=True, graine=0):
+    """
+    Envoie `requetes` requêtes du mélange, `concurrence` à la fois (chaque client
+    enchaîne ses requêtes), et retourne débit et centiles, globaux et par source.
+    `pages` : 'synthetique' (semaine courante et `semaines - 1` suivantes pour
+    `zones`, `nombre_ressources` salles) ou 'fixtures' (semaines enregistrées
+    seulement). `latence` : délai (s) de chaque page du faux GRR. Avec `base_isolee`,
+    la mesure part d'une base de test vide, détruite ensuite. Le gouverneur est
+    désactivé : le faux GRR est local.
+    """
+    if pages == 'fixtures':
+        enregistrees = pages_fixtures()
+        serveur_grr = FauxServeurGRR(pages=enregistrees, latence=latence, generer=False)
+        liste_semaines = sorted(enregistrees)
+    else:
+        serveur_grr = FauxServeurGRR(latence=latence, nombre_ressources=nombre_ressources,
+                                     cours_par_cellule=cours_par_cellule)
+        lundi = debut_semaine(date.today())
+        liste_semaines = [(zone, lundi + timedelta(weeks=i)) for zone in zones for i in range(semaines)]
+    urls = melange_requetes(liste_semaines, requetes, graine=graine)
+
+    local = threading.local()
+
+    def appeler(base, type_url, url):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        debut = time.perf_counter()
+        try:
+            source = _source(local.session.get(base + url, timeout=60))
+        except (requests.RequestException, ValueError, KeyError, IndexError):
+            source = 'erreur'
+        return type_url, source, time.perf_counter() - debut
+
+    with serveur_grr, override_settings(
+        UPGC_URL_BASE=serveur_grr.url, UPGC_GOUVERNEUR_DEBIT=0,
+        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, '127.0.0.1'],
+    ), (base_jetable() if base_isolee else nullcontext()), serveur_wsgi() as base:
+        debut = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrence) as clients:
+            mesures = list(clients.map(lambda r: appeler(base, *r), urls))
+        duree = time.perf_counter() - debut
+
+    par_source, par_type = {}, {}
+    for type_url, source, ecoule in mesures:
+        par_source.setdefault(source, []).append(ecoule)
+        par_type.setdefault(type_url, []).append(ecoule)
+    return {
+        'mesure': 'charge',
+        'pages': pages if pages == 'fixtures' else f'synthetique-{nombre_ressources}',
+        'latence_s': latence,
+        'concurrence': concurrence,
+        'requetes': len(mesures),
+        'semaines': len(liste_semaines),
+        'requetes_grr': serveur_grr.requetes,
+        'duree_s': round(duree, 3),
+        'debit_req_s': round(len(mesures) / duree, 1) if duree else None,
+        'global_ms': centiles([m[2] for m in mesures]),
+        'par_source': {s: {'requetes': len(d), **centiles(d)} for s, d in sorted(par_source.items())},
+        'par_type': {t: {'requetes': len(d), **centiles(d)} for t, d in sorted(par_type.items())},
+    }
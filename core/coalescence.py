@@ -0,0 +1,137 @@
+# core/coalescence.py
+"""
+Scraping à vol unique : quand plusieurs requêtes demandent la même semaine en même
+temps, une seule la récupère et les autres attendent son résultat.
+Entre threads d'un processus, les suiveurs attendent un threading.Event ; entre
+processus, le verrou VerrouScraping en base désigne le meneur. Les vues
+asynchrones suivent le même protocole avec des asyncio.Future.
+"""
+import asyncio
+import logging
+import threading
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from .models import SemaineScrapee, VerrouScraping, debut_semaine
+
+logger = logging.getLogger(__name__)
+
+# Résultat d'un suiveur quand la semaine a été récupérée par un autre processus
+PARTAGE = {'statut': 'partage'}
+
+INTERVALLE_SONDAGE = 0.2
+
+_verrou = threading.Lock()
+_vols = {}
+_vols_async = {}
+
+
+class _Vol:
+    def __init__(self):
+        self.termine = threading.Event()
+        self.resultat = None
+
+
+def executer_une_fois(zone, jour, fonction, attente=None):
+    """
+    Exécute `fonction()` pour la semaine (zone, jour) si aucun scraping de cette
+    semaine n'est en cours, sinon attend celui en cours (au plus `attente` secondes)
+    et retourne son résultat. Retourne None si l'attente expire.
+    """
+    attente = settings.UPGC_SCRAPING_ATTENTE if attente is None else attente
+    cle = (zone, debut_semaine(jour))
+    with _verrou:
+        vol = _vols.get(cle)
+        meneur = vol is None
+        if meneur:
+            vol = _vols[cle] = _Vol()
+
+    if not meneur:
+        if not vol.termine.wait(attente):
+            logger.warning(f"Attente du scraping zone={zone} semaine={cle[1]} expirée")
+            return None
+        return vol.resultat
+
+    try:
+        vol.resultat = _executer_entre_processus(zone, jour, fonction, attente)
+        return vol.resultat
+    finally:
+        with _verrou:
+            del _vols[cle]
+        vol.termine.set()
+
+
+def _executer_entre_processus(zone, jour, fonction, attente):
+    proprietaire = uuid.uuid4().hex
+    debut_attente = timezone.now()
+    limite = time.monotonic() + attente
+    while True:
+        if VerrouScraping.acquerir(zone, jour, proprietaire, settings.UPGC_VERROU_DUREE):
+            try:
+                return fonction()
+            finally:
+                VerrouScraping.liberer(zone, jour, proprietaire)
+
+        # Un autre processus récupère la semaine : on attend qu'il libère le verrou
+        while VerrouScraping.est_tenu(zone, jour):
+            if time.monotonic() >= limite:
+                logger.warning(f"Attente du scraping zone={zone} semaine={debut_semaine(jour)} expirée")
+                return None
+            time.sleep(INTERVALLE_SONDAGE)
+
+        registre = SemaineScrapee.pour(zone, jour)
+        if registre and registre.date_scraping >= debut_attente:
+            return PARTAGE
+        # Verrou libéré sans scraping réussi, ou expiré : nouvelle tentative
+
+
+async def executer_une_fois_async(zone, jour, fabrique, attente=None):
+    """
+    Équivalent asynchrone d'executer_une_fois : `fabrique()` renvoie la coroutine à
+    exécuter. Les appels concurrents d'une même boucle d'événements attendent le
+    premier ; entre processus (et avec les vues synchrones), le verrou en base fait foi.
+    """
+    attente = settings.UPGC_SCRAPING_ATTENTE if attente is None else attente
+    cle = (id(asyncio.get_running_loop()), zone, debut_semaine(jour))
+    vol = _vols_async.get(cle)
+    if vol is not None:
+        try:
+            return await asyncio.wait_for(asyncio.shield(vol), attente)
+        except asyncio.TimeoutError:
+            logger.warning(f"Attente du scraping zone={zone} semaine={cle[2]} expirée")
+            return None
+
+    vol = _vols_async[cle] = asyncio.get_running_loop().create_future()
+    resultat = None
+    try:
+        resultat = await _executer_entre_processus_async(zone, jour, fabrique, attente)
+        return resultat
+    finally:
+        del _vols_async[cle]
+        vol.set_result(resultat)
+
+
+async def _executer_entre_processus_async(zone, jour, fabrique, attente):
+    proprietaire = uuid.uuid4().hex
+    debut_attente = timezone.now()
+    limite = time.monotonic() + attente
+    while True:
+        if await sync_to_async(VerrouScraping.acquerir)(zone, jour, proprietaire, settings.UPGC_VERROU_DUREE):
+            try:
+                return await fabrique()
+            finally:
+                await sync_to_async(VerrouScraping.liberer)(zone, jour, proprietaire)
+
+        while await sync_to_async(VerrouScraping.est_tenu)(zone, jour):
+            if time.monotonic() >= limite:
+                logger.warning(f"Attente du scraping zone={zone} semaine={debut_semaine(jour)} expirée")
+                return None
+            await asyncio.sleep(INTERVALLE_SONDAGE)
+
+        registre = await sync_to_async(SemaineScrapee.pour)(zone, jour)
+        if registre and registre.date_scraping >= debut_attente:
+            return PARTAGE
@@ -0,0 +1,96 @@
+# core/conflits.py
+"""
+Détection des doubles réservations dans les cours stockés.
+Pour chaque salle, enseignant et niveau d'un jour, un balayage des créneaux triés
+par heure de début trouve les chevauchements en O(n log n + k), k étant le nombre
+de conflits. Les résultats sont enregistrés dans ConflitCours.
+"""
+from collections import defaultdict
+from datetime import timedelta
+import heapq
+import logging
+
+from django.db import transaction
+
+from .models import Cours, ConflitCours, debut_semaine, normaliser
+
+logger = logging.getLogger(__name__)
+
+# Valeurs de remplissage du parseur, qui ne désignent personne
+CLES_IGNOREES = {'', normaliser('Non spécifié')}
+
+CHAMPS_LUS = ('id', 'zone', 'jour', 'horaire', 'intitule', 'heure_debut', 'heure_fin',
+              'ressource_norm', 'enseignant_norm', 'niveau_norm')
+
+
+def chevauchements(intervalles):
+    """
+    Paires d'intervalles [debut, fin) qui se chevauchent, par balayage.
+    `intervalles` : (debut, fin, ident). Retourne des (ident_a, ident_b, debut, fin),
+    (debut, fin) étant la partie commune, ident_a ayant commencé le premier.
+    """
+    paires = []
+    actifs = []  # tas des intervalles en cours, par fin croissante
+    for debut, fin, ident in sorted(intervalles):
+        while actifs and actifs[0][0] <= debut:
+            heapq.heappop(actifs)
+        for fin_actif, ident_actif in actifs:
+            paires.append((ident_actif, ident, debut, min(fin, fin_actif)))
+        heapq.heappush(actifs, (fin, ident))
+    return paires
+
+
+def _cles(cours):
+    yield 'salle', cours['ressource_norm']
+    # Un cours partagé ("Dr A / Dr B") compte pour chacun de ses enseignants
+    for nom in set(cours['enseignant_norm'].strip('|').split('|')):
+        yield 'enseignant', nom
+    yield 'niveau', cours['niveau_norm']
+
+
+def detecter_conflits(cours):
+    """
+    Conflits entre les cours donnés (dicts de CHAMPS_LUS), par (zone, jour, type, clé).
+    Deux cours de même horaire et même intitulé (un cours réparti sur plusieurs
+    salles) ne sont pas un conflit d'enseignant ni de niveau.
+    """
+    par_id = {}
+    groupes = defaultdict(list)
+    for c in cours:
+        if c['heure_debut'] is None or c['heure_fin'] is None:
+            continue
+        par_id[c['id']] = c
+        for type_conflit, cle in _cles(c):
+            if cle not in CLES_IGNOREES:
+                groupes[(c['zone'], c['jour'], type_conflit, cle)].append((c['heure_debut'], c['heure_fin'], c['id']))
+
+    conflits = []
+    for (zone, jour, type_conflit, cle), intervalles in groupes.items():
+        if len(intervalles) < 2:
+            continue
+        for id_a, id_b, debut, fin in chevauchements(intervalles):
+            a, b = par_id[id_a], par_id[id_b]
+            if type_conflit != 'salle' and (a['horaire'], a['intitule']) == (b['horaire'], b['intitule']):
+                continue
+            conflits.append({
+                'zone': zone, 'jour': jour, 'type_conflit': type_conflit, 'cle': cle,
+                'cours_a_id': id_a, 'cours_b_id': id_b, 'debut': debut, 'fin': fin,
+            })
+    return conflits
+
+
+def recalculer_conflits(zone, debut, fin):
+    """Remplace les conflits enregistrés de la zone entre `debut` et `fin` ; retourne leur nombre."""
+    cours = Cours.objects.filter(zone=zone, jour__range=(debut, fin)).values(*CHAMPS_LUS)
+    conflits = detecter_conflits(cours.iterator(chunk_size=2000))
+    with transaction.atomic():
+        ConflitCours.objects.filter(zone=zone, jour__range=(debut, fin)).delete()
+        ConflitCours.objects.bulk_create((ConflitCours(**c) for c in conflits), batch_size=500)
+    if conflits:
+        logger.info(f"{len(conflits)} conflit(s) zone={zone} du {debut} au {fin}")
+    return len(conflits)
+
+
+def recalculer_semaine(zone, jour):
+    lundi = debut_semaine(jour)
+    return recalculer_conflits(zone, lundi, lundi + timedelta(days=6))
@@ -0,0 +1,193 @@
+# core/faux_grr.py
+"""
+Faux site GRR (week_all.php) pour les tests, benchmarks et tests de charge.
+Sert des pages enregistrées ou générées, sans jamais solliciter upgc.mygrr.net.
+"""
+from datetime import date, timedelta
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import hashlib
+import random
+import threading
+import time
+import urllib.parse
+
+from .models import debut_semaine
+
+DOSSIER_PAGES = Path(__file__).resolve().parent / 'fixtures' / 'pages'
+
+JOURS_COURTS = ['Lun', 'Mar', 'Mer', 'Jeu', 'Ven', 'Sam', 'Dim']
+CRENEAUX = ['07:30 à 09:30', '07:30 à 11:30', '08:00 à 10:00', '10:00 à 12:00',
+            '13:00 à 15:00', '14:00 à 17:00', '15:00 à 18:00', '17:00 à 19:00']
+TYPES = ['CM', 'TD', 'TP', 'EXAMEN', 'DEVOIR SURVEILLE', 'PROJET']
+ENSEIGNANTS = ['Dr KONE Adama', 'Dr TRAORE Bakary', 'Mme OUATTARA Mariam', 'M. COULIBALY Issa',
+               'Dr YAO Konan', "Dr N'GUESSAN Ama", 'Dr SORO Fatou', 'M. KOUAME Jean']
+MATIERES = ['BIOLOGIE CELLULAIRE', 'CHIMIE GENERALE', 'GENETIQUE', 'ALGORITHMIQUE',
+            'ECONOMIE GENERALE', 'STATISTIQUES', 'DROIT CIVIL', 'ANGLAIS']
+NIVEAUX = ['L1 BIO', 'L2 BIO', 'L3 BIO', 'L1 MIAGE', 'L2 MIAGE', 'L1 ECO', 'M1 DROIT', 'M2 MIAGE']
+
+
+def charger_page(nom):
+    """Contenu (bytes) d'une page enregistrée dans core/fixtures/pages."""
+    return (DOSSIER_PAGES / nom).read_bytes()
+
+
+def _cellule_cours(alea, salle):
+    enseignant = alea.choice(ENSEIGNANTS)
+    if alea.random() < 0.2:
+        enseignant = f"{enseignant} / {alea.choice(ENSEIGNANTS)}"
+    return (
+        '<table class="pleine"><tr><td class="type_A">'
+        f'<a href="view_entry.php?id={alea.randint(1, 99999)}&amp;page=week_all">'
+        f'<span class="small_planning"><b>{escape(alea.choice(CRENEAUX))}</b><br>{alea.choice(TYPES)}<br>'
+        f'{escape(enseignant)}<br>{alea.choice(MATIERES)}<br>'
+        f'<i>Niveau : {alea.choice(NIVEAUX)}</i><br><i>Salle : {escape(salle)}</i></span></a>'
+        '</td></tr></table>'
+    )
+
+
+def generer_page_semaine(lundi, zone=2, nombre_ressources=6, cours_par_cellule=2, taux_remplissage=0.6, graine=0):
+    """
+    Génère une page week_all.php synthétique pour la semaine commençant `lundi`.
+    Chaque ressource a une ligne ; chaque jour ouvré reçoit jusqu'à `cours_par_cellule`
+    tables imbriquées "pleine". Le contenu est déterministe pour (graine, zone, lundi).
+    """
+    lundi = debut_semaine(lundi)
+    alea = random.Random(f"{graine}-{zone}-{lundi.isoformat()}")
+    jours = [lundi + timedelta(days=i) for i in range(7)]
+
+    entetes = ''.join(
+        f'<th class="jour_sem"><a href="week_all.php?year={j.year}&amp;month={j.month:02d}'
+        f'&amp;day={j.day:02d}&amp;area={zone}">{JOURS_COURTS[i]} {j:%d/%m}</a></th>'
+        for i, j in enumerate(jours)
+    )
+    lignes = []
+    for r in range(nombre_ressources):
+        salle = f"SALLE {100 + r}"
+        cellules = []
+        for j in jours:
+            contenu = ''
+            if j.weekday() < 6:
+                contenu = ''.join(
+                    _cellule_cours(alea, salle)
+                    for _ in range(cours_par_cellule) if alea.random() < taux_remplissage
+                )
+            cellules.append(f'<td class="cell_month">{contenu or " "}</td>')
+        lignes.append(
+            f'<tr><td class="cell_hours"><a href="week.php?room={r}">{salle}</a></td>{"".join(cellules)}</tr>'
+        )
+
+    return (
+        '<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8"><title>GRR</title></head><body>'
+        '<div id="menu_gauche"><table class="calendar"><tr><td>Calendrier</td></tr></table></div>'
+        '<div id="planning2"><table class="semaine">'
+        f'<thead><tr><th class="jour_sem">Ressources</th>{entetes}</tr></thead>'
+        f'<tbody>{"".join(lignes)}</tbody></table></div>'
+        '</body></html>'
+    ).encode('utf-8')
+
+
+class FauxServeurGRR:
+    """
+    Serveur HTTP local imitant week_all.php.
+    `pages` associe (zone, lundi) à un contenu enregistré ; les autres semaines sont
+    générées par `generer_page_semaine` (ou renvoient 404 si `generer=False`).
+    `latence` ajoute un délai artificiel (secondes) à chaque réponse.
+    Avec `etags=True`, les réponses portent un ETag et If-None-Match reçoit un 304.
+
+        with FauxServeurGRR(latence=0.2) as serveur:
+            ExtracteurUPGC(url_base=serveur.url).recuperer_emploi_du_temps(...)
+    """
+
+    def __init__(self, pages=None, latence=0.0, generer=True, etags=False, **options_generation):
+        self.pages = {(zone, debut_semaine(lundi)): contenu for (zone, lundi), contenu in (pages or {}).items()}
+        self.latence = latence
+        self.generer = generer
+        self.etags = etags
+        self.options_generation = options_generation
+        self.requetes = 0
+        self.reponses_304 = 0
+        self.en_cours = 0
+        self.max_simultanees = 0
+        self._verrou = threading.Lock()
+        self._serveur = None
+        self._thread = None
+
+    @property
+    def url(self):
+        hote, port = self._serveur.server_address[:2]
+        return f"http://{hote}:{port}/week_all.php"
+
+    def page(self, zone, jour):
+        lundi = debut_semaine(jour)
+        if (zone, lundi) in self.pages:
+            return self.pages[(zone, lundi)]
+        if self.generer:
+            return generer_page_semaine(lundi, zone=zone, **self.options_generation)
+        return None
+
+    def demarrer(self):
+        faux = self
+
+        class Gestionnaire(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with faux._verrou:
+                    faux.requetes += 1
+                    faux.en_cours += 1
+                    faux.max_simultanees = max(faux.max_simultanees, faux.en_cours)
+                try:
+                    if faux.latence:
+                        time.sleep(faux.latence)
+                    params = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+                    try:
+                        zone = int(params['area'][-1])
+                        jour = date(int(params['year'][0]), int(params['month'][0]), int(params['day'][0]))
+                    except (KeyError, ValueError):
+                        zone, jour = int(params.get('area', ['2'])[-1]), date.today()
+                    contenu = faux.page(zone, jour)
+                    if contenu is None:
+                        self.send_error(404)
+                        return
+                    etag = f'"{hashlib.sha1(contenu).hexdigest()[:16]}"' if faux.etags else None
+                    if etag and self.headers.get('If-None-Match') == etag:
+                        with faux._verrou:
+                            faux.reponses_304 += 1
+                        self.send_response(304)
+                        self.send_header('ETag', etag)
+                        self.end_headers()
+                        return
+                    self.send_response(200)
+                    if etag:
+                        self.send_header('ETag', etag)
+                    self.send_header('Content-Type', 'text/html; charset=utf-8')
+                    self.send_header('Content-Length', str(len(contenu)))
+                    self.end_headers()
+                    try:
+                        self.wfile.write(contenu)
+                    except (BrokenPipeError, ConnectionResetError):
+                        pass  # client parti avant la fin (délai dépassé)
+                finally:
+                    with faux._verrou:
+                        faux.en_cours -= 1
+
+            def log_message(self, format, *args):
+                pass
+
+        self._serveur = ThreadingHTTPServer(('127.0.0.1', 0), Gestionnaire)
+        self._serveur.daemon_threads = True
+        self._thread = threading.Thread(target=self._serveur.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def arreter(self):
+        if self._serveur:
+            self._serveur.shutdown()
+            self._serveur.server_close()
+            self._serveur = None
+
+    def __enter__(self):
+        return self.demarrer()
+
+    def __exit__(self, *exc):
+        self.arreter()
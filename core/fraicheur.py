@@ -0,0 +1,71 @@
+# core/fraicheur.py
+"""
+Politique de fraîcheur des semaines en base (stale-while-revalidate).
+Une semaine scrapée depuis moins longtemps que sa durée de fraîcheur est servie
+telle quelle ; au-delà, elle est encore servie immédiatement, mais un scraping est
+relancé en arrière-plan pour les requêtes suivantes.
+"""
+from datetime import date, timedelta
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from .models import debut_semaine
+from .tasks import synchroniser_semaine
+
+logger = logging.getLogger(__name__)
+
+_verrou = threading.Lock()
+_en_cours = set()
+
+
+def duree_fraicheur(lundi, aujourdhui=None):
+    """
+    Durée de fraîcheur (timedelta) de la semaine commençant `lundi`, selon qu'elle
+    est passée, courante ou à venir ; None si elle n'est jamais revalidée.
+    """
+    courante = debut_semaine(aujourdhui or date.today())
+    if lundi < courante:
+        secondes = settings.UPGC_FRAICHEUR_PASSEE
+    elif lundi == courante:
+        secondes = settings.UPGC_FRAICHEUR_COURANTE
+    else:
+        secondes = settings.UPGC_FRAICHEUR_FUTURE
+    return timedelta(seconds=secondes) if secondes > 0 else None
+
+
+def est_perimee(registre, aujourdhui=None, maintenant=None):
+    """Vrai si la semaine du registre a dépassé sa durée de fraîcheur."""
+    duree = duree_fraicheur(registre.debut_semaine, aujourdhui)
+    if duree is None:
+        return False
+    return (maintenant or timezone.now()) - registre.date_scraping > duree
+
+
+def _revalider(zone, lundi):
+    try:
+        synchroniser_semaine(zone, lundi)
+    except Exception as e:
+        logger.error(f"Revalidation zone={zone} semaine={lundi} en échec: {e}", exc_info=True)
+    finally:
+        with _verrou:
+            _en_cours.discard((zone, lundi))
+        connections.close_all()
+
+
+def revalider_en_arriere_plan(zone, jour):
+    """
+    Relance le scraping de la semaine dans un thread, sans attendre son résultat.
+    Retourne le thread, ou None si une revalidation de la semaine est déjà en cours.
+    """
+    cle = (zone, debut_semaine(jour))
+    with _verrou:
+        if cle in _en_cours:
+            return None
+        _en_cours.add(cle)
+    thread = threading.Thread(target=_revalider, args=cle, name=f"revalidation-{zone}-{cle[1]}", daemon=True)
+    thread.start()
+    return thread
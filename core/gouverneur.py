@@ -0,0 +1,148 @@
+# core/gouverneur.py
+"""
+Limitation des requêtes envoyées au site de l'UPGC.
+Toutes les requêtes HTTP de l'extracteur prennent un jeton dans un seau global
+(débit moyen et rafale bornés), dont l'état est en base : la limite vaut pour
+l'ensemble des processus, pas pour chacun. Une actualisation forcée
+(?actualiser=true) d'une semaine scrapée il y a moins de
+UPGC_ACTUALISATION_INTERVALLE secondes est ignorée et servie depuis la base.
+Les compteurs sont propres au processus.
+"""
+from collections import Counter
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import metriques
+from .models import SeauJetonsPartage, SemaineScrapee
+
+logger = logging.getLogger(__name__)
+
+
+class DebitDepasse(Exception):
+    """Aucun jeton disponible dans le délai d'attente autorisé."""
+
+
+class SeauJetons:
+    """
+    Seau à jetons : `capacite` requêtes en rafale, puis `debit` requêtes par seconde.
+    Un débit nul ou négatif désactive la limitation.
+    """
+
+    def __init__(self, debit, capacite, horloge=time.monotonic):
+        self.debit = debit
+        self.capacite = max(1, capacite)
+        self.horloge = horloge
+        self.jetons = float(self.capacite)
+        self.derniere = horloge()
+        self._verrou = threading.Lock()
+
+    def _reserver(self):
+        """Réserve un jeton ; retourne le délai (s) avant de pouvoir l'utiliser."""
+        with self._verrou:
+            maintenant = self.horloge()
+            self.jetons = min(self.capacite, self.jetons + (maintenant - self.derniere) * self.debit)
+            self.derniere = maintenant
+            self.jetons -= 1
+            # Jetons négatifs : requêtes déjà réservées en attente de leur tour
+            return 0.0 if self.jetons >= 0 else -self.jetons / self.debit
+
+    def _annuler(self):
+        with self._verrou:
+            self.jetons += 1
+
+    def prendre(self, attente_max=None):
+        """
+        Prend un jeton, en attendant au plus `attente_max` secondes (sans limite si
+        None). Retourne le temps attendu ; lève DebitDepasse si l'attente serait plus longue.
+        """
+        if self.debit <= 0:
+            return 0.0
+        delai = self._reserver()
+        if attente_max is not None and delai > attente_max:
+            self._annuler()
+            raise DebitDepasse(f"Limite de {self.debit} requêtes/s vers l'UPGC atteinte")
+        if delai:
+            time.sleep(delai)
+        return delai
+
+
+class SeauJetonsBase(SeauJetons):
+    """Seau à jetons dont l'état est la ligne `nom` de SeauJetonsPartage, commune aux processus."""
+
+    def __init__(self, debit, capacite, nom='upgc', horloge=time.time):
+        super().__init__(debit, capacite, horloge)
+        self.nom = nom
+
+    def _reserver(self):
+        jetons = SeauJetonsPartage.reserver(self.nom, self.debit, self.capacite, self.horloge())
+        return 0.0 if jetons >= 0 else -jetons / self.debit
+
+    def _annuler(self):
+        SeauJetonsPartage.rendre(self.nom)
+
+
+class Gouverneur:
+    """Seau de jetons partagé et intervalle minimal entre deux actualisations forcées."""
+
+    def __init__(self, debit, capacite):
+        self.seau = SeauJetonsBase(debit, capacite)
+        self._compteurs = Counter()
+        self._verrou = threading.Lock()
+
+    def _compter(self, nom, valeur=1):
+        with self._verrou:
+            self._compteurs[nom] += valeur
+
+    def statistiques(self):
+        """Copie des compteurs : requêtes, requêtes retardées et refusées, actualisations ignorées."""
+        with self._verrou:
+            return dict(self._compteurs)
+
+    def avant_requete(self):
+        """À appeler avant chaque requête HTTP vers l'UPGC ; peut bloquer ou lever DebitDepasse."""
+        try:
+            attente = self.seau.prendre(settings.UPGC_GOUVERNEUR_ATTENTE)
+        except DebitDepasse:
+            self._compter('requetes_refusees')
+            metriques.GOUVERNEUR.inc(evenement='requete_refusee')
+            raise
+        self._compter('requetes')
+        metriques.SCRAPING_PHASES.observer(attente, phase='attente_gouverneur')
+        if attente:
+            self._compter('requetes_retardees')
+            self._compter('attente_totale_s', attente)
+            metriques.GOUVERNEUR.inc(evenement='requete_retardee')
+        else:
+            metriques.GOUVERNEUR.inc(evenement='requete_immediate')
+
+    def autoriser_actualisation(self, zone, jour):
+        """
+        Faux si la semaine a été scrapée il y a moins de UPGC_ACTUALISATION_INTERVALLE
+        secondes : l'actualisation forcée est alors ignorée (et comptée).
+        """
+        registre = SemaineScrapee.pour(zone, jour)
+        intervalle = settings.UPGC_ACTUALISATION_INTERVALLE
+        if registre is None or (timezone.now() - registre.date_scraping).total_seconds() >= intervalle:
+            return True
+        self._compter('actualisations_ignorees')
+        metriques.GOUVERNEUR.inc(evenement='actualisation_ignoree')
+        logger.info(f"Actualisation ignorée zone={zone} semaine={registre.debut_semaine}: "
+                    f"scrapée il y a moins de {intervalle}s")
+        return False
+
+
+_gouverneurs = {}
+_verrou_gouverneurs = threading.Lock()
+
+
+def obtenir_gouverneur():
+    """Gouverneur du processus pour les réglages courants."""
+    cle = (settings.UPGC_GOUVERNEUR_DEBIT, settings.UPGC_GOUVERNEUR_RAFALE)
+    with _verrou_gouverneurs:
+        if cle not in _gouverneurs:
+            _gouverneurs[cle] = Gouverneur(*cle)
+        return _gouverneurs[cle]
@@ -0,0 +1,68 @@
+# core/intervalles.py
+"""
+Calcul d'intervalles horaires pour la recherche de salles libres.
+Les intervalles sont semi-ouverts [debut, fin), en minutes depuis minuit : un
+cours 08:00–10:00 et un cours 10:00–12:00 ne se chevauchent pas.
+"""
+from collections import defaultdict
+
+MINUTES_JOUR = 24 * 60
+
+
+def en_minutes(heure):
+    return heure.hour * 60 + heure.minute
+
+
+def en_heure(minutes):
+    """'HH:MM' d'un nombre de minutes depuis minuit (24:00 pour la fin de journée)."""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def fusionner(intervalles):
+    """Union d'intervalles : liste triée d'intervalles disjoints (les contigus sont réunis)."""
+    fusion = []
+    for debut, fin in sorted(intervalles):
+        if fusion and debut <= fusion[-1][1]:
+            if fin > fusion[-1][1]:
+                fusion[-1][1] = fin
+        else:
+            fusion.append([debut, fin])
+    return [(debut, fin) for debut, fin in fusion]
+
+
+def complement(occupes, debut, fin):
+    """Parties de [debut, fin) non couvertes par `occupes` (trié et disjoint, cf. fusionner)."""
+    libres = []
+    curseur = debut
+    for d, f in occupes:
+        if f <= curseur:
+            continue
+        if d >= fin:
+            break
+        if d > curseur:
+            libres.append((curseur, d))
+        curseur = f
+    if curseur < fin:
+        libres.append((curseur, fin))
+    return libres
+
+
+def disponibilites(occupations, ressources, debut, fin, duree_min=1):
+    """
+    Intervalles libres d'au moins `duree_min` minutes dans [debut, fin), par ressource.
+    `occupations` : itérable de (ressource, debut, fin) ; `ressources` : toutes les
+    ressources à considérer, occupées ou non. Les ressources sans aucun intervalle
+    libre sont absentes du résultat. Coût O(n log n) pour n occupations.
+    """
+    par_ressource = defaultdict(list)
+    for ressource, d, f in occupations:
+        par_ressource[ressource].append((d, f))
+    resultat = {}
+    for ressource in ressources:
+        libres = [
+            (d, f) for d, f in complement(fusionner(par_ressource.get(ressource, ())), debut, fin)
+            if f - d >= duree_min
+        ]
+        if libres:
+            resultat[ressource] = libres
+    return resultat
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmarks, charge, metriques
+
+
+class Command(BaseCommand):
+    help = ("Test de charge de bout en bout : serveur WSGI local, faux GRR et base de test jetable, "
+            "mélange de requêtes jour/date/semaine ; débit et latence p50/p95/p99 par source (cache ou scraping).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requetes', type=int, default=500, help="Nombre total de requêtes envoyées")
+        parser.add_argument('--concurrence', type=int, default=8, help="Clients simultanés")
+        parser.add_argument('--zones', default='2,3', help="Zones demandées (pages synthétiques)")
+        parser.add_argument('--semaines', type=int, default=4,
+                            help="Semaines demandées par zone, à partir de la semaine courante (pages synthétiques)")
+        parser.add_argument('--latence', type=float, default=0.5, help="Latence (s) de chaque page du faux GRR")
+        parser.add_argument('--pages', choices=('synthetique', 'fixtures'), default='synthetique',
+                            help="Pages générées, ou pages enregistrées de core/fixtures/pages")
+        parser.add_argument('--ressources', type=int, default=50, help="Salles par page synthétique")
+        parser.add_argument('--cours-par-cellule', type=int, default=2, help="Cours au plus par cellule synthétique")
+        parser.add_argument('--graine', type=int, default=0, help="Graine du tirage des requêtes")
+        parser.add_argument('--base-courante', action='store_true',
+                            help="Utiliser la base configurée au lieu d'une base de test vide et jetable")
+        parser.add_argument('--sortie', default=benchmarks.sortie_par_defaut('charge'),
+                            help="Fichier JSON Lines où ajouter les résultats")
+
+    def handle(self, *args, **options):
+        # Mesures hors du /metrics de production
+        metriques.isoler()
+        try:
+            zones = [int(z) for z in options['zones'].split(',') if z.strip()]
+        except ValueError:
+            raise CommandError("--zones attend des entiers séparés par des virgules")
+        if options['requetes'] < 1 or options['concurrence'] < 1:
+            raise CommandError("--requetes et --concurrence doivent être positifs")
+
+        r = charge.mesurer_charge(
+            requetes=options['requetes'], concurrence=options['concurrence'], zones=zones,
+            semaines=options['semaines'], latence=options['latence'], pages=options['pages'],
+            nombre_ressources=options['ressources'], cours_par_cellule=options['cours_par_cellule'],
+            base_isolee=not options['base_courante'], graine=options['graine'],
+        )
+
+        self.stdout.write(
+            f"{r['requetes']} requêtes en {r['duree_s']:.2f} s ({r['debit_req_s']} req/s, "
+            f"{r['concurrence']} clients, {r['requetes_grr']} requêtes GRR)"
+        )
+        lignes = [('global', {'requetes': r['requetes'], **r['global_ms']})]
+        lignes += list(r['par_source'].items()) + list(r['par_type'].items())
+        for nom, mesure in lignes:
+            self.stdout.write(
+                f"  {nom:<12} {mesure['requetes']:>6}  p50 {mesure['p50_ms']:>9.1f} ms  "
+                f"p95 {mesure['p95_ms']:>9.1f} ms  p99 {mesure['p99_ms']:>9.1f} ms"
+            )
+
+        sortie = benchmarks.enregistrer_mesure(options['sortie'], [r])
+        self.stdout.write(f"Résultats ajoutés à {sortie}")
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from core import benchmarks, metriques
+
+
+class Command(BaseCommand):
+    help = ("Mesure la latence des lectures servies depuis la base pendant des scrapings lents, "
+            "par la vue synchrone (pool de workers) et par la vue asynchrone, et enregistre les résultats.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--latence', type=float, default=1.0, help="Latence (s) de chaque page du faux GRR")
+        parser.add_argument('--scrapings', type=int, default=8, help="Semaines absentes de la base demandées")
+        parser.add_argument('--lectures', type=int, default=40, help="Lectures d'une semaine déjà en base")
+        parser.add_argument('--workers', type=int, default=4, help="Workers de la vue synchrone")
+        parser.add_argument('--base-courante', action='store_true',
+                            help="Utiliser la base configurée au lieu d'une base de test vide et jetable")
+        parser.add_argument('--sortie', default=benchmarks.sortie_par_defaut('concurrence'),
+                            help="Fichier JSON Lines où ajouter les résultats")
+
+    def handle(self, *args, **options):
+        # Mesures hors du /metrics de production
+        metriques.isoler()
+        resultats = benchmarks.mesurer_concurrence(
+            options['latence'], options['scrapings'], options['lectures'], options['workers'],
+            base_isolee=not options['base_courante'],
+        )
+
+        for r in resultats:
+            lectures, scrapings = r['lectures_ms'], r['scrapings_ms']
+            self.stdout.write(
+                f"{r['chemin']:<16} lectures p50 {lectures['p50_ms']:>9.1f} ms  p95 {lectures['p95_ms']:>9.1f} ms  "
+                f"max {lectures['p100_ms']:>9.1f} ms  |  scrapings max {scrapings['p100_ms']:>9.1f} ms  "
+                f"({r['requetes_grr']} requêtes GRR, {r['duree_totale_s']:.2f} s)"
+            )
+
+        sortie = benchmarks.enregistrer_mesure(options['sortie'], resultats)
+        self.stdout.write(f"Résultats ajoutés à {sortie}")
@@ -0,0 +1,57 @@
+from pathlib import Path
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmarks, metriques
+
+
+class Command(BaseCommand):
+    help = ("Mesure le débit d'analyse des pages week_all.php (pages/s, cellules/s, pic mémoire) "
+            "et enregistre les résultats pour comparer les commits.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenarios', help="Scénarios à mesurer, séparés par des virgules (défaut: tous)")
+        parser.add_argument('--parseurs', help="Parseurs à mesurer, séparés par des virgules (défaut: tous)")
+        parser.add_argument('--repetitions', type=int, default=5)
+        parser.add_argument('--sortie', default=benchmarks.sortie_par_defaut('parseur'),
+                            help="Fichier JSON Lines où ajouter les résultats")
+
+    def handle(self, *args, **options):
+        # Mesures hors du /metrics de production
+        metriques.isoler()
+        sortie = Path(options['sortie'])
+        precedent = self._dernier_run(sortie)
+        try:
+            resultats = benchmarks.executer(
+                noms_scenarios=options['scenarios'].split(',') if options['scenarios'] else None,
+                parseurs=options['parseurs'].split(',') if options['parseurs'] else None,
+                repetitions=options['repetitions'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for r in resultats:
+            ligne = (f"{r['scenario']:<32} {r['mesure']:<9} {r['parseur']:<12} "
+                     f"{r['mediane_ms']:>10.2f} ms  {r['cellules_par_s'] or 0:>12.0f} cellules/s  "
+                     f"{r['pic_memoire_mo']:>7.2f} Mo")
+            avant = precedent.get((r['scenario'], r['mesure'], r['parseur']))
+            if avant:
+                ligne += f"  ({(r['mediane_ms'] - avant['mediane_ms']) / avant['mediane_ms']:+.1%} vs {avant['commit']})"
+            self.stdout.write(ligne)
+
+        benchmarks.enregistrer_mesure(sortie, resultats, repetitions=options['repetitions'])
+        self.stdout.write(f"Résultats ajoutés à {sortie}")
+
+    def _dernier_run(self, sortie):
+        """Dernière mesure enregistrée par (scénario, mesure, parseur)."""
+        if not sortie.exists():
+            return {}
+        lignes = sortie.read_text(encoding='utf-8').splitlines()
+        if not lignes:
+            return {}
+        run = json.loads(lignes[-1])
+        return {
+            (r['scenario'], r['mesure'], r['parseur']): {**r, 'commit': run.get('commit')}
+            for r in run['resultats']
+        }
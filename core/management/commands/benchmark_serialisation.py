@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from core import benchmarks, metriques
+
+
+class Command(BaseCommand):
+    help = ("Compare la construction et le rendu JSON d'une réponse semaine par l'ancienne double "
+            "sérialisation DRF et par le chemin values() + orjson, et enregistre les résultats.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--evenements', type=int, default=300, help="Nombre de cours dans la semaine")
+        parser.add_argument('--repetitions', type=int, default=5)
+        parser.add_argument('--sortie', default=benchmarks.sortie_par_defaut('serialisation'),
+                            help="Fichier JSON Lines où ajouter les résultats")
+
+    def handle(self, *args, **options):
+        # Mesures hors du /metrics de production
+        metriques.isoler()
+        resultats = benchmarks.mesurer_serialisation(options['evenements'], options['repetitions'])
+
+        reference = resultats[0]['mediane_ms']
+        for r in resultats:
+            self.stdout.write(
+                f"{r['scenario']:<16} {r['chemin']:<14} {r['mediane_ms']:>10.2f} ms  "
+                f"{r['reponses_par_s']:>8.1f} réponses/s  {r['octets']:>8} octets  "
+                f"{r['pic_memoire_mo']:>7.2f} Mo  (x{reference / r['mediane_ms']:.1f})"
+            )
+
+        sortie = benchmarks.enregistrer_mesure(options['sortie'], resultats, repetitions=options['repetitions'])
+        self.stdout.write(f"Résultats ajoutés à {sortie}")
@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.conflits import recalculer_conflits
+from core.models import ConflitCours, debut_semaine
+from core.views import lire_date
+
+
+class Command(BaseCommand):
+    help = ("Recalcule les doubles réservations (salles, enseignants, niveaux) des cours en base "
+            "sur une plage de dates et affiche le rapport.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--zones', help="Zones, séparées par des virgules (défaut: UPGC_SYNC_ZONES)")
+        parser.add_argument('--debut', help="Premier jour (défaut: lundi de la semaine courante)")
+        parser.add_argument('--fin', help="Dernier jour (défaut: fin de la dernière semaine synchronisée)")
+
+    def handle(self, *args, **options):
+        try:
+            zones = [int(z) for z in options['zones'].split(',')] if options['zones'] else settings.UPGC_SYNC_ZONES
+            debut = lire_date(options['debut']) if options['debut'] else debut_semaine(timezone.localdate())
+            fin = (lire_date(options['fin']) if options['fin']
+                   else debut_semaine(timezone.localdate()) + timedelta(weeks=settings.UPGC_SYNC_SEMAINES, days=6))
+        except ValueError as e:
+            raise CommandError(str(e))
+        if debut > fin:
+            raise CommandError("--debut doit précéder --fin")
+
+        for zone in zones:
+            nombre = recalculer_conflits(zone, debut, fin)
+            self.stdout.write(f"Zone {zone}, du {debut} au {fin}: {nombre} conflit(s)")
+            conflits = ConflitCours.objects.filter(zone=zone, jour__range=(debut, fin)).select_related('cours_a', 'cours_b')
+            for conflit in conflits:
+                self.stdout.write(
+                    f"  {conflit.jour} {conflit.debut:%H:%M}-{conflit.fin:%H:%M} [{conflit.type_conflit}] {conflit.cle}: "
+                    f"{conflit.cours_a.intitule} ({conflit.cours_a.ressource}, {conflit.cours_a.horaire}) / "
+                    f"{conflit.cours_b.intitule} ({conflit.cours_b.ressource}, {conflit.cours_b.horaire})"
+                )
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.rattrapage import rattraper
+from core.views import lire_date
+
+
+class Command(BaseCommand):
+    help = ("Rattrape l'historique d'une plage de dates : téléchargement des semaines, analyse dans un "
+            "pool de processus et écriture par lots. Relancée après une interruption, la commande "
+            "reprend aux semaines qui ne sont pas encore au registre.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--debut', required=True, help="Premier jour (YYYY-MM-DD)")
+        parser.add_argument('--fin', required=True, help="Dernier jour (YYYY-MM-DD)")
+        parser.add_argument('--zones', help="Zones, séparées par des virgules (défaut: UPGC_SYNC_ZONES)")
+        parser.add_argument('--processus', type=int, help="Processus d'analyse (défaut: nombre de cœurs)")
+        parser.add_argument('--telechargements', type=int, default=settings.UPGC_SYNC_WORKERS,
+                            help="Téléchargements simultanés")
+        parser.add_argument('--lot', type=int, default=10, help="Semaines écrites par transaction")
+        parser.add_argument('--forcer', action='store_true',
+                            help="Retélécharge aussi les semaines déjà au registre")
+
+    def handle(self, *args, **options):
+        try:
+            zones = [int(z) for z in options['zones'].split(',')] if options['zones'] else settings.UPGC_SYNC_ZONES
+            debut, fin = lire_date(options['debut']), lire_date(options['fin'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if debut > fin:
+            raise CommandError("--debut doit précéder --fin")
+
+        def progression(rapport):
+            self.stdout.write(
+                f"{rapport['semaines']}/{rapport['a_traiter']} semaines, {rapport['evenements']} événements "
+                f"({rapport['semaines_par_s']} semaines/s)"
+            )
+
+        rapport = rattraper(zones, debut, fin, processus=options['processus'],
+                            telechargements=options['telechargements'], lot=options['lot'],
+                            forcer=options['forcer'], progression=progression)
+        if rapport['ignorees']:
+            self.stdout.write(f"{rapport['ignorees']} semaines déjà au registre ignorées")
+        self.stdout.write(
+            f"Terminé: {rapport['semaines']} semaines, {rapport['evenements']} événements, "
+            f"{rapport['echecs']} échecs en {rapport['duree_s']:.1f}s avec {rapport['processus']} processus "
+            f"({rapport['semaines_par_s']} semaines/s, {rapport['evenements_par_s']} événements/s)"
+        )
+        if rapport['echecs']:
+            self.stderr.write("Relancer la commande pour reprendre les semaines en échec")
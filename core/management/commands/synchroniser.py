@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import tasks
+from core.gouverneur import obtenir_gouverneur
+
+
+class Command(BaseCommand):
+    help = "Pré-charge l'emploi du temps de la semaine courante et des suivantes depuis le site de l'UPGC."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--zones', help="Zones à synchroniser, séparées par des virgules (défaut: UPGC_SYNC_ZONES)")
+        parser.add_argument('--semaines', type=int, default=settings.UPGC_SYNC_SEMAINES,
+                            help="Nombre de semaines à venir en plus de la semaine courante")
+        parser.add_argument('--workers', type=int, default=settings.UPGC_SYNC_WORKERS,
+                            help="Nombre maximum de semaines récupérées en parallèle")
+        parser.add_argument('--boucle', action='store_true',
+                            help="Reste actif et relance la synchronisation à intervalle régulier")
+        parser.add_argument('--intervalle', type=int, default=settings.UPGC_SYNC_INTERVALLE,
+                            help="Intervalle entre deux synchronisations en mode --boucle (secondes)")
+
+    def handle(self, *args, **options):
+        try:
+            zones = [int(z) for z in options['zones'].split(',')] if options['zones'] else settings.UPGC_SYNC_ZONES
+        except ValueError:
+            raise CommandError("--zones doit être une liste d'entiers, ex: 2,3")
+
+        kwargs = {'zones': zones, 'nombre_semaines': options['semaines'], 'workers': options['workers']}
+        if options['boucle']:
+            self.stdout.write(f"Synchronisation toutes les {options['intervalle']}s (Ctrl+C pour arrêter)")
+            try:
+                tasks.planifier(intervalle=options['intervalle'], **kwargs)
+            except KeyboardInterrupt:
+                pass
+            return
+
+        for zone, lundi, bilan in sorted(tasks.synchroniser(**kwargs), key=lambda r: (r[0], r[1])):
+            if bilan is None:
+                self.stderr.write(f"Zone {zone}, semaine du {lundi}: échec du scraping")
+            elif bilan['statut'] == 'inchange':
+                self.stdout.write(f"Zone {zone}, semaine du {lundi}: inchangée")
+            elif bilan['statut'] == 'partage':
+                self.stdout.write(f"Zone {zone}, semaine du {lundi}: récupérée par un autre processus")
+            else:
+                self.stdout.write(
+                    f"Zone {zone}, semaine du {lundi}: {bilan['crees']} créés, "
+                    f"{bilan['modifies']} modifiés, {bilan['supprimes']} supprimés"
+                )
+
+        stats = obtenir_gouverneur().statistiques()
+        if stats.get('requetes_retardees') or stats.get('requetes_refusees'):
+            self.stdout.write(
+                f"Débit limité: {stats.get('requetes_retardees', 0)} requêtes retardées "
+                f"({stats.get('attente_totale_s', 0):.1f}s), {stats.get('requetes_refusees', 0)} refusées"
+            )
@@ -0,0 +1,405 @@
+# core/metriques.py
+"""
+Compteurs et histogrammes de latence, exposés au format texte Prometheus sur /metrics.
+Chaque processus tient ses valeurs en mémoire. Si UPGC_METRIQUES_DOSSIER est
+renseigné, il les recopie régulièrement (au plus toutes les UPGC_METRIQUES_INTERVALLE
+secondes, et à l'arrêt) dans un fichier JSON qui lui est propre ; /metrics additionne
+alors les fichiers de tous les processus, si bien que le résultat ne dépend pas du
+worker qui répond. Les valeurs des processus arrêtés (worker recyclé, processus du
+rattrapage) sont reportées dans le fichier retraites.json avant que leur fichier soit
+supprimé : les compteurs restent croissants.
+"""
+from contextlib import contextmanager
+from pathlib import Path
+import atexit
+import fcntl
+import json
+import logging
+import math
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SEUILS_DUREE = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SEUILS_NOMBRE = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+_verrou = threading.RLock()
+_metriques = {}
+_derniere_sauvegarde = 0.0
+# (pid, dossier) créé par isoler(), supprimé à l'arrêt de ce processus
+_dossier_temporaire = None
+# Cumul des processus arrêtés, et fichiers mis de côté par nom (voir _etats_processus)
+RETRAITES = 'retraites.json'
+
+
+def _nom_fichier():
+    # Le pid seul pourrait être réutilisé après un redémarrage
+    return f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json"
+
+
+_fichier = _nom_fichier()
+
+
+class _Metrique:
+    type = None
+
+    def __init__(self, nom, aide, etiquettes=()):
+        self.nom = nom
+        self.aide = aide
+        self.etiquettes = tuple(etiquettes)
+        self.valeurs = {}
+        with _verrou:
+            if nom in _metriques:
+                raise ValueError(f"Métrique déjà déclarée: {nom}")
+            _metriques[nom] = self
+
+    def _cle(self, etiquettes):
+        if set(etiquettes) != set(self.etiquettes):
+            raise ValueError(f"{self.nom}: étiquettes attendues {self.etiquettes}, reçues {tuple(etiquettes)}")
+        return tuple(str(etiquettes[e]) for e in self.etiquettes)
+
+
+class Compteur(_Metrique):
+    type = 'counter'
+
+    def inc(self, valeur=1, **etiquettes):
+        cle = self._cle(etiquettes)
+        with _verrou:
+            self.valeurs[cle] = self.valeurs.get(cle, 0) + valeur
+        _sauvegarder_si_necessaire()
+
+
+class Histogramme(_Metrique):
+    """Histogramme cumulatif : pour chaque série, [compte par seuil..., +Inf, somme]."""
+
+    type = 'histogram'
+
+    def __init__(self, nom, aide, etiquettes=(), seuils=SEUILS_DUREE):
+        super().__init__(nom, aide, etiquettes)
+        self.seuils = tuple(seuils)
+
+    def observer(self, valeur, **etiquettes):
+        cle = self._cle(etiquettes)
+        with _verrou:
+            serie = self.valeurs.get(cle)
+            if serie is None:
+                serie = self.valeurs[cle] = [0] * (len(self.seuils) + 1) + [0.0]
+            for i, seuil in enumerate(self.seuils):
+                if valeur <= seuil:
+                    serie[i] += 1
+            serie[-2] += 1
+            serie[-1] += valeur
+        _sauvegarder_si_necessaire()
+
+    @contextmanager
+    def chronometrer(self, **etiquettes):
+        """Observe la durée (s) du bloc, y compris s'il lève une exception."""
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observer(time.perf_counter() - debut, **etiquettes)
+
+
+def _dossier():
+    return Path(settings.UPGC_METRIQUES_DOSSIER) if settings.UPGC_METRIQUES_DOSSIER else None
+
+
+def _etat():
+    with _verrou:
+        return {
+            nom: [[list(cle), valeur if m.type == 'counter' else list(valeur)] for cle, valeur in m.valeurs.items()]
+            for nom, m in _metriques.items()
+        }
+
+
+def _ecrire_json(fichier, donnees):
+    temporaire = fichier.with_name(f".{fichier.name}.tmp")
+    temporaire.write_text(json.dumps(donnees), encoding='utf-8')
+    os.replace(temporaire, fichier)
+
+
+def sauvegarder():
+    """Recopie les valeurs du processus dans son fichier (écriture atomique)."""
+    global _derniere_sauvegarde
+    dossier = _dossier()
+    _derniere_sauvegarde = time.monotonic()
+    if dossier is None:
+        return
+    try:
+        dossier.mkdir(parents=True, exist_ok=True)
+        _ecrire_json(dossier / _fichier, _etat())
+    except OSError as e:
+        logger.warning(f"Métriques non sauvegardées dans {dossier}: {e}")
+
+
+def _sauvegarder_si_necessaire():
+    if time.monotonic() - _derniere_sauvegarde >= settings.UPGC_METRIQUES_INTERVALLE:
+        sauvegarder()
+
+
+def _a_l_arret():
+    sauvegarder()
+    if _dossier_temporaire and _dossier_temporaire[0] == os.getpid():
+        shutil.rmtree(_dossier_temporaire[1], ignore_errors=True)
+
+
+def isoler():
+    """
+    Écrit les métriques de ce processus, et des processus qu'il démarre, dans un
+    dossier temporaire supprimé à l'arrêt : les tests et benchmarks ne se mêlent
+    jamais au /metrics de production, même si UPGC_METRIQUES_DOSSIER est renseigné.
+    """
+    global _dossier_temporaire
+    if _dossier_temporaire and _dossier_temporaire[0] == os.getpid():
+        return _dossier_temporaire[1]
+    dossier = tempfile.mkdtemp(prefix='upgc-metriques-')
+    _dossier_temporaire = (os.getpid(), dossier)
+    settings.UPGC_METRIQUES_DOSSIER = dossier
+    # Processus démarrés par 'spawn' (rattrapage) : réglages relus depuis l'environnement
+    os.environ['UPGC_METRIQUES_DOSSIER'] = dossier
+    return dossier
+
+
+def _apres_fork():
+    # Un processus fils (worker préchargé, pool de processus) repart de zéro dans son
+    # propre fichier : les valeurs héritées sont déjà comptées par le parent
+    # Le verrou a pu être copié pris par un autre thread du parent : on le recrée
+    global _fichier, _derniere_sauvegarde, _verrou
+    _verrou = threading.RLock()
+    _fichier = _nom_fichier()
+    _derniere_sauvegarde = 0.0
+    for metrique in _metriques.values():
+        metrique.valeurs.clear()
+
+
+atexit.register(_a_l_arret)
+os.register_at_fork(after_in_child=_apres_fork)
+
+
+def _processus_actif(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # processus d'un autre utilisateur
+    return True
+
+
+def _pid(nom):
+    try:
+        return int(nom.split('-', 1)[0])
+    except ValueError:
+        return None
+
+
+def _sommer(etats):
+    """Somme, série par série, d'états de processus : {nom: {clé: valeur}}."""
+    totaux = {}
+    for etat in etats:
+        for nom, series in etat.items():
+            par_cle = totaux.setdefault(nom, {})
+            for cle, valeur in series:
+                cle = tuple(cle)
+                if isinstance(valeur, list):
+                    serie = par_cle.setdefault(cle, [0] * len(valeur))
+                    for i, v in enumerate(valeur):
+                        serie[i] += v
+                else:
+                    par_cle[cle] = par_cle.get(cle, 0) + valeur
+    return totaux
+
+
+def _en_etat(totaux):
+    return {nom: [[list(cle), valeur] for cle, valeur in series.items()] for nom, series in totaux.items()}
+
+
+def _lire_json(fichier, defaut):
+    try:
+        return json.loads(fichier.read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return defaut
+    except (OSError, ValueError) as e:
+        logger.warning(f"Fichier de métriques illisible {fichier}: {e}")
+        return defaut
+
+
+def _etats_processus():
+    """
+    États de tous les processus : les fichiers du dossier, ou ce seul processus.
+    Le fichier d'un processus arrêté est ajouté au cumul de RETRAITES puis supprimé.
+    Celui d'un processus actif non réécrit depuis UPGC_METRIQUES_TTL secondes (pid
+    réutilisé, worker inactif) est mis de côté sous son nom : il compte jusqu'à ce que
+    le processus réécrive son fichier, et rejoint le cumul quand le pid disparaît.
+    Un verrou sur le dossier évite qu'un état soit reporté deux fois.
+    """
+    dossier = _dossier()
+    if dossier is None or not dossier.is_dir():
+        return [_etat()]
+    sauvegarder()
+    maintenant = time.time()
+    with open(dossier / '.verrou', 'w') as verrou:
+        fcntl.flock(verrou, fcntl.LOCK_EX)
+        retraites = _lire_json(dossier / RETRAITES, {})
+        cumul = retraites.get('cumul', {})
+        de_cote = retraites.get('fichiers', {})
+        a_reporter, modifie = [], False
+        etats = []
+        for fichier in dossier.glob('*.json'):
+            if fichier.name == RETRAITES:
+                continue
+            etat = _lire_json(fichier, None)
+            if etat is None:
+                continue
+            pid = _pid(fichier.name)
+            if fichier.name == _fichier or pid is None:
+                etats.append(etat)
+                continue
+            try:
+                ancien = maintenant - fichier.stat().st_mtime > settings.UPGC_METRIQUES_TTL
+            except OSError:
+                continue
+            arrete = not _processus_actif(pid)
+            if not (arrete or ancien):
+                # Le processus a réécrit son fichier : sa valeur mise de côté est dépassée
+                modifie |= de_cote.pop(fichier.name, None) is not None
+                etats.append(etat)
+                continue
+            try:
+                fichier.unlink()
+            except OSError as e:
+                logger.warning(f"Fichier de métriques non supprimé {fichier}: {e}")
+                etats.append(etat)
+                continue
+            if arrete:
+                a_reporter.append(etat)
+                de_cote.pop(fichier.name, None)
+            else:
+                de_cote[fichier.name] = etat
+            modifie = True
+        for nom in list(de_cote):
+            if not _processus_actif(_pid(nom)):
+                a_reporter.append(de_cote.pop(nom))
+                modifie = True
+        if a_reporter:
+            cumul = _en_etat(_sommer([cumul, *a_reporter]))
+        if modifie:
+            try:
+                _ecrire_json(dossier / RETRAITES, {'cumul': cumul, 'fichiers': de_cote})
+            except OSError as e:
+                logger.warning(f"Cumul des métriques non sauvegardé dans {dossier}: {e}")
+    return [*etats, cumul, *de_cote.values()]
+
+
+def agreger():
+    """Somme, série par série, des valeurs de tous les processus."""
+    totaux = {nom: {} for nom in _metriques}
+    for nom, series in _sommer(_etats_processus()).items():
+        if nom in totaux:
+            totaux[nom] = series
+    return totaux
+
+
+def _echapper(valeur):
+    return str(valeur).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_etiquettes(noms, valeurs, supplement=()):
+    paires = list(zip(noms, valeurs)) + list(supplement)
+    if not paires:
+        return ''
+    return '{' + ','.join(f'{nom}="{_echapper(valeur)}"' for nom, valeur in paires) + '}'
+
+
+def _format_nombre(valeur):
+    if isinstance(valeur, float) and math.isinf(valeur):
+        return '+Inf'
+    return repr(valeur) if isinstance(valeur, float) else str(valeur)
+
+
+def exporter():
+    """Texte d'exposition Prometheus (version 0.0.4) des métriques de tous les processus."""
+    lignes = []
+    for nom, series in sorted(agreger().items()):
+        metrique = _metriques[nom]
+        lignes.append(f"# HELP {nom} {metrique.aide}")
+        lignes.append(f"# TYPE {nom} {metrique.type}")
+        for cle, valeur in sorted(series.items()):
+            if metrique.type == 'counter':
+                lignes.append(f"{nom}{_format_etiquettes(metrique.etiquettes, cle)} {_format_nombre(valeur)}")
+                continue
+            for seuil, compte in zip(metrique.seuils + (math.inf,), valeur[:-1]):
+                etiquettes = _format_etiquettes(metrique.etiquettes, cle, [('le', _format_nombre(float(seuil)))])
+                lignes.append(f"{nom}_bucket{etiquettes} {compte}")
+            etiquettes = _format_etiquettes(metrique.etiquettes, cle)
+            lignes.append(f"{nom}_sum{etiquettes} {_format_nombre(float(valeur[-1]))}")
+            lignes.append(f"{nom}_count{etiquettes} {valeur[-2]}")
+    return '\n'.join(lignes) + '\n'
+
+
+def reinitialiser():
+    """Remet les valeurs du processus à zéro (tests)."""
+    with _verrou:
+        for metrique in _metriques.values():
+            metrique.valeurs.clear()
+
+
+# --- Métriques de l'application ---
+
+SCRAPING_PHASES = Histogramme(
+    'upgc_scraping_phase_secondes',
+    "Durée des phases du scraping d'une semaine",
+    etiquettes=('phase',),
+)
+SCRAPING_TELECHARGEMENTS = Compteur(
+    'upgc_scraping_telechargements_total',
+    "Téléchargements de pages week_all.php par résultat (code HTTP ou erreur)",
+    etiquettes=('resultat',),
+)
+SCRAPING_EVENEMENTS = Compteur(
+    'upgc_scraping_evenements_total',
+    "Événements extraits des pages",
+)
+ENREGISTREMENTS = Compteur(
+    'upgc_enregistrement_cours_total',
+    "Cours réconciliés en base par opération",
+    etiquettes=('operation',),
+)
+GOUVERNEUR = Compteur(
+    'upgc_gouverneur_total',
+    "Décisions du gouverneur de requêtes vers l'UPGC",
+    etiquettes=('evenement',),
+)
+API_REQUETES = Compteur(
+    'upgc_api_requetes_total',
+    "Requêtes de l'emploi du temps par vue, source des données et code HTTP",
+    etiquettes=('vue', 'source', 'code'),
+)
+API_DUREE = Histogramme(
+    'upgc_api_duree_secondes',
+    "Durée de traitement des requêtes de l'emploi du temps",
+    etiquettes=('vue',),
+)
+API_SERIALISATION = Histogramme(
+    'upgc_api_serialisation_secondes',
+    "Durée de lecture des cours et de construction de la réponse",
+    etiquettes=('vue',),
+)
+API_RENDU = Histogramme(
+    'upgc_api_rendu_json_secondes',
+    "Durée du rendu JSON des réponses",
+)
+API_EVENEMENTS = Histogramme(
+    'upgc_api_evenements_renvoyes',
+    "Nombre de cours par réponse",
+    etiquettes=('vue',),
+    seuils=SEUILS_NOMBRE,
+)
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.2 on 2026-10-18 17:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_alter_cours_type_cours'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SemaineScrapee',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zone', models.PositiveSmallIntegerField(verbose_name='Zone')),
+                ('debut_semaine', models.DateField(verbose_name='Début de semaine (lundi)')),
+                ('date_scraping', models.DateTimeField(verbose_name='Date du scraping')),
+                ('nombre_evenements', models.PositiveIntegerField(default=0, verbose_name="Nombre d'événements")),
+            ],
+            options={
+                'verbose_name': 'Semaine scrapée',
+                'verbose_name_plural': 'Semaines scrapées',
+                'ordering': ['-debut_semaine', 'zone'],
+                'constraints': [models.UniqueConstraint(fields=('zone', 'debut_semaine'), name='semaine_scrapee_unique')],
+            },
+        ),
+    ]
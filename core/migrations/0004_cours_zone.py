@@ -0,0 +1,57 @@
+# Generated by Django 6.0.2 on 2026-10-18 17:47
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def dedoublonner_cours(apps, schema_editor):
+    """
+    Les lignes existantes reçoivent la zone par défaut (2). On supprime les
+    doublons éventuels de la clé naturelle (en gardant le plus récent) avant
+    de poser la contrainte d'unicité.
+    """
+    Cours = apps.get_model('core', 'Cours')
+    doublons = (
+        Cours.objects.values('zone', 'jour', 'horaire', 'ressource')
+        .annotate(garder=Max('id'), n=models.Count('id'))
+        .filter(n__gt=1)
+    )
+    for d in doublons:
+        Cours.objects.filter(
+            zone=d['zone'], jour=d['jour'], horaire=d['horaire'], ressource=d['ressource']
+        ).exclude(id=d['garder']).delete()
+
+
+def vider_registre(apps, schema_editor):
+    """
+    Avant ce champ, les scrapings de toutes les zones étaient stockés sans
+    distinction : on vide le registre pour que chaque semaine soit re-scrapée
+    avec la bonne zone.
+    """
+    SemaineScrapee = apps.get_model('core', 'SemaineScrapee')
+    SemaineScrapee.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_semainescrapee'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cours',
+            name='zone',
+            field=models.PositiveSmallIntegerField(default=2, verbose_name='Zone'),
+        ),
+        migrations.RunPython(dedoublonner_cours, migrations.RunPython.noop),
+        migrations.RunPython(vider_registre, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='cours',
+            index=models.Index(fields=['jour', 'horaire'], name='cours_jour_horaire_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='cours',
+            constraint=models.UniqueConstraint(fields=('zone', 'jour', 'horaire', 'ressource'), name='cours_unique_creneau'),
+        ),
+    ]
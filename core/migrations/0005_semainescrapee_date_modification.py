@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 17:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_cours_zone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='semainescrapee',
+            name='date_modification',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Date de modification'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-18 17:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_semainescrapee_date_modification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='semainescrapee',
+            name='empreinte',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='Empreinte du planning'),
+        ),
+        migrations.AddField(
+            model_name='semainescrapee',
+            name='etag',
+            field=models.CharField(blank=True, default='', max_length=200, verbose_name='ETag'),
+        ),
+        migrations.AddField(
+            model_name='semainescrapee',
+            name='last_modified',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='Last-Modified'),
+        ),
+    ]
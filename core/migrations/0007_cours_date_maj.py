@@ -0,0 +1,25 @@
+# Generated by Django 6.0.2 on 2026-10-18 17:58
+
+from django.db import migrations, models
+
+
+def initialiser_date_maj(apps, schema_editor):
+    # Les cours existants n'ont pas été modifiés depuis leur import
+    Cours = apps.get_model('core', 'Cours')
+    Cours.objects.update(date_maj=models.F('date_import'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_semainescrapee_validateurs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cours',
+            name='date_maj',
+            field=models.DateTimeField(auto_now=True, verbose_name='Date de mise à jour'),
+        ),
+        migrations.RunPython(initialiser_date_maj, migrations.RunPython.noop),
+    ]
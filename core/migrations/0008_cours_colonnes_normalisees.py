@@ -0,0 +1,77 @@
+# Generated by Django 6.0.2 on 2026-10-18 18:03
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+def _normaliser(valeur):
+    # Copie de core.models.normaliser au moment de la migration
+    sans_accents = unicodedata.normalize('NFKD', valeur or '').encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(sans_accents.lower().split())
+
+
+def remplir_colonnes_normalisees(apps, schema_editor):
+    Cours = apps.get_model('core', 'Cours')
+    lot = []
+    for cours in Cours.objects.only('niveau', 'salle', 'ressource', 'enseignant', 'type_cours').iterator(chunk_size=2000):
+        cours.niveau_norm = _normaliser(cours.niveau)
+        cours.salle_norm = _normaliser(cours.salle)
+        cours.ressource_norm = _normaliser(cours.ressource)
+        cours.type_cours_norm = _normaliser(cours.type_cours)
+        noms = [_normaliser(nom) for nom in cours.enseignant.split('/')]
+        cours.enseignant_norm = '|' + '|'.join(nom for nom in noms if nom) + '|'
+        lot.append(cours)
+        if len(lot) >= 2000:
+            Cours.objects.bulk_update(lot, ['niveau_norm', 'salle_norm', 'ressource_norm', 'type_cours_norm', 'enseignant_norm'])
+            lot = []
+    if lot:
+        Cours.objects.bulk_update(lot, ['niveau_norm', 'salle_norm', 'ressource_norm', 'type_cours_norm', 'enseignant_norm'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_cours_date_maj'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cours',
+            name='enseignant_norm',
+            field=models.CharField(default='', editable=False, max_length=310),
+        ),
+        migrations.AddField(
+            model_name='cours',
+            name='niveau_norm',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='cours',
+            name='ressource_norm',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='cours',
+            name='salle_norm',
+            field=models.CharField(default='', editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='cours',
+            name='type_cours_norm',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(remplir_colonnes_normalisees, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='cours',
+            index=models.Index(fields=['zone', 'niveau_norm', 'jour', 'horaire'], name='cours_niveau_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cours',
+            index=models.Index(fields=['zone', 'salle_norm', 'jour', 'horaire'], name='cours_salle_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cours',
+            index=models.Index(fields=['zone', 'ressource_norm', 'jour', 'horaire'], name='cours_ressource_idx'),
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 6.0.2 on 2026-10-18 18:04
+
+from datetime import time
+import re
+
+from django.db import migrations, models
+
+RE_HORAIRE = re.compile(r'(\d{1,2}):(\d{2})\s*à\s*(\d{1,2}):(\d{2})')
+
+
+def remplir_heures(apps, schema_editor):
+    # Même lecture que core.models.bornes_horaire au moment de la migration
+    Cours = apps.get_model('core', 'Cours')
+    lot = []
+    for cours in Cours.objects.only('horaire').iterator(chunk_size=2000):
+        match = RE_HORAIRE.search(cours.horaire or '')
+        if not match:
+            continue
+        h1, m1, h2, m2 = (int(g) for g in match.groups())
+        try:
+            cours.heure_debut, cours.heure_fin = time(h1, m1), time(h2, m2)
+        except ValueError:
+            continue
+        lot.append(cours)
+        if len(lot) >= 2000:
+            Cours.objects.bulk_update(lot, ['heure_debut', 'heure_fin'])
+            lot = []
+    if lot:
+        Cours.objects.bulk_update(lot, ['heure_debut', 'heure_fin'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_cours_colonnes_normalisees'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='cours',
+            options={'ordering': ['jour', 'heure_debut', 'heure_fin', 'horaire'], 'verbose_name': 'Cours', 'verbose_name_plural': 'Cours'},
+        ),
+        migrations.RemoveIndex(
+            model_name='cours',
+            name='cours_jour_horaire_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='cours',
+            name='cours_niveau_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='cours',
+            name='cours_salle_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='cours',
+            name='cours_ressource_idx',
+        ),
+        migrations.AddField(
+            model_name='cours',
+            name='heure_debut',
+            field=models.TimeField(editable=False, null=True, verbose_name='Heure de début'),
+        ),
+        migrations.AddField(
+            model_name='cours',
+            name='heure_fin',
+            field=models.TimeField(editable=False, null=True, verbose_name='Heure de fin'),
+        ),
+        migrations.RunPython(remplir_heures, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='cours',
+            index=models.Index(fields=['jour', 'heure_debut'], name='cours_jour_debut_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cours',
+            index=models.Index(fields=['zone', 'jour', 'heure_debut', 'heure_fin', 'horaire'], name='cours_zone_jour_debut_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cours',
+            index=models.Index(fields=['zone', 'niveau_norm', 'jour', 'heure_debut', 'heure_fin', 'horaire'], name='cours_niveau_debut_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cours',
+            index=models.Index(fields=['zone', 'salle_norm', 'jour', 'heure_debut', 'heure_fin', 'horaire'], name='cours_salle_debut_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cours',
+            index=models.Index(fields=['zone', 'ressource_norm', 'jour', 'heure_debut', 'heure_fin', 'horaire'], name='cours_ressource_debut_idx'),
+        ),
+    ]
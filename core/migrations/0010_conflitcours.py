@@ -0,0 +1,35 @@
+# Generated by Django 6.0.2 on 2026-10-18 18:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_cours_heures'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConflitCours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zone', models.PositiveSmallIntegerField(verbose_name='Zone')),
+                ('jour', models.DateField(verbose_name='Jour')),
+                ('type_conflit', models.CharField(choices=[('salle', 'Salle'), ('enseignant', 'Enseignant'), ('niveau', 'Niveau')], max_length=20, verbose_name='Type de conflit')),
+                ('cle', models.CharField(max_length=310, verbose_name='Salle, enseignant ou niveau (normalisé)')),
+                ('debut', models.TimeField(verbose_name='Début du chevauchement')),
+                ('fin', models.TimeField(verbose_name='Fin du chevauchement')),
+                ('date_detection', models.DateTimeField(auto_now_add=True, verbose_name='Date de détection')),
+                ('cours_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.cours')),
+                ('cours_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.cours')),
+            ],
+            options={
+                'verbose_name': 'Conflit de cours',
+                'verbose_name_plural': 'Conflits de cours',
+                'ordering': ['jour', 'debut', 'type_conflit', 'cle'],
+                'indexes': [models.Index(fields=['zone', 'jour'], name='conflit_zone_jour_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 6.0.2 on 2026-10-18 18:11
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+CHAMPS_JOURNAL = ('type_cours', 'enseignant', 'intitule', 'niveau', 'salle', 'heure_debut', 'heure_fin')
+
+
+def journaliser_cours_existants(apps, schema_editor):
+    # Un client qui part de la version 0 reçoit ainsi tous les cours déjà en base
+    Cours = apps.get_model('core', 'Cours')
+    ChangementCours = apps.get_model('core', 'ChangementCours')
+    lot = []
+    for cours in Cours.objects.order_by('zone', 'jour', 'heure_debut', 'heure_fin', 'horaire').iterator(chunk_size=2000):
+        lot.append(ChangementCours(
+            operation='creation', zone=cours.zone, jour=cours.jour, horaire=cours.horaire,
+            ressource=cours.ressource, donnees={champ: getattr(cours, champ) for champ in CHAMPS_JOURNAL},
+        ))
+        if len(lot) >= 2000:
+            ChangementCours.objects.bulk_create(lot)
+            lot = []
+    ChangementCours.objects.bulk_create(lot)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_conflitcours'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangementCours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('operation', models.CharField(choices=[('creation', 'Création'), ('modification', 'Modification'), ('suppression', 'Suppression')], max_length=20, verbose_name='Opération')),
+                ('zone', models.PositiveSmallIntegerField(verbose_name='Zone')),
+                ('jour', models.DateField(verbose_name='Jour du cours')),
+                ('horaire', models.CharField(max_length=50, verbose_name='Horaire')),
+                ('ressource', models.CharField(max_length=100, verbose_name='Ressource')),
+                ('donnees', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='Données')),
+                ('date', models.DateTimeField(auto_now_add=True, verbose_name='Date du changement')),
+            ],
+            options={
+                'verbose_name': 'Changement de cours',
+                'verbose_name_plural': 'Changements de cours',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['zone', 'id'], name='changement_zone_id_idx')],
+            },
+        ),
+        migrations.RunPython(journaliser_cours_existants, migrations.RunPython.noop),
+    ]
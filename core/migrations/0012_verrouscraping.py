@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-18 18:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_changementcours'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VerrouScraping',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zone', models.PositiveSmallIntegerField(verbose_name='Zone')),
+                ('debut_semaine', models.DateField(verbose_name='Début de semaine (lundi)')),
+                ('proprietaire', models.CharField(max_length=64, verbose_name='Propriétaire')),
+                ('expire_le', models.DateTimeField(verbose_name='Expiration')),
+            ],
+            options={
+                'verbose_name': 'Verrou de scraping',
+                'verbose_name_plural': 'Verrous de scraping',
+                'constraints': [models.UniqueConstraint(fields=('zone', 'debut_semaine'), name='verrou_scraping_unique')],
+            },
+        ),
+    ]
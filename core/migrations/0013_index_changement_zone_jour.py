@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-18 18:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_verrouscraping'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='changementcours',
+            index=models.Index(fields=['zone', 'jour'], name='changement_zone_jour_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0.2 on 2026-10-18 18:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_index_changement_zone_jour'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeauJetonsPartage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(max_length=50, unique=True, verbose_name='Nom')),
+                ('jetons', models.FloatField(verbose_name='Jetons disponibles')),
+                ('mis_a_jour', models.FloatField(verbose_name='Dernière mise à jour (s)')),
+            ],
+            options={
+                'verbose_name': 'Seau à jetons partagé',
+                'verbose_name_plural': 'Seaux à jetons partagés',
+            },
+        ),
+    ]
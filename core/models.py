@@ -1,7 +1,192 @@
-from django.db import models
+from contextlib import contextmanager
+from datetime import time, timedelta
+import logging
+import re
+import threading
+import unicodedata
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def debut_semaine(jour):
+    """Retourne le lundi de la semaine ISO contenant `jour`."""
+    return jour - timedelta(days=jour.weekday())
+
+
+ZONE_PAR_DEFAUT = 2
+
+# Champs d'un cours hors clé naturelle (zone, jour, horaire, ressource)
+CHAMPS_DONNEES = ('type_cours', 'enseignant', 'intitule', 'niveau', 'salle')
+
+# Champs filtrables par l'API, doublés d'une colonne `<champ>_norm` remplie à l'import
+CHAMPS_FILTRABLES = ('niveau', 'salle', 'ressource', 'enseignant', 'type_cours')
+CHAMPS_NORMALISES = tuple(f'{champ}_norm' for champ in CHAMPS_FILTRABLES)
+# Colonnes calculées par Cours.calculer_champs_derives()
+CHAMPS_DERIVES = ('heure_debut', 'heure_fin') + CHAMPS_NORMALISES
+# Séparateur des enseignants d'un cours partagé ("Dr A / Dr B")
+SEPARATEUR_ENSEIGNANTS = '/'
+
+# Contenu d'un cours transmis par le journal des changements, hors clé naturelle
+CHAMPS_JOURNAL = CHAMPS_DONNEES + ('heure_debut', 'heure_fin')
+
+_etat_journal = threading.local()
+
+
+@contextmanager
+def journal_en_masse():
+    """
+    Pendant une réconciliation, le journal est écrit en masse par le manager : les
+    signaux de core/signals.py (éditions unitaires, admin) ne journalisent rien.
+    """
+    _etat_journal.en_masse = True
+    try:
+        yield
+    finally:
+        _etat_journal.en_masse = False
+
+
+def journal_en_masse_actif():
+    return getattr(_etat_journal, 'en_masse', False)
+
+
+_RE_HORAIRE = re.compile(r'(\d{1,2}):(\d{2})\s*à\s*(\d{1,2}):(\d{2})')
+
+# Tri chronologique des cours d'un jour ("8:00" avant "10:00"), horaire en dernier recours
+ORDRE_CHRONOLOGIQUE = ('heure_debut', 'heure_fin', 'horaire')
+
+
+def bornes_horaire(horaire):
+    """
+    (heure_debut, heure_fin) d'un horaire "HH:MM à HH:MM" tel que produit par
+    ExtracteurUPGC.extraire_horaires ; (None, None) s'il n'est pas lisible.
+    """
+    match = _RE_HORAIRE.search(horaire or '')
+    if not match:
+        return None, None
+    h1, m1, h2, m2 = (int(g) for g in match.groups())
+    try:
+        return time(h1, m1), time(h2, m2)
+    except ValueError:
+        return None, None
+
+
+def normaliser(valeur):
+    """Forme de recherche d'un libellé : minuscules, sans accents, espaces réduits."""
+    sans_accents = unicodedata.normalize('NFKD', valeur or '').encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(sans_accents.lower().split())
+
+
+def normaliser_enseignants(valeur):
+    """
+    Enseignants normalisés encadrés de '|' ("|dr a|dr b|") : un cours partagé
+    ("Dr A / Dr B") est retrouvé par le nom exact de chacun de ses enseignants.
+    """
+    noms = [normaliser(nom) for nom in (valeur or '').split(SEPARATEUR_ENSEIGNANTS)]
+    return '|' + '|'.join(nom for nom in noms if nom) + '|'
+
+
+class CoursQuerySet(models.QuerySet):
+
+    def filtrer(self, criteres):
+        """
+        Filtre sur les colonnes normalisées. `criteres` associe un champ de
+        CHAMPS_FILTRABLES à une liste de valeurs : les valeurs d'un même champ
+        se combinent en OU, les champs entre eux en ET.
+        """
+        queryset = self
+        for champ, valeurs in criteres.items():
+            if champ not in CHAMPS_FILTRABLES:
+                raise ValueError(f"Filtre inconnu: {champ}")
+            condition = models.Q()
+            for valeur in valeurs:
+                if champ == 'enseignant':
+                    # LIKE '%|nom|%' : aucun index, les lignes viennent de la plage zone/jours
+                    condition |= models.Q(enseignant_norm__contains=f'|{normaliser(valeur)}|')
+                else:
+                    condition |= models.Q(**{f'{champ}_norm': normaliser(valeur)})
+            queryset = queryset.filter(condition)
+        return queryset
+
+
+class CoursManager(models.Manager.from_queryset(CoursQuerySet)):
+
+    def reconcilier_semaine(self, zone, jour, evenements):
+        """
+        Aligne les cours stockés pour (zone, semaine de `jour`) sur les événements scrapés.
+        Une seule lecture de la semaine, puis insertions, mises à jour et suppressions
+        en masse : le nombre de requêtes ne dépend plus du nombre de cours.
+        Retourne le nombre de cours créés, modifiés, supprimés et inchangés.
+        """
+        debut = debut_semaine(jour)
+        fin = debut + timedelta(days=6)
+
+        attendus = {}
+        for evt in evenements:
+            if not debut <= evt['jour'] <= fin:
+                logger.warning(f"Événement hors de la semaine du {debut} ignoré: {evt['jour']}")
+                continue
+            # En cas de doublon dans la page, le dernier l'emporte (comme l'ancien upsert)
+            attendus[(evt['jour'], evt['horaire'], evt['ressource'])] = evt
+
+        with transaction.atomic():
+            existants = {
+                (c.jour, c.horaire, c.ressource): c
+                for c in self.filter(zone=zone, jour__range=(debut, fin))
+            }
+            a_creer = []
+            a_modifier = []
+            inchanges = 0
+            maintenant = timezone.now()
+            for cle, evt in attendus.items():
+                cours = existants.pop(cle, None)
+                if cours is None:
+                    cours = self.model(
+                        zone=zone, jour=cle[0], horaire=cle[1], ressource=cle[2],
+                        **{champ: evt[champ] for champ in CHAMPS_DONNEES}
+                    )
+                    cours.calculer_champs_derives()
+                    a_creer.append(cours)
+                elif any(getattr(cours, champ) != evt[champ] for champ in CHAMPS_DONNEES):
+                    for champ in CHAMPS_DONNEES:
+                        setattr(cours, champ, evt[champ])
+                    cours.calculer_champs_derives()
+                    # bulk_update n'applique pas auto_now
+                    cours.date_maj = maintenant
+                    a_modifier.append(cours)
+                else:
+                    inchanges += 1
+            # Ce qui reste n'existe plus en amont (cours annulés ou déplacés)
+            a_supprimer = list(existants.values())
+
+            if a_creer:
+                self.bulk_create(a_creer, batch_size=500)
+            if a_modifier:
+                self.bulk_update(a_modifier, CHAMPS_DONNEES + CHAMPS_NORMALISES + ('date_maj',), batch_size=500)
+            if a_supprimer:
+                with journal_en_masse():
+                    self.filter(pk__in=[cours.pk for cours in a_supprimer]).delete()
+            ChangementCours.objects.bulk_create(
+                [ChangementCours.pour(cours, ChangementCours.CREATION) for cours in a_creer]
+                + [ChangementCours.pour(cours, ChangementCours.MODIFICATION) for cours in a_modifier]
+                + [ChangementCours.pour(cours, ChangementCours.SUPPRESSION) for cours in a_supprimer],
+                batch_size=500,
+            )
+
+        return {
+            'crees': len(a_creer),
+            'modifies': len(a_modifier),
+            'supprimes': len(a_supprimer),
+            'inchanges': inchanges,
+        }
+
 
 class Cours(models.Model):
     """Modèle représentant un cours dans l'emploi du temps"""
+    zone = models.PositiveSmallIntegerField('Zone', default=ZONE_PAR_DEFAUT)  # paramètre "area" de GRR
     # Informations extraites
     horaire = models.CharField('Horaire', max_length=50)  # ex: "07:30 à 11:30"
     type_cours = models.CharField('Type de cours', max_length=100)  # CM, TD, TP, EXAMEN
@@ -12,11 +197,302 @@ class Cours(models.Model):
     jour = models.DateField('Jour du cours')
     ressource = models.CharField('Ressource (salle principale)', max_length=100)  # ex: "Amphi B"
     date_import = models.DateTimeField('Date d\'import', auto_now_add=True)
+    date_maj = models.DateTimeField('Date de mise à jour', auto_now=True)
+    # Début et fin lus dans horaire (None si illisible), pour le tri et les recherches par heure
+    heure_debut = models.TimeField('Heure de début', null=True, editable=False)
+    heure_fin = models.TimeField('Heure de fin', null=True, editable=False)
+    # Colonnes de recherche (voir normaliser), tenues à jour par calculer_champs_derives()
+    niveau_norm = models.CharField(max_length=100, default='', editable=False)
+    salle_norm = models.CharField(max_length=50, default='', editable=False)
+    ressource_norm = models.CharField(max_length=100, default='', editable=False)
+    enseignant_norm = models.CharField(max_length=310, default='', editable=False)
+    type_cours_norm = models.CharField(max_length=100, default='', editable=False)
+
+    objects = CoursManager()
 
     class Meta:
         verbose_name = 'Cours'
         verbose_name_plural = 'Cours'
-        ordering = ['jour', 'horaire']
+        ordering = ['jour', *ORDRE_CHRONOLOGIQUE]
+        constraints = [
+            # Clé naturelle utilisée par la réconciliation de la semaine
+            models.UniqueConstraint(
+                fields=['zone', 'jour', 'horaire', 'ressource'],
+                name='cours_unique_creneau',
+            ),
+        ]
+        indexes = [
+            # Listes toutes zones confondues (ordering par défaut, admin)
+            models.Index(fields=['jour', 'heure_debut'], name='cours_jour_debut_idx'),
+            # Requêtes jour et semaine de la vue dans l'ordre chronologique, et recherche
+            # par plage d'heures de début (cours en cours / à venir)
+            models.Index(fields=['zone', 'jour', 'heure_debut', 'heure_fin', 'horaire'], name='cours_zone_jour_debut_idx'),
+            # Filtres de l'API : une valeur, une plage de jours, déjà triée par heure
+            models.Index(fields=['zone', 'niveau_norm', 'jour', 'heure_debut', 'heure_fin', 'horaire'], name='cours_niveau_debut_idx'),
+            models.Index(fields=['zone', 'salle_norm', 'jour', 'heure_debut', 'heure_fin', 'horaire'], name='cours_salle_debut_idx'),
+            models.Index(fields=['zone', 'ressource_norm', 'jour', 'heure_debut', 'heure_fin', 'horaire'], name='cours_ressource_debut_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.jour} {self.horaire} - {self.intitule[:50]}"
\ No newline at end of file
+        return f"{self.jour} {self.horaire} - {self.intitule[:50]}"
+
+    def calculer_champs_derives(self):
+        self.heure_debut, self.heure_fin = bornes_horaire(self.horaire)
+        for champ in CHAMPS_FILTRABLES:
+            if champ == 'enseignant':
+                self.enseignant_norm = normaliser_enseignants(self.enseignant)
+            else:
+                setattr(self, f'{champ}_norm', normaliser(getattr(self, champ)))
+
+    def instantane(self):
+        return {champ: getattr(self, champ) for champ in CHAMPS_JOURNAL}
+
+    def save(self, *args, **kwargs):
+        # Éditions hors réconciliation (admin, shell)
+        self.calculer_champs_derives()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | set(CHAMPS_DERIVES)
+        super().save(*args, **kwargs)
+
+
+class ChangementCours(models.Model):
+    """
+    Journal des créations, modifications et suppressions de cours. L'id, strictement
+    croissant, sert de numéro de version aux clients qui se synchronisent par
+    /changements/?depuis=<version>. Un cours y est identifié par sa clé naturelle
+    (zone, jour, horaire, ressource), qui survit à sa suppression.
+    """
+    CREATION = 'creation'
+    MODIFICATION = 'modification'
+    SUPPRESSION = 'suppression'
+    OPERATIONS = [
+        (CREATION, 'Création'),
+        (MODIFICATION, 'Modification'),
+        (SUPPRESSION, 'Suppression'),
+    ]
+
+    operation = models.CharField('Opération', max_length=20, choices=OPERATIONS)
+    zone = models.PositiveSmallIntegerField('Zone')
+    jour = models.DateField('Jour du cours')
+    horaire = models.CharField('Horaire', max_length=50)
+    ressource = models.CharField('Ressource', max_length=100)
+    # Contenu du cours après l'opération (CHAMPS_JOURNAL), vide pour une suppression
+    donnees = models.JSONField('Données', null=True, blank=True, encoder=DjangoJSONEncoder)
+    date = models.DateTimeField('Date du changement', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Changement de cours'
+        verbose_name_plural = 'Changements de cours'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['zone', 'id'], name='changement_zone_id_idx'),
+            # Dernière suppression d'une plage de jours (Last-Modified des réponses)
+            models.Index(fields=['zone', 'jour'], name='changement_zone_jour_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.operation} {self.jour} {self.horaire} {self.ressource}"
+
+    @classmethod
+    def pour(cls, cours, operation, cle=None):
+        """Entrée (non enregistrée) pour `cours` ; `cle` remplace sa clé naturelle actuelle."""
+        zone, jour, horaire, ressource = cle or (cours.zone, cours.jour, cours.horaire, cours.ressource)
+        return cls(
+            operation=operation, zone=zone, jour=jour, horaire=horaire, ressource=ressource,
+            donnees=None if operation == cls.SUPPRESSION else cours.instantane(),
+        )
+
+
+class ConflitCours(models.Model):
+    """
+    Double réservation entre deux cours qui se chevauchent : même salle, même
+    enseignant ou même niveau (voir core/conflits.py). Recalculée pour la semaine
+    après chaque synchronisation qui modifie ses cours.
+    """
+    TYPES = [
+        ('salle', 'Salle'),
+        ('enseignant', 'Enseignant'),
+        ('niveau', 'Niveau'),
+    ]
+
+    zone = models.PositiveSmallIntegerField('Zone')
+    jour = models.DateField('Jour')
+    type_conflit = models.CharField('Type de conflit', max_length=20, choices=TYPES)
+    cle = models.CharField('Salle, enseignant ou niveau (normalisé)', max_length=310)
+    cours_a = models.ForeignKey(Cours, on_delete=models.CASCADE, related_name='+')
+    cours_b = models.ForeignKey(Cours, on_delete=models.CASCADE, related_name='+')
+    # Partie commune des deux créneaux
+    debut = models.TimeField('Début du chevauchement')
+    fin = models.TimeField('Fin du chevauchement')
+    date_detection = models.DateTimeField('Date de détection', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Conflit de cours'
+        verbose_name_plural = 'Conflits de cours'
+        ordering = ['jour', 'debut', 'type_conflit', 'cle']
+        indexes = [
+            models.Index(fields=['zone', 'jour'], name='conflit_zone_jour_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.jour} {self.debut:%H:%M}-{self.fin:%H:%M} {self.type_conflit} {self.cle}"
+
+
+class VerrouScraping(models.Model):
+    """
+    Verrou partagé entre processus (workers WSGI, synchronisation) : un seul scraping
+    à la fois par (zone, semaine). Un verrou expiré, laissé par un processus arrêté
+    en cours de scraping, peut être repris.
+    """
+    zone = models.PositiveSmallIntegerField('Zone')
+    debut_semaine = models.DateField('Début de semaine (lundi)')
+    proprietaire = models.CharField('Propriétaire', max_length=64)
+    expire_le = models.DateTimeField('Expiration')
+
+    class Meta:
+        verbose_name = 'Verrou de scraping'
+        verbose_name_plural = 'Verrous de scraping'
+        constraints = [
+            models.UniqueConstraint(fields=['zone', 'debut_semaine'], name='verrou_scraping_unique'),
+        ]
+
+    def __str__(self):
+        return f"Zone {self.zone} - semaine du {self.debut_semaine} ({self.proprietaire})"
+
+    @classmethod
+    def acquerir(cls, zone, jour, proprietaire, duree):
+        """Prend le verrou pour `duree` secondes ; retourne False s'il est déjà tenu."""
+        maintenant = timezone.now()
+        lundi = debut_semaine(jour)
+        try:
+            with transaction.atomic():
+                cls.objects.create(zone=zone, debut_semaine=lundi, proprietaire=proprietaire,
+                                   expire_le=maintenant + timedelta(seconds=duree))
+            return True
+        except IntegrityError:
+            return bool(cls.objects.filter(zone=zone, debut_semaine=lundi, expire_le__lt=maintenant).update(
+                proprietaire=proprietaire, expire_le=maintenant + timedelta(seconds=duree)
+            ))
+
+    @classmethod
+    def liberer(cls, zone, jour, proprietaire):
+        cls.objects.filter(zone=zone, debut_semaine=debut_semaine(jour), proprietaire=proprietaire).delete()
+
+    @classmethod
+    def est_tenu(cls, zone, jour):
+        return cls.objects.filter(
+            zone=zone, debut_semaine=debut_semaine(jour), expire_le__gte=timezone.now()
+        ).exists()
+
+
+class SeauJetonsPartage(models.Model):
+    """
+    État du seau à jetons du gouverneur, partagé par tous les processus qui utilisent
+    la base (workers WSGI/ASGI, synchronisation, rattrapage) : le débit vers l'UPGC
+    est borné globalement et non par processus.
+    """
+    nom = models.CharField('Nom', max_length=50, unique=True)
+    jetons = models.FloatField('Jetons disponibles')
+    # Horloge murale (time.time()), seule horloge commune à plusieurs processus
+    mis_a_jour = models.FloatField('Dernière mise à jour (s)')
+
+    class Meta:
+        verbose_name = 'Seau à jetons partagé'
+        verbose_name_plural = 'Seaux à jetons partagés'
+
+    def __str__(self):
+        return f"{self.nom}: {self.jetons:.2f} jetons"
+
+    @classmethod
+    def reserver(cls, nom, debit, capacite, maintenant):
+        """
+        Retire un jeton (le solde peut devenir négatif : requêtes en attente de leur
+        tour) et retourne le solde. La transaction prend le verrou d'écriture dès le
+        BEGIN sous SQLite (mode IMMEDIATE) et verrouille la ligne ailleurs.
+        """
+        with transaction.atomic():
+            seau = cls.objects.select_for_update().filter(nom=nom).first()
+            if seau is None:
+                try:
+                    with transaction.atomic():
+                        seau = cls.objects.create(nom=nom, jetons=capacite, mis_a_jour=maintenant)
+                except IntegrityError:
+                    # Créé au même instant par un autre processus
+                    seau = cls.objects.select_for_update().get(nom=nom)
+            ecoule = max(0.0, maintenant - seau.mis_a_jour)
+            seau.jetons = min(capacite, seau.jetons + ecoule * debit) - 1
+            seau.mis_a_jour = max(seau.mis_a_jour, maintenant)
+            seau.save(update_fields=['jetons', 'mis_a_jour'])
+            return seau.jetons
+
+    @classmethod
+    def rendre(cls, nom):
+        cls.objects.filter(nom=nom).update(jetons=models.F('jetons') + 1)
+
+
+class SemaineScrapee(models.Model):
+    """
+    Registre des semaines déjà récupérées sur le site de l'UPGC.
+    Une semaine présente ici est couverte en base, même si certains jours
+    (dimanche, jours fériés) n'ont aucun cours.
+    """
+    zone = models.PositiveSmallIntegerField('Zone')
+    debut_semaine = models.DateField('Début de semaine (lundi)')
+    date_scraping = models.DateTimeField('Date du scraping')
+    # Dernier scraping ayant réellement changé les cours de la semaine
+    date_modification = models.DateTimeField('Date de modification', null=True, blank=True)
+    # Validateurs HTTP renvoyés par GRR et empreinte de la page, pour les requêtes conditionnelles
+    etag = models.CharField('ETag', max_length=200, blank=True, default='')
+    last_modified = models.CharField('Last-Modified', max_length=64, blank=True, default='')
+    empreinte = models.CharField('Empreinte du planning', max_length=64, blank=True, default='')
+    nombre_evenements = models.PositiveIntegerField('Nombre d\'événements', default=0)
+
+    class Meta:
+        verbose_name = 'Semaine scrapée'
+        verbose_name_plural = 'Semaines scrapées'
+        ordering = ['-debut_semaine', 'zone']
+        constraints = [
+            models.UniqueConstraint(fields=['zone', 'debut_semaine'], name='semaine_scrapee_unique'),
+        ]
+
+    def __str__(self):
+        return f"Zone {self.zone} - semaine {self.numero}/{self.annee}"
+
+    @property
+    def annee(self):
+        return self.debut_semaine.isocalendar()[0]
+
+    @property
+    def numero(self):
+        return self.debut_semaine.isocalendar()[1]
+
+    @classmethod
+    def est_couverte(cls, zone, jour):
+        return cls.objects.filter(zone=zone, debut_semaine=debut_semaine(jour)).exists()
+
+    @classmethod
+    def pour(cls, zone, jour):
+        return cls.objects.filter(zone=zone, debut_semaine=debut_semaine(jour)).first()
+
+    @property
+    def validateurs(self):
+        return {'etag': self.etag, 'last_modified': self.last_modified, 'empreinte': self.empreinte}
+
+    @classmethod
+    def enregistrer(cls, zone, jour, nombre_evenements, modifiee=True, validateurs=None):
+        maintenant = timezone.now()
+        defaults = {
+            'date_scraping': maintenant,
+            'nombre_evenements': nombre_evenements,
+            **(validateurs or {}),
+        }
+        if modifiee:
+            defaults['date_modification'] = maintenant
+        obj, _ = cls.objects.update_or_create(
+            zone=zone,
+            debut_semaine=debut_semaine(jour),
+            defaults=defaults,
+            create_defaults={**defaults, 'date_modification': maintenant},
+        )
+        return obj
@@ -0,0 +1,264 @@
+# core/parseurs.py
+"""
+Parseurs HTML du tableau de week_all.php.
+Chaque parseur parcourt `div#planning2 table.semaine` et délègue l'analyse du texte
+des cellules à ExtracteurUPGC.extraire_depuis_textes, pour produire exactement les
+mêmes dicts d'événements quel que soit le moteur HTML.
+"""
+import logging
+import re
+import time
+
+from bs4 import BeautifulSoup
+
+from . import metriques
+
+try:
+    import lxml.html
+except ImportError:  # lxml est optionnel : repli sur BeautifulSoup
+    lxml = None
+
+logger = logging.getLogger(__name__)
+
+_RE_PLANNING = re.compile(rb'id=["\']?planning2\b')
+_RE_TABLE = re.compile(rb'<(/?)table\b[^>]*>', re.IGNORECASE)
+_RE_CHARSET = re.compile(rb'charset=["\']?([\w-]+)', re.IGNORECASE)
+
+
+def decouper_planning(contenu):
+    """
+    Extrait des octets de la page le seul `table.semaine` de div#planning2, en suivant
+    l'imbrication des balises <table>. Retourne None si le tableau est introuvable.
+    """
+    planning = _RE_PLANNING.search(contenu)
+    if not planning:
+        return None
+    ouverture = None
+    profondeur = 0
+    for balise in _RE_TABLE.finditer(contenu, planning.end()):
+        if ouverture is None:
+            if not balise.group(1) and b'semaine' in balise.group(0):
+                ouverture = balise.start()
+                profondeur = 1
+            continue
+        profondeur += -1 if balise.group(1) else 1
+        if profondeur == 0:
+            return contenu[ouverture:balise.end()]
+    return None
+
+
+def _evenement(zone, jour, ressource, infos):
+    # Création dict pour modèle Cours
+    return {
+        'zone': zone,
+        'jour': jour,
+        'horaire': infos['horaire'],
+        'type_cours': infos['type_cours'] or 'Autre',
+        'enseignant': infos['enseignant'] or 'Non spécifié',
+        'intitule': infos['intitule'] or 'Cours',
+        'niveau': infos['niveau'],
+        'salle': infos['salle'] or ressource,
+        'ressource': ressource
+    }
+
+
+class ParseurPlanning:
+    """
+    Interface commune : `extraire(contenu, zone)` renvoie la liste des événements.
+    Les sous-classes implémentent `_extraire(contenu, zone, duree)` et reportent
+    dans `duree` le temps d'analyse HTML et celui de l'extraction des cellules ;
+    le reste est compté comme parcours du tableau.
+    """
+
+    nom = None
+
+    def __init__(self, extracteur):
+        # L'extracteur porte les heuristiques texte (horaires, types, enseignants)
+        self.extracteur = extracteur
+
+    def extraire(self, contenu, zone):
+        duree = {'analyse_html': 0.0, 'extraction_cellules': 0.0}
+        debut = time.perf_counter()
+        try:
+            return self._extraire(contenu, zone, duree)
+        finally:
+            totale = time.perf_counter() - debut
+            for phase, valeur in duree.items():
+                metriques.SCRAPING_PHASES.observer(valeur, phase=phase)
+            metriques.SCRAPING_PHASES.observer(max(0.0, totale - sum(duree.values())), phase='parcours_tableau')
+
+    def _extraire(self, contenu, zone, duree):
+        raise NotImplementedError
+
+
+class ParseurBeautifulSoup(ParseurPlanning):
+    """
+    Parseur de référence : arbre BeautifulSoup ('html.parser', pur Python) de toute la page.
+    """
+
+    nom = 'html.parser'
+
+    def _extraire(self, contenu, zone, duree):
+        debut = time.perf_counter()
+        soup = BeautifulSoup(contenu, 'html.parser')
+        duree['analyse_html'] += time.perf_counter() - debut
+
+        main_table = soup.select_one('div#planning2 table.semaine')
+        if not main_table:
+            raise ValueError("Tableau principal non trouvé")
+
+        # 1. Dates
+        dates = []
+        headers_row = main_table.find('thead').find('tr')
+        if headers_row:
+            for th in headers_row.find_all('th'):
+                link = th.find('a')
+                if link and link.get('href'):
+                    d = self.extracteur.parse_date_from_url(link.get('href'))
+                    dates.append(d)
+                elif "Ressources" not in th.get_text():
+                    dates.append(None)
+
+        # 2. Lignes
+        tbody = main_table.find('tbody')
+        if not tbody: return []
+
+        evenements_modeles = []
+
+        rows = tbody.find_all('tr', recursive=False)
+        for row in rows:
+            cells = row.find_all('td', recursive=False)
+            if not cells: continue
+
+            # Ressource
+            ressource_raw = cells[0].get_text(separator=' ').strip()
+            ressource = " ".join(ressource_raw.split())
+
+            # Jours
+            for i, cell in enumerate(cells[1:]):
+                if i >= len(dates): break
+                jour = dates[i]
+                if not jour: continue
+
+                # La page couvre toute la semaine : on retourne tout, la vue filtre
+                # le jour demandé et la synchronisation sauvegarde la semaine entière.
+
+                # Tables imbriquées class="pleine", ou contenu directement dans la cellule
+                nested_tables = cell.find_all('table', class_='pleine')
+                if not nested_tables:
+                    parent_tds = [cell]
+                else:
+                    parent_tds = [t.find('td') for t in nested_tables if t.find('td')]
+
+                for td in parent_tds:
+                    debut = time.perf_counter()
+                    infos = self.extracteur.extraire_depuis_cellule(td)
+                    duree['extraction_cellules'] += time.perf_counter() - debut
+                    if infos:
+                        evenements_modeles.append(_evenement(zone, jour, ressource, infos))
+
+        return evenements_modeles
+
+
+class ParseurLxml(ParseurPlanning):
+    """
+    Parseur rapide : seul le tableau de la semaine est découpé dans les octets de la
+    page puis analysé par lxml (libxml2, en C). Même parcours que le parseur de
+    référence, traduit en XPath.
+    """
+
+    nom = 'lxml'
+
+    XPATH_PLEINE = ".//table[contains(concat(' ', normalize-space(@class), ' '), ' pleine ')]"
+
+    @staticmethod
+    def _textes(element):
+        # Nœuds texte uniquement (pas les commentaires), dans l'ordre du document,
+        # comme get_text() de BeautifulSoup
+        return element.xpath('.//text()')
+
+    def _arbre(self, contenu):
+        fragment = decouper_planning(contenu)
+        if fragment is None:
+            raise ValueError("Tableau principal non trouvé")
+        # Le fragment perd la balise <meta charset> : on reprend l'encodage de la page
+        charset = _RE_CHARSET.search(contenu[:4096])
+        encodage = charset.group(1).decode('ascii') if charset else 'utf-8'
+        parser = lxml.html.HTMLParser(encoding=encodage)
+        return lxml.html.fragment_fromstring(fragment, parser=parser)
+
+    def _extraire(self, contenu, zone, duree):
+        debut = time.perf_counter()
+        main_table = self._arbre(contenu)
+        duree['analyse_html'] += time.perf_counter() - debut
+        extracteur = self.extracteur
+
+        # 1. Dates
+        dates = []
+        thead = main_table.xpath('.//thead')
+        if not thead:
+            raise ValueError("En-tête du tableau introuvable")
+        headers_row = thead[0].xpath('.//tr')
+        if headers_row:
+            for th in headers_row[0].xpath('.//th'):
+                link = th.xpath('.//a')
+                if link and link[0].get('href'):
+                    dates.append(extracteur.parse_date_from_url(link[0].get('href')))
+                elif "Ressources" not in ''.join(self._textes(th)):
+                    dates.append(None)
+
+        # 2. Lignes
+        tbody = main_table.xpath('.//tbody')
+        if not tbody:
+            return []
+
+        evenements_modeles = []
+        for row in tbody[0].iterchildren('tr'):
+            cells = row.findall('td')
+            if not cells:
+                continue
+
+            ressource = " ".join(' '.join(self._textes(cells[0])).split())
+
+            for i, cell in enumerate(cells[1:]):
+                if i >= len(dates):
+                    break
+                jour = dates[i]
+                if not jour:
+                    continue
+
+                nested_tables = cell.xpath(self.XPATH_PLEINE)
+                if not nested_tables:
+                    parent_tds = [cell]
+                else:
+                    parent_tds = [tds[0] for tds in (t.xpath('.//td') for t in nested_tables) if tds]
+
+                for td in parent_tds:
+                    debut = time.perf_counter()
+                    lignes_brutes = '\n'.join(self._textes(td)).split('\n')
+                    textes_i = [
+                        ''.join(t.strip() for t in self._textes(balise))
+                        for balise in td.iter('i')
+                    ]
+                    infos = extracteur.extraire_depuis_textes(lignes_brutes, textes_i)
+                    duree['extraction_cellules'] += time.perf_counter() - debut
+                    if infos:
+                        evenements_modeles.append(_evenement(zone, jour, ressource, infos))
+
+        return evenements_modeles
+
+
+PARSEURS = {
+    ParseurBeautifulSoup.nom: ParseurBeautifulSoup,
+    ParseurLxml.nom: ParseurLxml,
+}
+
+
+def obtenir_parseur(nom):
+    """Classe de parseur pour `nom` ; repli sur le parseur de référence si lxml manque."""
+    if nom not in PARSEURS:
+        raise ValueError(f"Parseur inconnu: {nom} (choix: {', '.join(PARSEURS)})")
+    if nom == ParseurLxml.nom and lxml is None:
+        logger.warning("lxml n'est pas installé, utilisation du parseur html.parser")
+        return ParseurBeautifulSoup
+    return PARSEURS[nom]
@@ -0,0 +1,154 @@
+# core/profilage.py
+"""
+Profilage à la demande d'une requête, réservé au personnel (is_staff).
+Avec l'en-tête X-UPGC-Profil: 1 ou le paramètre ?profil=true, la réponse de la
+vue est remplacée par un rapport JSON : code et taille de la réponse d'origine,
+durée totale, requêtes SQL (texte, durée, total) et résumé cProfile des fonctions
+les plus coûteuses. Les autres requêtes traversent le middleware sans surcoût.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import JsonResponse
+import cProfile
+import io
+import pstats
+import threading
+import time
+
+ENTETE = 'HTTP_X_UPGC_PROFIL'
+PARAMETRE = 'profil'
+VRAI = ('true', '1', 'yes', 'oui')
+
+
+def profil_demande(request):
+    """Vrai si la requête demande son profil (en-tête ou paramètre), sans lire la session."""
+    demande = request.META.get(ENTETE) or request.GET.get(PARAMETRE)
+    return bool(demande) and demande.lower() in VRAI
+
+
+def est_personnel(request):
+    utilisateur = getattr(request, 'user', None)
+    return bool(utilisateur and utilisateur.is_authenticated and utilisateur.is_staff)
+
+
+class Profil:
+    """cProfile et journal des requêtes SQL (toutes les bases) pendant un bloc."""
+
+    def __init__(self):
+        self.profileur = cProfile.Profile()
+        self.requetes = []
+
+    def _journaliser(self, execute, sql, params, many, context):
+        debut = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.requetes.append({
+                'alias': context['connection'].alias,
+                'sql': sql,
+                'duree_ms': round((time.perf_counter() - debut) * 1000, 3),
+            })
+
+    def brancher(self):
+        # Les connexions sont propres au thread : à appeler dans le thread des requêtes SQL
+        for connexion in connections.all():
+            connexion.execute_wrappers.append(self._journaliser)
+
+    def debrancher(self):
+        for connexion in connections.all():
+            if self._journaliser in connexion.execute_wrappers:
+                connexion.execute_wrappers.remove(self._journaliser)
+
+    def demarrer(self):
+        self.debut = time.perf_counter()
+        self.profileur.enable()
+
+    def arreter(self):
+        self.profileur.disable()
+        self.duree = time.perf_counter() - self.debut
+
+    def rapport(self, reponse):
+        sortie = io.StringIO()
+        statistiques = pstats.Stats(self.profileur, stream=sortie)
+        statistiques.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(settings.UPGC_PROFILAGE_LIGNES)
+        return {
+            'code': reponse.status_code,
+            'taille_octets': None if reponse.streaming else len(reponse.content),
+            'duree_ms': round(self.duree * 1000, 3),
+            'requetes_sql': {
+                'nombre': len(self.requetes),
+                'duree_ms': round(sum(r['duree_ms'] for r in self.requetes), 3),
+                'liste': self.requetes,
+            },
+            'profil': sortie.getvalue().splitlines(),
+        }
+
+
+# Un seul profileur actif à la fois (cProfile refuse deux profilages simultanés)
+_verrou = threading.Lock()
+
+
+def _occupe():
+    return JsonResponse({'erreur': "Un profilage est déjà en cours", 'code': 503}, status=503)
+
+
+class ProfilageMiddleware:
+    """
+    À placer après AuthenticationMiddleware. Compatible WSGI et ASGI : sous ASGI,
+    le profil couvre la boucle d'événements et les requêtes SQL de l'ORM asynchrone
+    (exécutées dans le thread partagé de sync_to_async).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.asynchrone = iscoroutinefunction(get_response)
+        if self.asynchrone:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.asynchrone:
+            return self.__acall__(request)
+        if not (profil_demande(request) and est_personnel(request)):
+            return self.get_response(request)
+        if not _verrou.acquire(blocking=False):
+            return _occupe()
+        try:
+            profil = Profil()
+            profil.brancher()
+            profil.demarrer()
+            try:
+                reponse = self._rendre(self.get_response(request))
+            finally:
+                profil.arreter()
+                profil.debrancher()
+        finally:
+            _verrou.release()
+        return JsonResponse(profil.rapport(reponse))
+
+    async def __acall__(self, request):
+        if not (profil_demande(request) and await sync_to_async(est_personnel)(request)):
+            return await self.get_response(request)
+        if not _verrou.acquire(blocking=False):
+            return _occupe()
+        try:
+            profil = Profil()
+            await sync_to_async(profil.brancher)()
+            profil.demarrer()
+            try:
+                reponse = self._rendre(await self.get_response(request))
+            finally:
+                profil.arreter()
+                await sync_to_async(profil.debrancher)()
+        finally:
+            _verrou.release()
+        return JsonResponse(profil.rapport(reponse))
+
+    def _rendre(self, reponse):
+        # Réponses DRF : le rendu (JSON) fait partie du coût mesuré
+        if hasattr(reponse, 'render') and not getattr(reponse, 'is_rendered', True):
+            reponse.render()
+        return reponse
@@ -0,0 +1,145 @@
+# core/rattrapage.py
+"""
+Rattrapage de l'historique (une année universitaire passée, par exemple).
+Les pages sont téléchargées par un pool de threads (limité par le gouverneur),
+analysées dans un pool de processus pour occuper tous les cœurs, puis écrites en
+base par lots. Le registre SemaineScrapee sert de point de reprise : une semaine
+enregistrée n'est pas retéléchargée, si bien qu'un rattrapage interrompu repart
+de la dernière semaine écrite.
+"""
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+import logging
+import multiprocessing
+import os
+import threading
+import time
+
+import django
+from django.conf import settings
+from django.db import transaction
+
+from . import metriques
+from .models import SemaineScrapee, debut_semaine
+from .scraping import ExtracteurUPGC, ResultatSemaine, empreinte_planning, fermer_connexions_apres
+from .tasks import enregistrer_resultat
+
+logger = logging.getLogger(__name__)
+
+_extracteur_processus = None
+
+
+def analyser_page(contenu, zone, parseur):
+    """Exécutée dans un processus du pool : (empreinte, événements) d'une page."""
+    global _extracteur_processus
+    if _extracteur_processus is None or _extracteur_processus.parseur.nom != parseur:
+        _extracteur_processus = ExtracteurUPGC(url_base='http://localhost/', parseur=parseur)
+    resultat = empreinte_planning(contenu), _extracteur_processus.extraire_evenements(contenu, zone)
+    # Les processus du pool se terminent sans passer par atexit
+    metriques.sauvegarder()
+    return resultat
+
+
+def semaines_a_rattraper(zones, debut, fin, forcer=False):
+    """(zone, lundi) de la plage, sans les semaines déjà au registre (sauf si `forcer`)."""
+    semaines = ExtracteurUPGC.semaines_distinctes(zones=zones, debut=debut, fin=fin)
+    if forcer:
+        return semaines, 0
+    faites = set(SemaineScrapee.objects.filter(
+        zone__in=zones, debut_semaine__range=(debut_semaine(debut), fin)
+    ).values_list('zone', 'debut_semaine'))
+    return [s for s in semaines if s not in faites], len(faites)
+
+
+def rattraper(zones, debut, fin, processus=None, telechargements=None, lot=10, forcer=False, progression=None):
+    """
+    Télécharge, analyse et enregistre toutes les semaines de `debut` à `fin` pour
+    `zones`. `processus` : taille du pool d'analyse (défaut : nombre de cœurs) ;
+    `telechargements` : requêtes simultanées (défaut : UPGC_SYNC_WORKERS) ; `lot` :
+    semaines écrites par transaction. `progression(rapport)` est appelée après
+    chaque lot. Retourne le rapport final (semaines, événements, débits).
+    """
+    semaines, ignorees = semaines_a_rattraper(zones, debut, fin, forcer)
+    processus = processus or os.cpu_count() or 1
+    telechargements = telechargements or settings.UPGC_SYNC_WORKERS
+    extracteur = ExtracteurUPGC()
+    parseur = extracteur.parseur.nom
+    rapport = {'semaines': 0, 'evenements': 0, 'echecs': 0, 'ignorees': ignorees,
+               'a_traiter': len(semaines), 'processus': processus}
+    en_attente = []
+    debut_mesure = time.perf_counter()
+
+    def ecrire():
+        # Une transaction par lot ; chaque semaine écrite entre au registre (point de reprise)
+        with transaction.atomic():
+            for zone, lundi, empreinte, evenements in en_attente:
+                resultat = ResultatSemaine(zone, lundi, evenements, empreinte=empreinte)
+                bilan = enregistrer_resultat(zone, lundi, None, resultat)
+                rapport['semaines'] += 1
+                # Événements conservés après validation et dédoublonnage
+                rapport['evenements'] += bilan['crees'] + bilan['modifies'] + bilan['inchanges']
+        en_attente.clear()
+        _mesurer(rapport, debut_mesure)
+        if progression:
+            progression(dict(rapport))
+
+    def recolter(analyses, bloquant):
+        termines, _ = wait(analyses, timeout=None if bloquant else 0, return_when=FIRST_COMPLETED)
+        for future in termines:
+            zone, lundi = analyses.pop(future)
+            try:
+                empreinte, evenements = future.result()
+            except Exception as e:
+                logger.error(f"Analyse zone={zone} semaine={lundi} en échec: {e}")
+                rapport['echecs'] += 1
+                continue
+            en_attente.append((zone, lundi, empreinte, evenements))
+            if len(en_attente) >= lot:
+                ecrire()
+
+    # requests.Session n'est pas garanti thread-safe : une session par thread du pool
+    local = threading.local()
+
+    @fermer_connexions_apres
+    def telecharger(zone, lundi):
+        if not hasattr(local, 'session'):
+            local.session = extracteur._nouvelle_session()
+        return extracteur.telecharger_page(zone, lundi, local.session)
+
+    # Processus d'analyse démarrés par 'spawn' : un fork, pendant que les threads de
+    # téléchargement tournent, hériterait des verrous (journalisation, métriques) qu'ils
+    # tiennent à cet instant. django.setup est l'initialiseur : importer ce module
+    # avant la configuration de Django échouerait.
+    with ThreadPoolExecutor(max_workers=telechargements) as reseau, \
+            ProcessPoolExecutor(max_workers=processus, mp_context=multiprocessing.get_context('spawn'),
+                                initializer=django.setup) as calcul:
+        pages = {reseau.submit(telecharger, zone, lundi): (zone, lundi) for zone, lundi in semaines}
+        analyses = {}
+        try:
+            for future in as_completed(pages):
+                zone, lundi = pages[future]
+                try:
+                    contenu = future.result()
+                except Exception as e:
+                    logger.error(f"Téléchargement zone={zone} semaine={lundi} en échec: {e}")
+                    rapport['echecs'] += 1
+                    continue
+                analyses[calcul.submit(analyser_page, contenu, zone, parseur)] = (zone, lundi)
+                # Écritures au fil de l'eau, sans attendre la fin des téléchargements
+                recolter(analyses, bloquant=False)
+            while analyses:
+                recolter(analyses, bloquant=True)
+            if en_attente:
+                ecrire()
+        finally:
+            for future in pages:
+                future.cancel()
+
+    _mesurer(rapport, debut_mesure)
+    return rapport
+
+
+def _mesurer(rapport, debut_mesure):
+    duree = time.perf_counter() - debut_mesure
+    rapport['duree_s'] = round(duree, 3)
+    rapport['semaines_par_s'] = round(rapport['semaines'] / duree, 2) if duree else None
+    rapport['evenements_par_s'] = round(rapport['evenements'] / duree, 1) if duree else None
@@ -0,0 +1,40 @@
+# core/renderers.py
+import json
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import metriques
+
+try:
+    import orjson
+except ImportError:  # orjson est optionnel : repli sur l'encodeur JSON de DRF
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Rendu JSON via orjson (en C). Même sortie que JSONRenderer : dates ISO,
+    datetimes UTC suffixés par 'Z', caractères non ASCII laissés tels quels.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Indentation demandée (API navigable, ?indent) : on garde le rendu DRF
+        if self.get_indent(accepted_media_type or '', renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        with metriques.API_RENDU.chronometrer():
+            return orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS,
+            )
+
+
+def ligne_json(donnees):
+    """Une ligne JSON Lines (bytes, saut de ligne compris), même encodage que ORJSONRenderer."""
+    if orjson is None:
+        return (json.dumps(donnees, cls=JSONEncoder, ensure_ascii=False) + '\n').encode('utf-8')
+    return orjson.dumps(donnees, default=JSONEncoder().default,
+                        option=orjson.OPT_UTC_Z | orjson.OPT_APPEND_NEWLINE)
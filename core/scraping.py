@@ -1,13 +1,83 @@
 # core/scraping.py
 import requests
-from bs4 import BeautifulSoup
-from datetime import datetime, date
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, date, timedelta
+import functools
+import hashlib
 import logging
 import re
-from .models import Cours
+import threading
+from . import metriques
+from .gouverneur import obtenir_gouverneur
+from .models import Cours, ZONE_PAR_DEFAUT, debut_semaine
+from .parseurs import decouper_planning, obtenir_parseur
+
+try:
+    import httpx
+except ImportError:  # httpx est optionnel : repli sur requests dans un thread
+    httpx = None
+
+# Threads des téléchargements asynchrones sans httpx : un pool dédié, pour que des
+# pages lentes n'occupent pas l'exécuteur par défaut de la boucle d'événements
+_TELECHARGEMENTS = ThreadPoolExecutor(max_workers=32, thread_name_prefix='telechargement-upgc')
 
 logger = logging.getLogger(__name__)
 
+
+def fermer_connexions_apres(fonction):
+    """
+    Pour une fonction exécutée dans un thread de pool : le gouverneur y ouvre une
+    connexion (seau partagé en base) que ni la fin d'une requête ni celle d'un job ne
+    fermeraient.
+    """
+    @functools.wraps(fonction)
+    def executer(*args, **kwargs):
+        try:
+            return fonction(*args, **kwargs)
+        finally:
+            connections.close_all()
+    return executer
+
+
+# À incrémenter quand l'extraction change : les empreintes déjà stockées ne
+# doivent plus court-circuiter l'analyse de pages identiques.
+VERSION_EXTRACTION = 1
+
+
+@dataclass
+class ResultatSemaine:
+    """Résultat du scraping d'une semaine pour une zone."""
+    zone: int
+    debut_semaine: date
+    evenements: list = field(default_factory=list)
+    erreur: str = None
+    # Page identique à la précédente : ni analyse ni écriture en base
+    inchange: bool = False
+    # Validateurs à conserver pour la prochaine requête conditionnelle
+    etag: str = ''
+    last_modified: str = ''
+    empreinte: str = ''
+
+    @property
+    def statut(self):
+        if self.erreur:
+            return 'erreur'
+        return 'inchange' if self.inchange else 'modifie'
+
+
+def empreinte_planning(contenu):
+    """
+    Empreinte SHA-256 de la partie utile d'une page week_all.php : le seul tableau
+    de la semaine, pour ignorer l'horodatage et les menus autour.
+    """
+    tableau = decouper_planning(contenu)
+    return hashlib.sha256(b'%d:' % VERSION_EXTRACTION + (tableau or contenu)).hexdigest()
+
+
 class ExtracteurUPGC:
     """
     Extracteur adapté pour le modèle Cours.
@@ -15,14 +85,23 @@ class ExtracteurUPGC:
     """
     
     URL_BASE = "https://upgc.mygrr.net/week_all.php"
+    USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+    def __init__(self, url_base=None, parseur=None):
+        self.url_base = url_base or settings.UPGC_URL_BASE
+        self.timeout = settings.UPGC_TIMEOUT
+        self.session = self._nouvelle_session()
+        self.parseur = obtenir_parseur(parseur or settings.UPGC_PARSEUR)(self)
         self.pattern_horaire = r'(\d{1,2}:\d{2})\s*à\s*(\d{1,2}:\d{2})'
         self.types_activites_connus = ['TD', 'DEVOIR', 'TP', 'COURS', 'CM', 'EXAMEN', 'PROJET', 'SOUTENANCE']
+        # Renseigné quand le dernier appel à recuperer_emploi_du_temps a échoué,
+        # pour distinguer une semaine vide d'un scraping raté.
+        self.derniere_erreur = None
+
+    def _nouvelle_session(self):
+        session = requests.Session()
+        session.headers.update({'User-Agent': self.USER_AGENT})
+        return session
 
     def parse_date_from_url(self, url):
         import urllib.parse
@@ -60,18 +139,28 @@ class ExtracteurUPGC:
 
     def extraire_depuis_cellule(self, cellule_html):
         """
-        Extrait les infos d'une cellule pour le modèle Cours.
+        Extrait les infos d'une cellule (élément BeautifulSoup) pour le modèle Cours.
         """
         try:
             lignes_brutes = cellule_html.get_text(separator='\n').split('\n')
+            textes_i = [balise.get_text(strip=True) for balise in cellule_html.find_all('i')]
+        except Exception as e:
+            logger.error(f"Erreur extraction cellule: {e}")
+            return None
+        return self.extraire_depuis_textes(lignes_brutes, textes_i)
+
+    def extraire_depuis_textes(self, lignes_brutes, textes_i):
+        """
+        Extraction commune à tous les parseurs HTML : `lignes_brutes` sont les textes de
+        la cellule (un par nœud texte), `textes_i` les textes des balises <i>.
+        """
+        try:
             lignes_propres = [l for l in [self.normaliser_texte(x) for x in lignes_brutes] if l and l != '@']
             
             # Métadonnées dans <i>
-            balises_i = cellule_html.find_all('i')
             niveau = ''
             salle = ''
-            for balise in balises_i:
-                texte = balise.get_text(strip=True)
+            for texte in textes_i:
                 if 'Niveau :' in texte:
                     niveau = texte.replace('Niveau :', '').strip()
                 elif 'Salle :' in texte:
@@ -125,8 +214,84 @@ class ExtracteurUPGC:
     def recuperer_emploi_du_temps(self, zone=2, date_cible=None):
         if date_cible is None:
             date_cible = date.today()
-            
-        url = f"{self.URL_BASE}?area={zone}"
+        
+        self.derniere_erreur = None
+        try:
+            logger.info(f"Scraping UPGC: zone={zone}, date={date_cible}")
+            contenu = self._telecharger(zone, date_cible).content
+            return self.extraire_evenements(contenu, zone)
+        except Exception as e:
+            logger.error(f"Erreur scraping: {e}")
+            self.derniere_erreur = str(e)
+            return []
+
+    def recuperer_semaine(self, zone, date_cible, precedent=None, session=None):
+        """
+        Récupère la semaine contenant `date_cible` en requête conditionnelle.
+        `precedent` contient les validateurs du dernier scraping (etag, last_modified,
+        empreinte). Si le serveur répond 304, ou si la partie utile de la page a la même
+        empreinte, le résultat est marqué `inchange` sans analyse HTML.
+        Ne lève pas d'exception : les échecs sont reportés dans `erreur`.
+        """
+        lundi = debut_semaine(date_cible)
+        precedent = precedent or {}
+        try:
+            logger.info(f"Scraping UPGC: zone={zone}, semaine={lundi}")
+            response = self._telecharger(zone, date_cible, session, self._entetes_conditionnels(precedent))
+            return self._resultat(zone, lundi, precedent, response)
+        except Exception as e:
+            logger.error(f"Erreur scraping zone={zone} semaine={lundi}: {e}")
+            return ResultatSemaine(zone, lundi, erreur=str(e))
+
+    async def recuperer_semaine_async(self, zone, date_cible, precedent=None, client=None):
+        """
+        Variante asynchrone de recuperer_semaine, pour les vues ASGI : la requête
+        HTTP n'occupe pas la boucle d'événements (httpx, ou requests dans un thread
+        si httpx n'est pas installé) et l'analyse HTML s'exécute dans un thread.
+        """
+        lundi = debut_semaine(date_cible)
+        precedent = precedent or {}
+        try:
+            logger.info(f"Scraping UPGC: zone={zone}, semaine={lundi}")
+            response = await self._telecharger_async(zone, date_cible, client, self._entetes_conditionnels(precedent))
+            return await sync_to_async(self._resultat, thread_sensitive=False)(zone, lundi, precedent, response)
+        except Exception as e:
+            logger.error(f"Erreur scraping zone={zone} semaine={lundi}: {e}")
+            return ResultatSemaine(zone, lundi, erreur=str(e))
+
+    @staticmethod
+    def _entetes_conditionnels(precedent):
+        entetes = {}
+        if precedent.get('etag'):
+            entetes['If-None-Match'] = precedent['etag']
+        if precedent.get('last_modified'):
+            entetes['If-Modified-Since'] = precedent['last_modified']
+        return entetes
+
+    def _resultat(self, zone, lundi, precedent, response):
+        """ResultatSemaine d'une réponse HTTP (requests ou httpx)."""
+        if response.status_code == 304:
+            return ResultatSemaine(
+                zone, lundi, inchange=True,
+                etag=precedent.get('etag', ''),
+                last_modified=precedent.get('last_modified', ''),
+                empreinte=precedent.get('empreinte', ''),
+            )
+
+        resultat = ResultatSemaine(
+            zone, lundi,
+            etag=response.headers.get('ETag', ''),
+            last_modified=response.headers.get('Last-Modified', ''),
+            empreinte=empreinte_planning(response.content),
+        )
+        if resultat.empreinte == precedent.get('empreinte'):
+            resultat.inchange = True
+        else:
+            resultat.evenements = self.extraire_evenements(response.content, zone)
+        return resultat
+
+    def _requete(self, zone, date_cible):
+        url = f"{self.url_base}?area={zone}"
         # Note: L'URL avec params day/month/year risque de ne montrer que le jour
         # On veut la semaine pour avoir la structure table.semaine
         # Mais le script précédent utilisait week_all.php sans date pour avoir la semaine courante.
@@ -139,109 +304,114 @@ class ExtracteurUPGC:
             'month': date_cible.month,
             'day': date_cible.day
         }
-        
-        try:
-            logger.info(f"Scraping UPGC: zone={zone}, date={date_cible}")
-            response = self.session.get(url, params=params)
+        return url, params
+
+    def _telecharger(self, zone, date_cible, session=None, entetes=None):
+        url, params = self._requete(zone, date_cible)
+        # Débit global vers l'UPGC : attend un jeton, ou lève DebitDepasse
+        obtenir_gouverneur().avant_requete()
+        with metriques.SCRAPING_PHASES.chronometrer(phase='telechargement'):
+            try:
+                response = (session or self.session).get(url, params=params, headers=entetes, timeout=self.timeout)
+            except requests.RequestException:
+                metriques.SCRAPING_TELECHARGEMENTS.inc(resultat='erreur')
+                raise
+        metriques.SCRAPING_TELECHARGEMENTS.inc(resultat=response.status_code)
+        response.raise_for_status()
+        return response
+
+    async def _telecharger_async(self, zone, date_cible, client=None, entetes=None):
+        if httpx is None:
+            # Session dédiée : celle de l'extracteur peut servir dans un autre thread
+            return await sync_to_async(
+                fermer_connexions_apres(self._telecharger), thread_sensitive=False, executor=_TELECHARGEMENTS
+            )(
+                zone, date_cible, self._nouvelle_session(), entetes
+            )
+        if client is None:
+            async with httpx.AsyncClient(headers={'User-Agent': self.USER_AGENT}, timeout=self.timeout) as client:
+                return await self._telecharger_async(zone, date_cible, client, entetes)
+
+        url, params = self._requete(zone, date_cible)
+        await sync_to_async(fermer_connexions_apres(obtenir_gouverneur().avant_requete), thread_sensitive=False)()
+        with metriques.SCRAPING_PHASES.chronometrer(phase='telechargement'):
+            try:
+                response = await client.get(url, params=params, headers=entetes)
+            except httpx.HTTPError:
+                metriques.SCRAPING_TELECHARGEMENTS.inc(resultat='erreur')
+                raise
+        metriques.SCRAPING_TELECHARGEMENTS.inc(resultat=response.status_code)
+        # httpx considère aussi les 3xx comme des échecs : le 304 est traité par l'appelant
+        if response.status_code != 304:
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            main_table = soup.select_one('div#planning2 table.semaine')
-            if not main_table:
-                logger.error("Tableau principal non trouvé")
-                return []
-
-            # 1. Dates
-            dates = []
-            headers_row = main_table.find('thead').find('tr')
-            if headers_row:
-                for th in headers_row.find_all('th'):
-                    link = th.find('a')
-                    if link and link.get('href'):
-                        d = self.parse_date_from_url(link.get('href'))
-                        dates.append(d)
-                    elif "Ressources" not in th.get_text():
-                        dates.append(None)
-
-            # 2. Lignes
-            tbody = main_table.find('tbody')
-            if not tbody: return []
-            
-            evenements_modeles = []
-            
-            rows = tbody.find_all('tr', recursive=False)
-            for row in rows:
-                cells = row.find_all('td', recursive=False)
-                if not cells: continue
-                
-                # Ressource
-                ressource_raw = cells[0].get_text(separator=' ').strip()
-                ressource = " ".join(ressource_raw.split())
-                
-                # Jours
-                for i, cell in enumerate(cells[1:]):
-                    if i >= len(dates): break
-                    jour = dates[i]
-                    if not jour: continue
-                    
-                    # Si on ne veut que la date cible ? 
-                    # La méthode demande date_cible, mais récupère la semaine.
-                    # On filtre à la fin ou on prend tout.
-                    # Le view demande `recuperer_emploi_du_jour` donc idéalement on filtre.
-                    # Mais pour `synchroniser`, on veut tout.
-                    # On va tout retourner, le view filtrera ou sauvegardera tout.
-                    
-                    # Tables imbriquées
-                    nested_tables = cell.find_all('table', class_='pleine')
-                    if not nested_tables:
-                        # Essayer cellule directe ?
-                        # Le nouveau scraper de l'user regardait directement les cellules.
-                        # Mais la structure HTML montre des tables imbriquées class="pleine"
-                        # On supporte les deux:
-                        parent_tds = [cell]
-                    else:
-                        parent_tds = [t.find('td') for t in nested_tables if t.find('td')]
-
-                    for td in parent_tds:
-                        infos = self.extraire_depuis_cellule(td)
-                        if infos:
-                            # Création dict pour modèle Cours
-                            evt = {
-                                'jour': jour,
-                                'horaire': infos['horaire'],
-                                'type_cours': infos['type_cours'] or 'Autre',
-                                'enseignant': infos['enseignant'] or 'Non spécifié',
-                                'intitule': infos['intitule'] or 'Cours',
-                                'niveau': infos['niveau'],
-                                'salle': infos['salle'] or ressource,
-                                'ressource': ressource
-                            }
-                            evenements_modeles.append(evt)
-            
-            return evenements_modeles
+        return response
 
-        except Exception as e:
-            logger.error(f"Erreur scraping: {e}")
-            return []
+    def telecharger_page(self, zone, date_cible, session=None):
+        """Contenu brut (bytes) de la page de la semaine, sans analyse ; lève en cas d'échec."""
+        return self._telecharger(zone, date_cible, session).content
+
+    def extraire_evenements(self, contenu, zone):
+        """
+        Transforme une page week_all.php en liste de dicts pour le modèle Cours.
+        Lève ValueError si la page ne contient pas le tableau de la semaine.
+        """
+        evenements = self.parseur.extraire(contenu, zone)
+        metriques.SCRAPING_EVENEMENTS.inc(len(evenements))
+        return evenements
+
+    def recuperer_par_lots(self, cibles=None, zones=None, debut=None, fin=None, max_concurrence=4, precedents=None):
+        """
+        Récupère plusieurs semaines en parallèle.
+        Les cibles sont soit une liste de (zone, date), soit des `zones` et une plage
+        `debut`..`fin`. Elles sont ramenées à des semaines distinctes, téléchargées avec
+        au plus `max_concurrence` requêtes simultanées, et un ResultatSemaine est produit
+        pour chaque semaine dès qu'elle est prête (ordre d'arrivée, pas d'ordre de dates).
+        `precedents` associe éventuellement (zone, lundi) aux validateurs du dernier
+        scraping (voir recuperer_semaine).
+        """
+        semaines = self.semaines_distinctes(cibles, zones, debut, fin)
+        # requests.Session n'est pas garanti thread-safe : une session par thread du pool
+        local = threading.local()
+
+        @fermer_connexions_apres
+        def recuperer(zone, lundi):
+            if not hasattr(local, 'session'):
+                local.session = self._nouvelle_session()
+            precedent = (precedents or {}).get((zone, lundi))
+            return self.recuperer_semaine(zone, lundi, precedent, session=local.session)
+
+        pool = ThreadPoolExecutor(max_workers=max_concurrence)
+        try:
+            futures = [pool.submit(recuperer, zone, lundi) for zone, lundi in semaines]
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # Si l'appelant s'arrête avant la fin, on n'envoie pas les requêtes restantes
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    @staticmethod
+    def semaines_distinctes(cibles=None, zones=None, debut=None, fin=None):
+        """Liste ordonnée et sans doublon des (zone, lundi) couverts par les cibles."""
+        couples = list(cibles or [])
+        if debut is not None:
+            fin = fin or debut
+            if fin < debut:
+                raise ValueError("La date de fin doit être postérieure à la date de début")
+            lundi = debut_semaine(debut)
+            while lundi <= fin:
+                couples.extend((zone, lundi) for zone in (zones or [ZONE_PAR_DEFAUT]))
+                lundi += timedelta(weeks=1)
+        return list(dict.fromkeys((zone, debut_semaine(d)) for zone, d in couples))
 
 # Alias pour compatibilité avec l'ancien code si nécessaire, 
 # mais les nouvelles vues utilisent ExtracteurUPGC
 def recuperer_emploi_du_temps():
     extracteur = ExtracteurUPGC()
-    evts = extracteur.recuperer_emploi_du_temps()
-    count = 0
-    for evt in evts:
-        Cours.objects.update_or_create(
-            jour=evt['jour'],
-            horaire=evt['horaire'],
-            ressource=evt['ressource'],
-            defaults={
-                'type_cours': evt['type_cours'],
-                'enseignant': evt['enseignant'],
-                'intitule': evt['intitule'],
-                'niveau': evt['niveau'],
-                'salle': evt['salle']
-            }
-        )
-        count += 1
-    print(f"Import {count} cours")
+    aujourd_hui = date.today()
+    evts = extracteur.recuperer_emploi_du_temps(date_cible=aujourd_hui)
+    if extracteur.derniere_erreur:
+        print(f"Échec du scraping: {extracteur.derniere_erreur}")
+        return
+    bilan = Cours.objects.reconcilier_semaine(ZONE_PAR_DEFAUT, aujourd_hui, evts)
+    print(f"Import {len(evts)} cours ({bilan['crees']} créés, {bilan['modifies']} modifiés, "
+          f"{bilan['supprimes']} supprimés)")
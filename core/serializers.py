@@ -1,10 +1,24 @@
 from rest_framework import serializers
 from .models import Cours
 
+# Champs des cours renvoyés par l'API, lus directement via QuerySet.values().
+# Même forme que l'ancienne double sérialisation DRF : la réponse jour ne garde
+# que les champs modifiables, la réponse semaine tous les champs du modèle.
+CHAMPS_COURS_JOUR = (
+    'zone', 'horaire', 'heure_debut', 'heure_fin', 'type_cours', 'enseignant', 'intitule', 'niveau', 'salle',
+    'jour', 'ressource',
+)
+CHAMPS_COURS_SEMAINE = ('id',) + CHAMPS_COURS_JOUR + ('date_import', 'date_maj')
+# Export par plage de dates (JSON Lines / CSV)
+CHAMPS_COURS_EXPORT = CHAMPS_COURS_JOUR + ('date_maj',)
+
 class CoursSerializer(serializers.ModelSerializer):
     class Meta:
         model = Cours
         fields = '__all__'
+        # La réponse re-valide des cours déjà en base : le validateur d'unicité
+        # généré pour cours_unique_creneau les rejetterait tous.
+        validators = []
         extra_kwargs = {
             'niveau': {'required': False, 'allow_blank': True},
             'salle': {'required': False, 'allow_blank': True},
@@ -13,6 +27,23 @@ class CoursSerializer(serializers.ModelSerializer):
             'intitule': {'required': False, 'allow_blank': True},
         }
 
+class EvenementScrapeSerializer(serializers.ModelSerializer):
+    """Validation des événements du scraper, seule validation avant écriture en base."""
+    class Meta:
+        model = Cours
+        fields = ('zone', 'jour', 'horaire', 'ressource', 'type_cours', 'enseignant', 'intitule', 'niveau', 'salle')
+        # L'unicité est gérée par la réconciliation de la semaine
+        validators = []
+        extra_kwargs = {
+            'niveau': {'default': '', 'allow_blank': True},
+            'salle': {'default': '', 'allow_blank': True},
+            'enseignant': {'default': '', 'allow_blank': True},
+            'type_cours': {'default': '', 'allow_blank': True},
+            'intitule': {'default': '', 'allow_blank': True},
+        }
+
+# Les serializers de réponse décrivent le format de l'API ; les vues construisent
+# directement ce format sans repasser les données par une validation.
 class EmploiDuTempsJourResponseSerializer(serializers.Serializer):
     date = serializers.DateField()
     jour_semaine = serializers.CharField()
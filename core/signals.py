@@ -0,0 +1,48 @@
+# core/signals.py
+"""
+Journalisation des éditions unitaires de cours (admin, shell) dans ChangementCours.
+La réconciliation écrit son journal en masse et n'émet pas ces signaux, sauf pour
+ses suppressions, ignorées ici grâce à journal_en_masse().
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import ChangementCours, Cours, journal_en_masse_actif
+
+
+def _cle(cours):
+    return (cours.zone, cours.jour, cours.horaire, cours.ressource)
+
+
+@receiver(pre_save, sender=Cours)
+def memoriser_cle(sender, instance, raw=False, **kwargs):
+    # Clé avant édition : changer l'horaire ou la salle d'un cours revient, pour un
+    # client, à supprimer l'ancien créneau et à en créer un nouveau
+    instance._cle_precedente = None
+    if instance.pk and not raw:
+        instance._cle_precedente = (
+            Cours.objects.filter(pk=instance.pk).values_list('zone', 'jour', 'horaire', 'ressource').first()
+        )
+
+
+@receiver(post_save, sender=Cours)
+def journaliser_enregistrement(sender, instance, created, raw=False, **kwargs):
+    if raw or journal_en_masse_actif():
+        return
+    precedente = getattr(instance, '_cle_precedente', None)
+    if created or precedente is None:
+        ChangementCours.pour(instance, ChangementCours.CREATION).save()
+    elif tuple(precedente) != _cle(instance):
+        ChangementCours.objects.bulk_create([
+            ChangementCours.pour(instance, ChangementCours.SUPPRESSION, cle=precedente),
+            ChangementCours.pour(instance, ChangementCours.CREATION),
+        ])
+    else:
+        ChangementCours.pour(instance, ChangementCours.MODIFICATION).save()
+
+
+@receiver(post_delete, sender=Cours)
+def journaliser_suppression(sender, instance, **kwargs):
+    if journal_en_masse_actif():
+        return
+    ChangementCours.pour(instance, ChangementCours.SUPPRESSION).save()
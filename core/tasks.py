@@ -0,0 +1,166 @@
+# core/tasks.py
+"""
+Synchronisation de l'emploi du temps en arrière-plan.
+Pré-remplit la base pour la semaine courante et les suivantes afin que l'API
+serve ses réponses depuis la base plutôt que depuis le site de l'UPGC.
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from . import metriques
+from .coalescence import executer_une_fois, executer_une_fois_async
+from .conflits import recalculer_semaine
+from .models import Cours, SemaineScrapee, debut_semaine
+from .scraping import ExtracteurUPGC
+from .serializers import EvenementScrapeSerializer
+
+logger = logging.getLogger(__name__)
+
+
+def valider_evenements(evenements):
+    """
+    Valide les événements du scraper avant leur écriture en base ; c'est la seule
+    validation des cours (les réponses de l'API sont lues telles quelles).
+    Les événements invalides sont écartés avec un avertissement.
+    """
+    valides = []
+    for evt in evenements:
+        serializer = EvenementScrapeSerializer(data=evt)
+        if serializer.is_valid():
+            valides.append(serializer.validated_data)
+        else:
+            logger.warning(f"Événement ignoré ({evt.get('jour')} {evt.get('ressource')}): {serializer.errors}")
+    return valides
+
+
+def synchroniser_semaine(zone, date_cible):
+    """
+    Scrape la semaine contenant `date_cible`, la réconcilie en base et met à jour
+    le registre. Retourne le bilan de réconciliation (avec un `statut` 'inchange'
+    quand la page n'a pas changé depuis le dernier scraping), ou None si le
+    scraping a échoué (la base et le registre sont alors laissés intacts).
+    Les appels simultanés pour une même semaine sont regroupés : un seul scrape,
+    les autres reçoivent son bilan (statut 'partage' s'il vient d'un autre processus).
+    """
+    return executer_une_fois(zone, date_cible, lambda: _synchroniser_semaine(zone, date_cible))
+
+
+async def synchroniser_semaine_async(zone, date_cible):
+    """
+    Variante asynchrone de synchroniser_semaine pour les vues ASGI : la page est
+    récupérée sans bloquer la boucle d'événements, la réconciliation s'exécute
+    dans le thread des appels ORM. Les appels simultanés sont regroupés de même.
+    """
+    return await executer_une_fois_async(zone, date_cible, lambda: _synchroniser_semaine_async(zone, date_cible))
+
+
+def _synchroniser_semaine(zone, date_cible):
+    registre = SemaineScrapee.pour(zone, date_cible)
+    resultat = ExtracteurUPGC().recuperer_semaine(
+        zone, date_cible, precedent=registre.validateurs if registre else None
+    )
+    return enregistrer_resultat(zone, date_cible, registre, resultat)
+
+
+async def _synchroniser_semaine_async(zone, date_cible):
+    registre = await SemaineScrapee.objects.filter(zone=zone, debut_semaine=debut_semaine(date_cible)).afirst()
+    resultat = await ExtracteurUPGC().recuperer_semaine_async(
+        zone, date_cible, precedent=registre.validateurs if registre else None
+    )
+    return await sync_to_async(enregistrer_resultat)(zone, date_cible, registre, resultat)
+
+
+def enregistrer_resultat(zone, date_cible, registre, resultat):
+    """Réconcilie un ResultatSemaine en base et met à jour le registre ; None si échec."""
+    if resultat.erreur:
+        return None
+
+    validateurs = {
+        'etag': resultat.etag,
+        'last_modified': resultat.last_modified,
+        'empreinte': resultat.empreinte,
+    }
+    if resultat.inchange:
+        # Page identique : ni analyse, ni écriture des cours
+        SemaineScrapee.enregistrer(
+            zone, date_cible, registre.nombre_evenements, modifiee=False, validateurs=validateurs
+        )
+        return {'statut': 'inchange', 'crees': 0, 'modifies': 0, 'supprimes': 0,
+                'inchanges': registre.nombre_evenements}
+
+    with metriques.SCRAPING_PHASES.chronometrer(phase='enregistrement'):
+        evenements = valider_evenements(resultat.evenements)
+        bilan = Cours.objects.reconcilier_semaine(zone, date_cible, evenements)
+        modifiee = bool(bilan['crees'] or bilan['modifies'] or bilan['supprimes'])
+        if modifiee:
+            # Détection des doubles réservations une fois par changement, pas à chaque lecture
+            recalculer_semaine(zone, date_cible)
+        SemaineScrapee.enregistrer(
+            zone, date_cible, len(evenements), modifiee=modifiee, validateurs=validateurs,
+        )
+    for operation in ('crees', 'modifies', 'supprimes', 'inchanges'):
+        if bilan.get(operation):
+            metriques.ENREGISTREMENTS.inc(bilan[operation], operation=operation)
+    return {'statut': 'mis_a_jour', **bilan}
+
+
+def semaines_a_synchroniser(nombre_semaines, reference=None):
+    """Lundis de la semaine courante et des `nombre_semaines` suivantes."""
+    lundi = debut_semaine(reference or date.today())
+    return [lundi + timedelta(weeks=i) for i in range(nombre_semaines + 1)]
+
+
+def _executer_job(zone, lundi):
+    try:
+        return synchroniser_semaine(zone, lundi)
+    except Exception as e:
+        logger.error(f"Synchronisation zone={zone} semaine={lundi} en échec: {e}", exc_info=True)
+        return None
+    finally:
+        # Chaque thread du pool a sa propre connexion : on la libère après le job
+        connections.close_all()
+
+
+def synchroniser(zones=None, nombre_semaines=None, workers=None, reference=None):
+    """
+    Synchronise chaque couple (zone, semaine) indépendamment, avec au plus
+    `workers` jobs en parallèle. Retourne une liste de (zone, lundi, bilan).
+    """
+    zones = zones or settings.UPGC_SYNC_ZONES
+    if nombre_semaines is None:
+        nombre_semaines = settings.UPGC_SYNC_SEMAINES
+    workers = workers or settings.UPGC_SYNC_WORKERS
+
+    jobs = [(zone, lundi) for zone in zones for lundi in semaines_a_synchroniser(nombre_semaines, reference)]
+    resultats = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_executer_job, zone, lundi): (zone, lundi) for zone, lundi in jobs}
+        for future in as_completed(futures):
+            zone, lundi = futures[future]
+            resultats.append((zone, lundi, future.result()))
+    return resultats
+
+
+def planifier(intervalle=None, arret=None, **kwargs):
+    """
+    Boucle de synchronisation : relance `synchroniser` toutes les `intervalle` secondes.
+    `arret` (threading.Event) permet d'interrompre la boucle proprement.
+    """
+    intervalle = intervalle or settings.UPGC_SYNC_INTERVALLE
+    while arret is None or not arret.is_set():
+        debut = time.monotonic()
+        resultats = synchroniser(**kwargs)
+        echecs = sum(1 for _, _, bilan in resultats if bilan is None)
+        logger.info(f"Synchronisation: {len(resultats)} semaines, {echecs} échecs "
+                    f"en {time.monotonic() - debut:.1f}s")
+        attente = max(0, intervalle - (time.monotonic() - debut))
+        if arret is not None:
+            arret.wait(attente)
+        else:
+            time.sleep(attente)
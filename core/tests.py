@@ -1,3 +1,1372 @@
-from django.test import TestCase
+from contextlib import contextmanager
+from datetime import date, time, timedelta
+from io import StringIO
+from pathlib import Path
+import asyncio
+import csv
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time as horloge
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from . import calendrier as calendrier_ics, charge, coalescence, conflits, fraicheur, intervalles, metriques, rattrapage, tasks
+from .gouverneur import DebitDepasse, Gouverneur, SeauJetons, SeauJetonsBase, obtenir_gouverneur
+from .faux_grr import FauxServeurGRR, charger_page, generer_page_semaine
+from .models import (
+    ORDRE_CHRONOLOGIQUE, ChangementCours, ConflitCours, Cours, SeauJetonsPartage, SemaineScrapee, VerrouScraping, bornes_horaire,
+    debut_semaine,
+)
+from .parseurs import ParseurBeautifulSoup, ParseurLxml, decouper_planning
+from .renderers import ORJSONRenderer
+from .scraping import ExtracteurUPGC, ResultatSemaine
+from .serializers import CHAMPS_COURS_EXPORT, CHAMPS_COURS_JOUR, CHAMPS_COURS_SEMAINE
+
+
+# Les métriques des tests (et des processus qu'ils démarrent) restent dans un dossier temporaire
+metriques.isoler()
+
+
+def evenement(jour, horaire='07:30 à 11:30', ressource='Amphi B', **extra):
+    evt = {
+        'zone': 2,
+        'jour': jour,
+        'horaire': horaire,
+        'type_cours': 'CM',
+        'enseignant': 'Dr NOM Prenom',
+        'intitule': 'TITRE DU COURS',
+        'niveau': 'L1 BIO',
+        'salle': ressource,
+        'ressource': ressource,
+    }
+    evt.update(extra)
+    return evt
+
+
+def simuler_scraper(test, evenements=None, erreur=None):
+    """
+    Remplace ExtracteurUPGC dans core.tasks. `evenements(zone, date_cible)` renvoie
+    les événements scrapés ; retourne le mock de recuperer_semaine.
+    """
+    patcher = mock.patch('core.tasks.ExtracteurUPGC')
+    extracteur_cls = patcher.start()
+    test.addCleanup(patcher.stop)
+
+    def recuperer_semaine(zone, date_cible, precedent=None, session=None):
+        if test.erreur_scraping:
+            return ResultatSemaine(zone, debut_semaine(date_cible), erreur=test.erreur_scraping)
+        return ResultatSemaine(zone, debut_semaine(date_cible), test.evenements_scrapes(zone, date_cible))
+
+    test.erreur_scraping = erreur
+    test.evenements_scrapes = evenements or (lambda zone, date_cible: [])
+    extracteur_cls.return_value.recuperer_semaine.side_effect = recuperer_semaine
+    return extracteur_cls.return_value.recuperer_semaine
+
+
+class BudgetRequetesMixin:
+    """Budgets de requêtes SQL : tout dépassement fait échouer le test (et la CI)."""
+
+    @contextmanager
+    def assertMaxRequetes(self, maximum, using='default'):
+        with CaptureQueriesContext(connections[using]) as requetes:
+            yield requetes
+        if len(requetes) > maximum:
+            detail = '\n'.join(f"{i}. {q['sql']}" for i, q in enumerate(requetes.captured_queries, 1))
+            self.fail(f"{len(requetes)} requêtes SQL pour un budget de {maximum} :\n{detail}")
+
+
+class RegistreSemainesTests(TestCase):
+    """Le registre SemaineScrapee évite de re-scraper une semaine déjà couverte."""
+
+    def setUp(self):
+        self.scraper = simuler_scraper(self, lambda zone, date_cible: [
+            evenement(date(2026, 2, 16), zone=zone),
+            evenement(date(2026, 2, 17), horaire='13:00 à 15:00', zone=zone),
+        ])
+
+    def test_jour_vide_ne_rescrape_pas(self):
+        # Dimanche sans cours : la semaine est couverte après le premier appel
+        premier = self.client.get('/22/2/2026/')
+        second = self.client.get('/22/2/2026/')
+        self.assertEqual(premier.json()['source'], 'scraping')
+        self.assertEqual(second.json()['source'], 'cache')
+        self.assertEqual(second.json()['nombre_evenements'], 0)
+        self.assertEqual(self.scraper.call_count, 1)
+
+    def test_semaine_un_seul_scraping(self):
+        reponse = self.client.get('/18/2/2026/', {'semaine': 'true'})
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual(reponse.json()['nombre_total_evenements'], 2)
+        self.assertEqual(self.scraper.call_count, 1)
+        registre = SemaineScrapee.objects.get()
+        self.assertEqual(registre.debut_semaine, date(2026, 2, 16))
+        self.assertEqual(registre.nombre_evenements, 2)
+
+    def test_echec_scraping_non_enregistre(self):
+        self.erreur_scraping = 'timeout'
+        self.client.get('/16/2/2026/')
+        self.assertFalse(SemaineScrapee.objects.exists())
+        self.assertEqual(Cours.objects.count(), 0)
+
+    def test_zones_separees(self):
+        Cours.objects.create(**evenement(date(2026, 2, 16)))
+        SemaineScrapee.enregistrer(2, date(2026, 2, 16), 1)
+        self.evenements_scrapes = lambda zone, date_cible: []
+        reponse = self.client.get('/16/2/2026/', {'zone': 3})
+        self.assertEqual(reponse.json()['source'], 'scraping')
+        self.assertEqual(reponse.json()['nombre_evenements'], 0)
+        self.assertEqual(self.client.get('/16/2/2026/').json()['nombre_evenements'], 1)
+
+
+@override_settings(UPGC_FRAICHEUR_COURANTE=900, UPGC_FRAICHEUR_FUTURE=3600, UPGC_FRAICHEUR_PASSEE=0)
+class FraicheurTests(TestCase):
+    """Semaines périmées servies depuis la base et revalidées en arrière-plan."""
+
+    def setUp(self):
+        self.scraper = simuler_scraper(self, lambda zone, date_cible: [evenement(date_cible, zone=zone)])
+        patcher = mock.patch('core.views.revalider_en_arriere_plan')
+        self.revalider = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.aujourdhui = date.today()
+
+    def scrapee_il_y_a(self, jour, delai):
+        SemaineScrapee.enregistrer(2, jour, 0)
+        SemaineScrapee.objects.filter(debut_semaine=debut_semaine(jour)).update(
+            date_scraping=timezone.now() - delai
+        )
+
+    def url(self, jour):
+        return f'/{jour.day}/{jour.month}/{jour.year}/'
+
+    def test_durees_par_semaine(self):
+        lundi = debut_semaine(self.aujourdhui)
+        self.assertEqual(fraicheur.duree_fraicheur(lundi), timedelta(minutes=15))
+        self.assertEqual(fraicheur.duree_fraicheur(lundi + timedelta(weeks=1)), timedelta(hours=1))
+        self.assertIsNone(fraicheur.duree_fraicheur(lundi - timedelta(weeks=1)))
+
+    def test_semaine_fraiche(self):
+        self.scrapee_il_y_a(self.aujourdhui, timedelta(minutes=5))
+        self.assertEqual(self.client.get(self.url(self.aujourdhui)).json()['source'], 'cache')
+        self.revalider.assert_not_called()
+
+    def test_semaine_perimee_servie_et_revalidee(self):
+        Cours.objects.create(**evenement(self.aujourdhui))
+        self.scrapee_il_y_a(self.aujourdhui, timedelta(minutes=20))
+        reponse = self.client.get(self.url(self.aujourdhui)).json()
+        self.assertEqual(reponse['source'], 'stale')
+        self.assertEqual(reponse['nombre_evenements'], 1)
+        self.revalider.assert_called_once_with(2, self.aujourdhui)
+        self.scraper.assert_not_called()
+
+    def test_semaine_passee_figee(self):
+        passe = self.aujourdhui - timedelta(weeks=2)
+        self.scrapee_il_y_a(passe, timedelta(days=30))
+        self.assertEqual(self.client.get(self.url(passe)).json()['source'], 'cache')
+        self.revalider.assert_not_called()
+
+    def test_actualiser_reste_synchrone(self):
+        self.scrapee_il_y_a(self.aujourdhui, timedelta(minutes=20))
+        reponse = self.client.get(self.url(self.aujourdhui), {'actualiser': 'true'})
+        self.assertEqual(reponse.json()['source'], 'scraping')
+        self.assertEqual(self.scraper.call_count, 1)
+        self.revalider.assert_not_called()
+
+
+class RevalidationTests(TransactionTestCase):
+
+    def setUp(self):
+        self.scraper = simuler_scraper(self, self.scraper_lent)
+
+    def scraper_lent(self, zone, date_cible):
+        horloge.sleep(0.2)
+        return [evenement(date_cible, zone=zone)]
+
+    def test_une_revalidation_par_semaine(self):
+        lundi = date(2026, 2, 16)
+        thread = fraicheur.revalider_en_arriere_plan(2, lundi)
+        self.assertIsNone(fraicheur.revalider_en_arriere_plan(2, lundi + timedelta(days=2)))
+        thread.join()
+        self.assertEqual(self.scraper.call_count, 1)
+        self.assertEqual(Cours.objects.count(), 1)
+        self.assertTrue(SemaineScrapee.est_couverte(2, lundi))
+        # Revalidation terminée : la suivante est de nouveau possible
+        fraicheur.revalider_en_arriere_plan(2, lundi).join()
+        self.assertEqual(self.scraper.call_count, 2)
+
+
+class GouverneurTests(TransactionTestCase):
+    """Les téléchargements prennent leurs jetons en base depuis les threads du pool."""
+
+    def test_seau_rafale_puis_debit(self):
+        instant = [0.0]
+        seau = SeauJetons(debit=2, capacite=3, horloge=lambda: instant[0])
+        for _ in range(3):
+            self.assertEqual(seau.prendre(attente_max=0), 0.0)
+        with self.assertRaises(DebitDepasse):
+            seau.prendre(attente_max=0.1)
+        # Le refus ne consomme pas de jeton : un jeton est revenu après 0,5 s
+        instant[0] = 0.5
+        self.assertEqual(seau.prendre(attente_max=0), 0.0)
+        with mock.patch('core.gouverneur.time.sleep') as sommeil:
+            self.assertAlmostEqual(seau.prendre(), 0.5)
+        sommeil.assert_called_once_with(0.5)
+
+    def test_seau_desactive(self):
+        seau = SeauJetons(debit=0, capacite=1)
+        self.assertEqual([seau.prendre(attente_max=0) for _ in range(10)], [0.0] * 10)
+
+    def test_seau_commun_aux_processus(self):
+        # Deux seaux distincts (deux processus) sur la même ligne en base
+        instant = [1000.0]
+        premier = SeauJetonsBase(debit=2, capacite=3, horloge=lambda: instant[0])
+        second = SeauJetonsBase(debit=2, capacite=3, horloge=lambda: instant[0])
+        self.assertEqual([premier.prendre(0), second.prendre(0), premier.prendre(0)], [0.0] * 3)
+        with self.assertRaises(DebitDepasse):
+            second.prendre(attente_max=0.1)
+        instant[0] += 0.5
+        self.assertEqual(second.prendre(0), 0.0)
+        self.assertAlmostEqual(SeauJetonsPartage.objects.get(nom='upgc').jetons, 0.0)
+
+    @override_settings(UPGC_GOUVERNEUR_DEBIT=1, UPGC_GOUVERNEUR_RAFALE=2, UPGC_GOUVERNEUR_ATTENTE=0)
+    def test_rafale_globale(self):
+        # Un gouverneur par processus, un seul seau
+        premier, second = Gouverneur(1, 2), Gouverneur(1, 2)
+        premier.avant_requete()
+        premier.avant_requete()
+        with self.assertRaises(DebitDepasse):
+            second.avant_requete()
+        self.assertEqual(second.statistiques(), {'requetes_refusees': 1})
+
+    @override_settings(UPGC_GOUVERNEUR_DEBIT=1000, UPGC_GOUVERNEUR_RAFALE=100)
+    def test_telechargements_simultanes_sans_connexion_ouverte(self):
+        ouvertes = []
+
+        def noter(sender, connection, **kwargs):
+            if threading.current_thread() is not threading.main_thread():
+                ouvertes.append(connection)
+
+        connection_created.connect(noter)
+        self.addCleanup(connection_created.disconnect, noter)
+        with FauxServeurGRR(latence=0.05) as serveur:
+            resultats = list(ExtracteurUPGC(url_base=serveur.url).recuperer_par_lots(
+                zones=[2, 3], debut=date(2026, 2, 16), fin=date(2026, 3, 29), max_concurrence=8
+            ))
+        self.assertEqual([r.erreur for r in resultats], [None] * 12)
+        self.assertEqual(serveur.requetes, 12)
+        # Chaque thread du pool a pris ses jetons sur sa connexion, puis l'a fermée
+        self.assertTrue(ouvertes)
+        self.assertEqual([c for c in ouvertes if c.connection is not None], [])
+
+    @override_settings(UPGC_GOUVERNEUR_DEBIT=1, UPGC_GOUVERNEUR_RAFALE=2, UPGC_GOUVERNEUR_ATTENTE=0)
+    def test_requetes_refusees_au_dela_du_debit(self):
+        with FauxServeurGRR() as serveur:
+            resultats = list(ExtracteurUPGC(url_base=serveur.url).recuperer_par_lots(
+                zones=[2], debut=date(2026, 2, 16), fin=date(2026, 3, 15), max_concurrence=1
+            ))
+        self.assertEqual(serveur.requetes, 2)
+        self.assertEqual(sum(1 for r in resultats if r.erreur), 2)
+        stats = obtenir_gouverneur().statistiques()
+        self.assertEqual((stats['requetes'], stats['requetes_refusees']), (2, 2))
+
+    @override_settings(UPGC_ACTUALISATION_INTERVALLE=60)
+    def test_actualisation_trop_rapprochee(self):
+        scraper = simuler_scraper(self, lambda zone, date_cible: [evenement(date_cible, zone=zone)])
+        gouverneur = obtenir_gouverneur()
+        ignorees = gouverneur.statistiques().get('actualisations_ignorees', 0)
+        premiere = self.client.get('/16/2/2026/', {'actualiser': 'true'}).json()
+        seconde = self.client.get('/16/2/2026/', {'actualiser': 'true'}).json()
+        self.assertEqual((premiere['source'], seconde['source']), ('scraping', 'cache'))
+        self.assertEqual(seconde['nombre_evenements'], 1)
+        self.assertEqual(scraper.call_count, 1)
+        self.assertEqual(gouverneur.statistiques()['actualisations_ignorees'], ignorees + 1)
+        # Intervalle écoulé : l'actualisation repart vers l'UPGC
+        SemaineScrapee.objects.update(date_scraping=timezone.now() - timedelta(minutes=2))
+        self.assertEqual(self.client.get('/16/2/2026/', {'actualiser': 'true'}).json()['source'], 'scraping')
+        self.assertEqual(scraper.call_count, 2)
+
+
+class ReconciliationTests(TestCase):
+
+    def test_bilan_et_suppression_des_cours_annules(self):
+        lundi = date(2026, 2, 16)
+        Cours.objects.reconcilier_semaine(2, lundi, [
+            evenement(lundi),
+            evenement(lundi, horaire='13:00 à 15:00'),
+            evenement(date(2026, 2, 17)),
+        ])
+        bilan = Cours.objects.reconcilier_semaine(2, lundi, [
+            evenement(lundi),
+            evenement(lundi, horaire='13:00 à 15:00', intitule='AUTRE COURS'),
+            evenement(date(2026, 2, 18)),
+        ])
+        self.assertEqual(bilan, {'crees': 1, 'modifies': 1, 'supprimes': 1, 'inchanges': 1})
+        self.assertEqual(
+            sorted(Cours.objects.values_list('jour', flat=True)),
+            [lundi, lundi, date(2026, 2, 18)]
+        )
+
+    def test_nombre_de_requetes_constant(self):
+        lundi = date(2026, 2, 16)
+        evenements = [evenement(lundi, ressource=f'Salle {i}') for i in range(200)]
+        # Lecture + insertions groupées des cours et du journal (découpées selon la
+        # limite de paramètres du SGBD), au lieu d'un SELECT + INSERT par cours
+        with CaptureQueriesContext(connection) as requetes:
+            Cours.objects.reconcilier_semaine(2, lundi, evenements)
+        self.assertLessEqual(len(requetes), 10)
+
+    def test_autre_zone_intacte(self):
+        lundi = date(2026, 2, 16)
+        Cours.objects.create(**evenement(lundi, zone=3))
+        Cours.objects.reconcilier_semaine(2, lundi, [])
+        self.assertEqual(Cours.objects.filter(zone=3).count(), 1)
+
+
+class SynchronisationTests(TransactionTestCase):
+
+    def setUp(self):
+        simuler_scraper(self, lambda zone, date_cible: [evenement(date_cible, zone=zone)])
+
+    def test_semaines_et_zones_en_parallele(self):
+        resultats = tasks.synchroniser(zones=[2, 3], nombre_semaines=2, workers=3,
+                                       reference=date(2026, 2, 18))
+        self.assertEqual(len(resultats), 6)
+        self.assertEqual(SemaineScrapee.objects.count(), 6)
+        self.assertEqual(Cours.objects.filter(zone=3).count(), 3)
+        self.assertEqual(
+            sorted(set(SemaineScrapee.objects.values_list('debut_semaine', flat=True))),
+            [date(2026, 2, 16), date(2026, 2, 23), date(2026, 3, 2)]
+        )
+
+    def test_commande(self):
+        sortie = StringIO()
+        call_command('synchroniser', zones='2', semaines=0, stdout=sortie)
+        self.assertIn('1 créés', sortie.getvalue())
+
+
+class VolUniqueTests(TransactionTestCase):
+
+    def setUp(self):
+        self.lundi = date(2026, 2, 16)
+        self.recuperer = simuler_scraper(self, self.scraper_lent)
+
+    def scraper_lent(self, zone, date_cible):
+        horloge.sleep(0.3)
+        return [evenement(date_cible, zone=zone)]
+
+    def test_requetes_simultanees_regroupees(self):
+        resultats = []
+
+        def appeler():
+            try:
+                resultats.append(tasks.synchroniser_semaine(2, self.lundi + timedelta(days=len(resultats) % 5)))
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=appeler) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(self.recuperer.call_count, 1)
+        self.assertEqual(len(resultats), 6)
+        self.assertTrue(all(r == resultats[0] and r['crees'] == 1 for r in resultats))
+        self.assertFalse(VerrouScraping.objects.exists())
+
+    def test_autre_processus(self):
+        VerrouScraping.objects.create(zone=2, debut_semaine=self.lundi, proprietaire='autre',
+                                      expire_le=timezone.now() + timedelta(minutes=1))
+
+        def autre_processus():
+            horloge.sleep(0.3)
+            SemaineScrapee.enregistrer(2, self.lundi, 1)
+            VerrouScraping.liberer(2, self.lundi, 'autre')
+            connections.close_all()
+
+        threading.Thread(target=autre_processus).start()
+        self.assertEqual(tasks.synchroniser_semaine(2, self.lundi), coalescence.PARTAGE)
+        self.assertEqual(self.recuperer.call_count, 0)
+
+    @override_settings(UPGC_SCRAPING_ATTENTE=0.3)
+    def test_attente_expiree_et_verrou_expire(self):
+        verrou = VerrouScraping.objects.create(zone=2, debut_semaine=self.lundi, proprietaire='autre',
+                                               expire_le=timezone.now() + timedelta(minutes=1))
+        self.assertIsNone(tasks.synchroniser_semaine(2, self.lundi))
+        self.assertEqual(self.recuperer.call_count, 0)
+        # Processus arrêté sans libérer son verrou : repris après expiration
+        verrou.expire_le = timezone.now() - timedelta(seconds=1)
+        verrou.save()
+        self.assertEqual(tasks.synchroniser_semaine(2, self.lundi)['crees'], 1)
+        self.assertFalse(VerrouScraping.objects.exists())
+
+
+@override_settings(UPGC_GOUVERNEUR_DEBIT=0)  # pas de seau en base hors TestCase
+class RecuperationParLotsTests(SimpleTestCase):
+    """Scraping groupé contre un faux site GRR local."""
+
+    def test_page_enregistree(self):
+        page = charger_page('week_all_zone2_2026-02-16.html')
+        with FauxServeurGRR(pages={(2, date(2026, 2, 16)): page}, generer=False) as serveur:
+            extracteur = ExtracteurUPGC(url_base=serveur.url)
+            evenements = extracteur.recuperer_emploi_du_temps(zone=2, date_cible=date(2026, 2, 18))
+        self.assertIsNone(extracteur.derniere_erreur)
+        self.assertEqual(len(evenements), 10)
+        self.assertEqual(evenements[0], {
+            'zone': 2,
+            'jour': date(2026, 2, 16),
+            'horaire': '07:30 à 11:30',
+            'type_cours': 'CM',
+            'enseignant': 'Dr KONE Adama / Dr TRAORE Bakary',
+            'intitule': 'BIOLOGIE CELLULAIRE',
+            'niveau': 'L1 BIO',
+            'salle': 'AMPHI B',
+            'ressource': 'AMPHI B (300 places)',
+        })
+
+    def test_cibles_dedoublonnees_par_semaine(self):
+        cibles = [(2, date(2026, 2, 16)), (2, date(2026, 2, 19)), (3, date(2026, 2, 22)), (2, date(2026, 2, 23))]
+        with FauxServeurGRR() as serveur:
+            resultats = list(ExtracteurUPGC(url_base=serveur.url).recuperer_par_lots(cibles))
+        self.assertEqual(serveur.requetes, 3)
+        self.assertEqual(
+            sorted((r.zone, r.debut_semaine) for r in resultats),
+            [(2, date(2026, 2, 16)), (2, date(2026, 2, 23)), (3, date(2026, 2, 16))]
+        )
+        for r in resultats:
+            self.assertIsNone(r.erreur)
+            self.assertTrue(r.evenements)
+            fin = r.debut_semaine + timedelta(days=6)
+            self.assertTrue(all(r.debut_semaine <= e['jour'] <= fin for e in r.evenements))
+
+    def test_plage_et_concurrence_plafonnee(self):
+        with FauxServeurGRR(latence=0.05) as serveur:
+            resultats = list(ExtracteurUPGC(url_base=serveur.url).recuperer_par_lots(
+                zones=[2], debut=date(2026, 2, 16), fin=date(2026, 3, 29), max_concurrence=2
+            ))
+        self.assertEqual(len(resultats), 6)
+        self.assertEqual(serveur.requetes, 6)
+        self.assertLessEqual(serveur.max_simultanees, 2)
+
+    def test_erreur_par_semaine(self):
+        with FauxServeurGRR(generer=False) as serveur:
+            resultats = list(ExtracteurUPGC(url_base=serveur.url).recuperer_par_lots([(2, date(2026, 2, 16))]))
+        self.assertEqual(len(resultats), 1)
+        self.assertIn('404', resultats[0].erreur)
+        self.assertEqual(resultats[0].evenements, [])
+
+
+class ScrapingConditionnelTests(TestCase):
+    """Une page inchangée n'est ni analysée ni réécrite en base."""
+
+    def synchroniser(self, serveur):
+        with override_settings(UPGC_URL_BASE=serveur.url):
+            return tasks.synchroniser_semaine(2, date(2026, 2, 16))
+
+    def test_empreinte_identique(self):
+        with FauxServeurGRR() as serveur:
+            self.assertEqual(self.synchroniser(serveur)['statut'], 'mis_a_jour')
+            nombre = SemaineScrapee.objects.get().nombre_evenements
+            with mock.patch.object(ExtracteurUPGC, 'extraire_evenements') as extraire, \
+                    mock.patch.object(Cours.objects, 'reconcilier_semaine') as reconcilier:
+                bilan = self.synchroniser(serveur)
+        self.assertEqual(bilan['statut'], 'inchange')
+        extraire.assert_not_called()
+        reconcilier.assert_not_called()
+        registre = SemaineScrapee.objects.get()
+        self.assertEqual(registre.nombre_evenements, nombre)
+        self.assertEqual(len(registre.empreinte), 64)
+
+    def test_etag_et_304(self):
+        with FauxServeurGRR(etags=True) as serveur:
+            self.synchroniser(serveur)
+            bilan = self.synchroniser(serveur)
+        self.assertEqual(bilan['statut'], 'inchange')
+        self.assertEqual(serveur.reponses_304, 1)
+        self.assertTrue(SemaineScrapee.objects.get().etag)
+
+    def test_page_modifiee(self):
+        with FauxServeurGRR() as serveur:
+            self.synchroniser(serveur)
+            serveur.options_generation['graine'] = 1
+            bilan = self.synchroniser(serveur)
+        self.assertEqual(bilan['statut'], 'mis_a_jour')
+
+
+class EquivalenceParseursTests(SimpleTestCase):
+    """Le parseur lxml doit produire exactement les événements du parseur de référence."""
+
+    def assertEquivalents(self, contenu, zone=2):
+        reference = ExtracteurUPGC(parseur=ParseurBeautifulSoup.nom).extraire_evenements(contenu, zone)
+        rapide = ExtracteurUPGC(parseur=ParseurLxml.nom).extraire_evenements(contenu, zone)
+        self.assertTrue(reference)
+        self.assertEqual(rapide, reference)
+
+    def test_page_enregistree(self):
+        self.assertEquivalents(charger_page('week_all_zone2_2026-02-16.html'))
+
+    def test_page_enregistree_latin1_avec_commentaires(self):
+        page = charger_page('week_all_zone2_2026-02-16.html').decode('utf-8')
+        page = page.replace('charset="utf-8"', 'charset="iso-8859-1"')
+        page = page.replace('Dr YAO Konan', 'Dr YAO <!-- note --> Konan Éric')
+        self.assertEquivalents(page.encode('latin-1'))
+
+    def test_pages_synthetiques(self):
+        for graine in range(5):
+            with self.subTest(graine=graine):
+                self.assertEquivalents(generer_page_semaine(
+                    date(2026, 2, 16), zone=3, nombre_ressources=30, cours_par_cellule=3, graine=graine
+                ))
+
+    def test_decoupage_du_tableau(self):
+        fragment = decouper_planning(charger_page('week_all_zone2_2026-02-16.html'))
+        self.assertTrue(fragment.startswith(b'<table class="semaine'))
+        self.assertTrue(fragment.endswith(b'</table>'))
+        self.assertNotIn(b'footer', fragment)
+
+    def test_tableau_absent(self):
+        for nom in (ParseurBeautifulSoup.nom, ParseurLxml.nom):
+            with self.subTest(parseur=nom), self.assertRaises(ValueError):
+                ExtracteurUPGC(parseur=nom).extraire_evenements(b'<html><body>Maintenance</body></html>', 2)
+
+
+class BenchmarkParseurTests(SimpleTestCase):
+
+    def test_resultats_enregistres(self):
+        with tempfile.TemporaryDirectory() as dossier:
+            sortie = Path(dossier) / 'parseur.jsonl'
+            call_command('benchmark_parseur', scenarios='fixture-week_all_zone2_2026-02-16',
+                         repetitions=1, sortie=str(sortie), stdout=StringIO())
+            run = json.loads(sortie.read_text(encoding='utf-8'))
+        mesures = {(r['mesure'], r['parseur']) for r in run['resultats']}
+        self.assertEqual(mesures, {('tableau', 'html.parser'), ('tableau', 'lxml'), ('cellules', 'html.parser')})
+        for r in run['resultats']:
+            self.assertGreater(r['cellules_par_s'], 0)
+            self.assertEqual(r['cellules'], 23)
+
+
+class SerialisationTests(TestCase):
+
+    def setUp(self):
+        self.lundi = date(2026, 2, 16)
+        Cours.objects.reconcilier_semaine(2, self.lundi, [
+            evenement(self.lundi, horaire='13:00 à 15:00', intitule='CHIMIE GÉNÉRALE'),
+            evenement(self.lundi),
+            evenement(date(2026, 2, 17), ressource='Salle 12'),
+        ])
+        SemaineScrapee.enregistrer(2, self.lundi, 3)
+
+    def test_reponse_jour(self):
+        with self.assertNumQueries(4):  # registre, agrégat et dernière suppression (validateurs), cours
+            reponse = self.client.get('/16/2/2026/')
+        self.assertEqual(reponse['Content-Type'], 'application/json')
+        corps = reponse.json()
+        self.assertEqual(corps['nombre_evenements'], 2)
+        self.assertTrue(corps['timestamp'].endswith('Z'))
+        self.assertEqual(list(corps['donnees'][0]), list(CHAMPS_COURS_JOUR))
+        self.assertEqual([c['horaire'] for c in corps['donnees']], ['07:30 à 11:30', '13:00 à 15:00'])
+        self.assertEqual(corps['donnees'][0]['jour'], '2026-02-16')
+        self.assertIn('CHIMIE GÉNÉRALE'.encode(), reponse.content)
+
+    def test_reponse_semaine(self):
+        corps = self.client.get('/16/2/2026/', {'semaine': 'true'}).json()
+        self.assertEqual(corps['nombre_total_evenements'], 3)
+        self.assertEqual([j['nombre_evenements'] for j in corps['jours']], [2, 1, 0, 0, 0, 0, 0])
+        cours = corps['jours'][1]['evenements'][0]
+        self.assertEqual(list(cours), list(CHAMPS_COURS_SEMAINE))
+        self.assertTrue(cours['date_maj'].endswith('Z'))
+
+    def test_meme_json_que_le_renderer_drf(self):
+        donnees = {'jour': date(2026, 2, 16), 'maj': timezone.now(), 'texte': 'Amphi é'}
+        self.assertEqual(json.loads(ORJSONRenderer().render(donnees)), json.loads(JSONRenderer().render(donnees)))
+
+    def test_validation_a_l_import(self):
+        invalide = evenement(self.lundi, horaire='x' * 80)
+        valides = tasks.valider_evenements([evenement(self.lundi), invalide])
+        self.assertEqual(len(valides), 1)
+
+    def test_benchmark(self):
+        with tempfile.TemporaryDirectory() as dossier:
+            sortie = Path(dossier) / 'serialisation.jsonl'
+            call_command('benchmark_serialisation', evenements=30, repetitions=1,
+                         sortie=str(sortie), stdout=StringIO())
+            run = json.loads(sortie.read_text(encoding='utf-8'))
+        self.assertEqual({r['chemin'] for r in run['resultats']}, {'drf', 'values+orjson'})
+        self.assertEqual(Cours.objects.filter(zone=999).count(), 0)
+
+
+class ExportTests(TestCase):
+
+    def setUp(self):
+        lundi = date(2026, 2, 16)
+        for semaine in range(3):
+            jour = lundi + timedelta(weeks=semaine)
+            Cours.objects.reconcilier_semaine(2, jour, [evenement(jour), evenement(jour + timedelta(days=1))])
+        Cours.objects.reconcilier_semaine(3, lundi, [evenement(lundi, zone=3)])
+
+    def lire(self, reponse):
+        self.assertTrue(reponse.streaming)
+        return b''.join(reponse.streaming_content).decode('utf-8')
+
+    def test_ndjson(self):
+        reponse = self.client.get('/export/', {'debut': '2026-02-16', 'fin': '2026-03-03', 'zone': 2})
+        self.assertEqual(reponse['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        lignes = [json.loads(l) for l in self.lire(reponse).splitlines()]
+        self.assertEqual([l['jour'] for l in lignes],
+                         ['2026-02-16', '2026-02-17', '2026-02-23', '2026-02-24', '2026-03-02', '2026-03-03'])
+        self.assertEqual(list(lignes[0]), list(CHAMPS_COURS_EXPORT))
+
+    def test_csv_toutes_zones(self):
+        reponse = self.client.get('/export/', {'debut': '16/02/2026', 'fin': '17/02/2026', 'type': 'csv'},
+                                  HTTP_ACCEPT='text/csv')
+        self.assertEqual(reponse.status_code, 200)
+        self.assertIn('attachment;', reponse['Content-Disposition'])
+        lignes = list(csv.reader(StringIO(self.lire(reponse))))
+        self.assertEqual(lignes[0], list(CHAMPS_COURS_EXPORT))
+        jour = CHAMPS_COURS_EXPORT.index('jour')
+        self.assertEqual([(l[0], l[jour]) for l in lignes[1:]],
+                         [('2', '2026-02-16'), ('2', '2026-02-17'), ('3', '2026-02-16')])
+
+    def test_parametres_invalides(self):
+        for params in ({'debut': '2026-02-16'}, {'debut': '2026-03-01', 'fin': '2026-02-01'},
+                       {'debut': '2026-02-16', 'fin': '2026-02-17', 'type': 'xml'}):
+            with self.subTest(params=params):
+                reponse = self.client.get('/export/', params)
+                self.assertEqual(reponse.status_code, 400)
+                # Même format d'erreur que les autres vues
+                self.assertEqual(set(reponse.json()), set(self.client.get('/16/2/2026/', {'zone': 'x'}).json()))
+
+
+class FiltresTests(TestCase):
+
+    def setUp(self):
+        self.lundi = date(2026, 2, 16)
+        Cours.objects.reconcilier_semaine(2, self.lundi, [
+            evenement(self.lundi, niveau='L1 BIO', enseignant='Dr KONÉ Adama / Mme SORO Fatou'),
+            evenement(self.lundi, ressource='Salle 12', salle='SALLE 12', niveau='L2 MIAGE', type_cours='TD'),
+            evenement(date(2026, 2, 18), niveau='L1  bio', enseignant='Dr KONE Adama'),
+            evenement(date(2026, 2, 18), horaire='13:00 à 15:00', niveau='M1 DROIT'),
+        ])
+        SemaineScrapee.enregistrer(2, self.lundi, 4)
+
+    def test_colonnes_normalisees(self):
+        cours = Cours.objects.get(jour=self.lundi, ressource='Amphi B')
+        self.assertEqual(cours.niveau_norm, 'l1 bio')
+        self.assertEqual(cours.enseignant_norm, '|dr kone adama|mme soro fatou|')
+        cours.niveau = 'L3  Génétique'
+        cours.save(update_fields=['niveau'])
+        cours.refresh_from_db()
+        self.assertEqual(cours.niveau_norm, 'l3 genetique')
+
+    def test_filtres_semaine(self):
+        corps = self.client.get('/16/2/2026/', {'semaine': 'true', 'niveau': 'l1 BIO'}).json()
+        self.assertEqual(corps['nombre_total_evenements'], 2)
+        corps = self.client.get('/16/2/2026/', {'semaine': 'true', 'niveau': ['L1 BIO', 'M1 DROIT']}).json()
+        self.assertEqual(corps['nombre_total_evenements'], 3)
+        corps = self.client.get('/16/2/2026/', {'semaine': 'true', 'niveau': 'L1 BIO', 'enseignant': 'mme soro fatou'}).json()
+        self.assertEqual(corps['nombre_total_evenements'], 1)
+
+    def test_filtres_jour_et_export(self):
+        corps = self.client.get('/16/2/2026/', {'salle': 'salle 12', 'type_cours': 'td'}).json()
+        self.assertEqual([c['ressource'] for c in corps['donnees']], ['Salle 12'])
+        reponse = self.client.get('/export/', {'debut': '2026-02-16', 'fin': '2026-02-22', 'enseignant': 'DR KONE ADAMA'})
+        self.assertEqual(len(b''.join(reponse.streaming_content).splitlines()), 2)
+
+    def test_etag_depend_des_filtres(self):
+        tout = self.client.get('/16/2/2026/')['ETag']
+        self.assertNotEqual(self.client.get('/16/2/2026/', {'niveau': 'L1 BIO'})['ETag'], tout)
+
+    def test_index_utilise(self):
+        requete = Cours.objects.filter(zone=2, jour__range=(self.lundi, date(2026, 2, 22))).filtrer({'niveau': ['L1 BIO']})
+        self.assertIn('cours_niveau_debut_idx', requete.explain())
+
+    def test_index_enseignant_et_type(self):
+        # Pas d'index propre (LIKE '%|nom|%', type peu sélectif) : la plage zone/jours reste l'entrée du plan
+        requete = Cours.objects.filter(zone=2, jour__range=(self.lundi, date(2026, 2, 22))).filtrer(
+            {'enseignant': ['Dr KONE Adama'], 'type_cours': ['CM']}
+        )
+        self.assertIn('cours_zone_jour_debut_idx (zone=? AND jour>? AND jour<?)', requete.explain())
+
+
+class HorairesTests(TestCase):
+
+    def setUp(self):
+        self.lundi = date(2026, 2, 16)
+        Cours.objects.reconcilier_semaine(2, self.lundi, [
+            evenement(self.lundi, horaire='10:00 à 12:00'),
+            evenement(self.lundi, horaire='8:00 à 10:00'),
+            evenement(self.lundi, horaire='13:00 à 15:00', niveau='L2 BIO'),
+            evenement(self.lundi, horaire='7:30 à 11:30', ressource='Salle 12'),
+        ])
+        SemaineScrapee.enregistrer(2, self.lundi, 4)
+
+    def test_bornes_horaire(self):
+        self.assertEqual(bornes_horaire('07:30 à 11:30'), (time(7, 30), time(11, 30)))
+        self.assertEqual(bornes_horaire('8:00 à 10:00'), (time(8), time(10)))
+        self.assertEqual(bornes_horaire('Toute la journée'), (None, None))
+        self.assertEqual(bornes_horaire('25:00 à 26:00'), (None, None))
+
+    def test_ordre_chronologique(self):
+        attendu = ['7:30 à 11:30', '8:00 à 10:00', '10:00 à 12:00', '13:00 à 15:00']
+        corps = self.client.get('/16/2/2026/').json()
+        self.assertEqual([c['horaire'] for c in corps['donnees']], attendu)
+        self.assertEqual(corps['donnees'][1]['heure_debut'], '08:00:00')
+        self.assertEqual([c.horaire for c in Cours.objects.all()], attendu)
+
+    def test_maintenant(self):
+        corps = self.client.get('/maintenant/', {'date': '2026-02-16', 'heure': '09:45', 'dans': 20}).json()
+        self.assertEqual([c['horaire'] for c in corps['en_cours']], ['7:30 à 11:30', '8:00 à 10:00'])
+        self.assertEqual([c['horaire'] for c in corps['a_venir']], ['10:00 à 12:00'])
+        corps = self.client.get('/maintenant/', {'date': '2026-02-16', 'heure': '11:45', 'dans': 90,
+                                                 'niveau': 'L2 BIO'}).json()
+        self.assertEqual((corps['en_cours'], [c['horaire'] for c in corps['a_venir']]), ([], ['13:00 à 15:00']))
+
+    def test_maintenant_parametres_invalides(self):
+        for params in ({'heure': '9h'}, {'dans': '-5'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get('/maintenant/', params).status_code, 400)
+
+    def test_index_utilise(self):
+        requete = Cours.objects.filter(zone=2, jour=self.lundi, heure_debut__lte=time(10), heure_fin__gt=time(9))
+        self.assertIn('cours_zone_jour_debut_idx', requete.order_by(*ORDRE_CHRONOLOGIQUE).explain())
+
+
+class IntervallesTests(SimpleTestCase):
+
+    def test_fusion_et_complement(self):
+        occupes = intervalles.fusionner([(600, 720), (480, 600), (540, 560), (800, 900)])
+        self.assertEqual(occupes, [(480, 720), (800, 900)])
+        self.assertEqual(intervalles.complement(occupes, 420, 1200), [(420, 480), (720, 800), (900, 1200)])
+        self.assertEqual(intervalles.complement(occupes, 500, 700), [])
+
+    def test_disponibilites(self):
+        libres = intervalles.disponibilites(
+            [('a', 480, 600), ('a', 630, 700), ('b', 420, 1200)], ['a', 'b', 'c'], 420, 720, duree_min=45
+        )
+        self.assertEqual(libres, {'a': [(420, 480)], 'c': [(420, 720)]})
+
+
+class SallesLibresTests(BudgetRequetesMixin, TestCase):
+
+    def setUp(self):
+        lundi = date(2026, 2, 16)
+        mardi = date(2026, 2, 17)
+        Cours.objects.reconcilier_semaine(2, lundi, [
+            evenement(mardi, horaire='08:00 à 10:00', ressource='Amphi B'),
+            evenement(mardi, horaire='11:00 à 13:00', ressource='Amphi B'),
+            evenement(mardi, horaire='07:30 à 11:30', ressource='Salle 12'),
+            evenement(mardi, horaire='Journée', ressource='Salle 14'),
+            evenement(lundi, horaire='10:00 à 12:00', ressource='Salle 20'),
+        ])
+        SemaineScrapee.enregistrer(2, lundi, 5)
+
+    def test_jour(self):
+        corps = self.client.get('/salles-libres/', {'date': '2026-02-17', 'debut': '10:00', 'fin': '12:00'}).json()
+        jour = corps['jours'][0]
+        self.assertEqual(jour['salles_libres'], ['Salle 20'])
+        self.assertEqual(jour['disponibilites'], [
+            {'ressource': 'Amphi B', 'libre': [{'debut': '10:00', 'fin': '11:00'}]},
+            {'ressource': 'Salle 12', 'libre': [{'debut': '11:30', 'fin': '12:00'}]},
+            {'ressource': 'Salle 20', 'libre': [{'debut': '10:00', 'fin': '12:00'}]},
+        ])
+        corps = self.client.get('/salles-libres/', {'date': '2026-02-17', 'debut': '10:00', 'fin': '12:00',
+                                                    'duree': 60, 'ressource': 'amphi b'}).json()
+        self.assertEqual(corps['jours'][0]['disponibilites'][0]['ressource'], 'Amphi B')
+
+    def test_semaine(self):
+        with self.assertNumQueries(3):  # registre, salles de la zone, cours de la semaine
+            corps = self.client.get('/salles-libres/', {'date': '2026-02-17', 'semaine': 'true',
+                                                        'debut': '10:00', 'fin': '12:00'}).json()
+        self.assertEqual(len(corps['jours']), 7)
+        self.assertEqual(corps['jours'][0]['salles_libres'], ['Amphi B', 'Salle 12', 'Salle 14'])
+        self.assertEqual(len(corps['jours'][2]['salles_libres']), 4)
+
+    def test_historique_borne(self):
+        # Vingt semaines d'historique, dont une salle disparue depuis un an
+        Cours.objects.bulk_create(
+            Cours(**evenement(date(2026, 2, 16) - timedelta(weeks=i), horaire='08:00 à 10:00',
+                              ressource=f'Salle {100 + i}'))
+            for i in range(1, 21)
+        )
+        Cours.objects.create(**evenement(date(2025, 2, 17), horaire='08:00 à 10:00', ressource='Salle ancienne'))
+        with self.assertMaxRequetes(3) as requetes:
+            corps = self.client.get('/salles-libres/', {'date': '2026-02-17', 'debut': '10:00', 'fin': '12:00'}).json()
+        salles = corps['jours'][0]['salles_libres']
+        # Fenêtre de dix semaines avant le mardi 17 : jusqu'au lundi 15 décembre
+        self.assertIn('Salle 109', salles)
+        self.assertNotIn('Salle 110', salles)
+        self.assertNotIn('Salle ancienne', salles)
+        # La liste des salles est bornée par la date, comme la lecture des cours
+        self.assertTrue(all('"jour" BETWEEN' in q['sql'] for q in requetes.captured_queries if 'core_cours' in q['sql']))
+
+    def test_fenetre_invalide(self):
+        self.assertEqual(self.client.get('/salles-libres/', {'debut': '12:00', 'fin': '10:00'}).status_code, 400)
+
+
+class ConflitsTests(TestCase):
+
+    def setUp(self):
+        self.lundi = date(2026, 2, 16)
+        self.evenements = [
+            # Salle : deux cours qui se chevauchent dans l'Amphi B
+            evenement(self.lundi, horaire='08:00 à 10:00', ressource='Amphi B', intitule='CHIMIE', niveau='L1 BIO',
+                      enseignant='Dr KONE Adama / Dr SORO Fatou'),
+            evenement(self.lundi, horaire='09:00 à 11:00', ressource='Amphi B', intitule='GENETIQUE', niveau='L3 BIO',
+                      enseignant='M. X'),
+            # Enseignant : Dr SORO est aussi en Salle 12, niveau différent
+            evenement(self.lundi, horaire='09:30 à 10:30', ressource='Salle 12', intitule='ANGLAIS', niveau='L2 ECO',
+                      enseignant='dr soro fatou'),
+            # Même cours réparti sur deux salles : pas un conflit d'enseignant ni de niveau
+            evenement(self.lundi, horaire='13:00 à 15:00', ressource='Salle 20', intitule='DROIT', niveau='M1 DROIT',
+                      enseignant='Dr YAO'),
+            evenement(self.lundi, horaire='13:00 à 15:00', ressource='Salle 21', intitule='DROIT', niveau='M1 DROIT',
+                      enseignant='Dr YAO'),
+            # Créneaux contigus : pas de conflit
+            evenement(self.lundi, horaire='10:00 à 12:00', ressource='Salle 30', enseignant='Dr KONE Adama',
+                      niveau='L1 BIO', intitule='PHYSIQUE'),
+            # Enseignant non renseigné : ignoré
+            evenement(date(2026, 2, 17), horaire='08:00 à 10:00', ressource='Salle 40', enseignant='Non spécifié'),
+            evenement(date(2026, 2, 17), horaire='08:00 à 10:00', ressource='Salle 41', enseignant='Non spécifié',
+                      intitule='AUTRE', niveau='L2 BIO'),
+        ]
+        simuler_scraper(self, lambda zone, date_cible: self.evenements)
+
+    def test_chevauchements(self):
+        paires = conflits.chevauchements([(1, 5, 'a'), (2, 3, 'b'), (3, 6, 'c'), (6, 7, 'd')])
+        self.assertEqual(sorted(paires), [('a', 'b', 2, 3), ('a', 'c', 3, 5)])
+
+    def test_recalcule_apres_synchronisation(self):
+        tasks.synchroniser_semaine(2, self.lundi)
+        trouves = sorted((c.type_conflit, c.cle, str(c.debut), str(c.fin)) for c in ConflitCours.objects.all())
+        self.assertEqual(trouves, [
+            ('enseignant', 'dr soro fatou', '09:30:00', '10:00:00'),
+            ('salle', 'amphi b', '09:00:00', '10:00:00'),
+        ])
+        # Page inchangée côté cours : pas de recalcul ; cours supprimé : conflit supprimé
+        self.evenements = self.evenements[:2]
+        tasks.synchroniser_semaine(2, self.lundi)
+        self.assertEqual(list(ConflitCours.objects.values_list('type_conflit', flat=True)), ['salle'])
+
+    def test_api_et_commande(self):
+        tasks.synchroniser_semaine(2, self.lundi)
+        corps = self.client.get('/conflits/', {'date': '2026-02-18', 'type': 'salle'}).json()
+        self.assertEqual(corps['nombre_conflits'], 1)
+        conflit = corps['conflits'][0]
+        self.assertEqual((conflit['cours_a']['intitule'], conflit['cours_b']['intitule']), ('CHIMIE', 'GENETIQUE'))
+        self.assertEqual(self.client.get('/conflits/', {'type': 'autre'}).status_code, 400)
+
+        ConflitCours.objects.all().delete()
+        sortie = StringIO()
+        call_command('conflits', zones='2', debut='2026-02-16', fin='2026-02-22', stdout=sortie)
+        self.assertIn('2 conflit(s)', sortie.getvalue())
+        self.assertEqual(ConflitCours.objects.count(), 2)
+
+
+class CalendrierICSTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.lundi = debut_semaine(date.today())
+        self.suivant = self.lundi + timedelta(weeks=1)
+        Cours.objects.reconcilier_semaine(2, self.lundi, [
+            evenement(self.lundi, horaire='08:00 à 10:00', intitule='CHIMIE, ORGANIQUE; TD'),
+            evenement(self.lundi, horaire='08:00 à 10:00', ressource='Salle 12', niveau='L2 BIO'),
+        ])
+        Cours.objects.reconcilier_semaine(2, self.suivant, [evenement(self.suivant, horaire='Journée')])
+
+    def test_flux(self):
+        reponse = self.client.get('/ics/', {'niveau': 'l1 bio'}, HTTP_ACCEPT='text/calendar')
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual(reponse['Content-Type'], 'text/calendar; charset=utf-8')
+        corps = reponse.content.decode('utf-8')
+        self.assertTrue(corps.startswith('BEGIN:VCALENDAR\r\n') and corps.endswith('END:VCALENDAR\r\n'))
+        self.assertEqual(corps.count('BEGIN:VEVENT'), 2)
+        self.assertIn(f"DTSTART:{self.lundi:%Y%m%d}T080000Z", corps)
+        self.assertIn(f"DTSTART;VALUE=DATE:{self.suivant:%Y%m%d}", corps)
+        self.assertIn('SUMMARY:CM CHIMIE\\, ORGANIQUE\\; TD', corps)
+        self.assertTrue(all(len(ligne.encode()) <= 75 for ligne in corps.split('\r\n')))
+
+    def test_pliage(self):
+        ligne = 'DESCRIPTION:' + 'é' * 80
+        pliee = calendrier_ics.plier(ligne)
+        self.assertEqual(pliee.replace('\r\n ', ''), ligne)
+        self.assertTrue(all(len(morceau.encode()) <= 75 for morceau in pliee.split('\r\n')))
+
+    def test_etag_et_regeneration_par_semaine(self):
+        premiere = self.client.get('/ics/', {'niveau': 'L1 BIO'})
+        with self.assertNumQueries(1):
+            seconde = self.client.get('/ics/', {'niveau': 'L1 BIO'}, HTTP_IF_NONE_MATCH=premiere['ETag'])
+        self.assertEqual(seconde.status_code, 304)
+
+        Cours.objects.reconcilier_semaine(2, self.suivant, [evenement(self.suivant, horaire='10:00 à 12:00')])
+        with mock.patch('core.calendrier.evenement_ics', wraps=calendrier_ics.evenement_ics) as generation:
+            troisieme = self.client.get('/ics/', {'niveau': 'L1 BIO'}, HTTP_IF_NONE_MATCH=premiere['ETag'])
+        self.assertEqual(troisieme.status_code, 200)
+        self.assertNotEqual(troisieme['ETag'], premiere['ETag'])
+        # Seule la semaine modifiée est régénérée
+        self.assertEqual([appel.args[0]['jour'] for appel in generation.call_args_list], [self.suivant])
+        self.assertIn(f"DTSTART:{self.suivant:%Y%m%d}T100000Z", troisieme.content.decode())
+
+    def test_filtre_obligatoire(self):
+        self.assertEqual(self.client.get('/ics/').status_code, 400)
+
+
+class JournalChangementsTests(TestCase):
+
+    def setUp(self):
+        self.lundi = date(2026, 2, 16)
+        Cours.objects.reconcilier_semaine(2, self.lundi, [
+            evenement(self.lundi), evenement(self.lundi, ressource='Salle 12'),
+        ])
+
+    def changements(self, **params):
+        return self.client.get('/changements/', params).json()
+
+    def test_reconciliation_journalisee(self):
+        version = self.changements()['version']
+        Cours.objects.reconcilier_semaine(2, self.lundi, [
+            evenement(self.lundi, intitule='NOUVEAU TITRE'),
+            evenement(date(2026, 2, 17)),
+        ])
+        corps = self.changements(depuis=version)
+        self.assertEqual(
+            sorted((c['operation'], c['jour'], c['ressource']) for c in corps['changements']),
+            [('creation', '2026-02-17', 'Amphi B'), ('modification', '2026-02-16', 'Amphi B'),
+             ('suppression', '2026-02-16', 'Salle 12')]
+        )
+        modification = next(c for c in corps['changements'] if c['operation'] == 'modification')
+        self.assertEqual(modification['donnees']['intitule'], 'NOUVEAU TITRE')
+        self.assertEqual(modification['donnees']['heure_debut'], '07:30:00')
+        self.assertIsNone(next(c for c in corps['changements'] if c['operation'] == 'suppression')['donnees'])
+        # Rien de nouveau : page vide, même version
+        self.assertEqual(self.changements(depuis=corps['version'])['changements'], [])
+
+    def test_editions_unitaires(self):
+        version = self.changements()['version']
+        cours = Cours.objects.get(ressource='Salle 12')
+        cours.intitule = 'CORRIGÉ'
+        cours.save()
+        cours.horaire = '13:00 à 15:00'
+        cours.save()
+        cours.delete()
+        corps = self.changements(depuis=version)
+        self.assertEqual(
+            [(c['operation'], c['horaire']) for c in corps['changements']],
+            [('modification', '07:30 à 11:30'), ('suppression', '07:30 à 11:30'),
+             ('creation', '13:00 à 15:00'), ('suppression', '13:00 à 15:00')]
+        )
+
+    def test_pagination(self):
+        Cours.objects.reconcilier_semaine(3, self.lundi, [evenement(self.lundi, zone=3)])
+        premiere = self.changements(limite=1, zone=2)
+        self.assertTrue(premiere['suite'])
+        seconde = self.changements(depuis=premiere['version'], limite=1, zone=2)
+        self.assertFalse(seconde['suite'])
+        self.assertGreater(seconde['version'], premiere['version'])
+        self.assertEqual({c['zone'] for c in premiere['changements'] + seconde['changements']}, {2})
+        self.assertEqual(self.client.get('/changements/', {'depuis': -1}).status_code, 400)
+
+
+class ReponsesConditionnellesTests(TestCase):
+
+    def setUp(self):
+        self.lundi = date(2026, 2, 16)
+        Cours.objects.reconcilier_semaine(2, self.lundi, [evenement(self.lundi), evenement(date(2026, 2, 17))])
+        SemaineScrapee.enregistrer(2, self.lundi, 2)
+
+    def test_if_none_match(self):
+        premiere = self.client.get('/16/2/2026/')
+        self.assertEqual(premiere.status_code, 200)
+        self.assertIn('max-age=', premiere['Cache-Control'])
+        self.assertIn('Last-Modified', premiere)
+        with self.assertNumQueries(3):  # registre, agrégat, dernière suppression ; pas de lecture des cours
+            seconde = self.client.get('/16/2/2026/', HTTP_IF_NONE_MATCH=premiere['ETag'])
+        self.assertEqual(seconde.status_code, 304)
+        self.assertEqual(seconde.content, b'')
+        self.assertEqual(seconde['ETag'], premiere['ETag'])
+
+    def test_if_modified_since(self):
+        premiere = self.client.get('/16/2/2026/', {'semaine': 'true'})
+        seconde = self.client.get('/16/2/2026/', {'semaine': 'true'},
+                                  HTTP_IF_MODIFIED_SINCE=premiere['Last-Modified'])
+        self.assertEqual(seconde.status_code, 304)
+
+    def test_if_modified_since_apres_suppression(self):
+        semaine = {'semaine': 'true'}
+        premiere = self.client.get('/16/2/2026/', semaine)
+        # Le cours du lundi disparaît (plus d'une seconde après : précision de Last-Modified) ;
+        # celui du mardi, inchangé, garde sa date de mise à jour
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(seconds=2)):
+            Cours.objects.reconcilier_semaine(2, self.lundi, [evenement(date(2026, 2, 17))])
+        for prefixe in ('/', '/async/'):
+            reponse = self.client.get(f'{prefixe}16/2/2026/', semaine, HTTP_IF_MODIFIED_SINCE=premiere['Last-Modified'])
+            self.assertEqual(reponse.status_code, 200)
+            self.assertEqual(reponse.json()['nombre_total_evenements'], 1)
+            self.assertNotEqual(reponse['Last-Modified'], premiere['Last-Modified'])
+
+    def test_validateurs_changent_avec_les_donnees(self):
+        etag = self.client.get('/16/2/2026/')['ETag']
+        self.assertNotEqual(self.client.get('/17/2/2026/')['ETag'], etag)
+        self.assertNotEqual(self.client.get('/16/2/2026/', {'semaine': 'true'})['ETag'], etag)
+        Cours.objects.reconcilier_semaine(2, self.lundi, [evenement(date(2026, 2, 17))])
+        reponse = self.client.get('/16/2/2026/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual(reponse.json()['nombre_evenements'], 0)
+
+
+class VueAsynchroneTests(TestCase):
+
+    def setUp(self):
+        self.lundi = date(2026, 2, 16)
+        Cours.objects.reconcilier_semaine(2, self.lundi, [
+            evenement(self.lundi), evenement(self.lundi, horaire='13:00 à 15:00', niveau='L2 BIO'),
+            evenement(date(2026, 2, 17)),
+        ])
+        SemaineScrapee.enregistrer(2, self.lundi, 3)
+
+    def sans_horodatage(self, donnees):
+        donnees.pop('timestamp')
+        for jour in donnees.get('jours', []):
+            jour.pop('timestamp', None)
+        return donnees
+
+    def test_meme_reponse_que_la_vue_synchrone(self):
+        for params in ({}, {'semaine': 'true'}, {'niveau': 'l2 bio'}):
+            synchrone = self.client.get('/16/2/2026/', params)
+            asynchrone = self.client.get('/async/16/2/2026/', params)
+            self.assertEqual(asynchrone.status_code, 200)
+            self.assertEqual(asynchrone['Content-Type'], 'application/json')
+            self.assertEqual(asynchrone['ETag'], synchrone['ETag'])
+            self.assertEqual(self.sans_horodatage(asynchrone.json()), self.sans_horodatage(synchrone.json()))
+
+    def test_304_et_erreur(self):
+        etag = self.client.get('/async/16/2/2026/')['ETag']
+        self.assertEqual(self.client.get('/async/16/2/2026/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        reponse = self.client.get('/async/aujourdhui/', {'date': '2026-13-45'})
+        self.assertEqual(reponse.status_code, 400)
+        self.assertIn('erreur', reponse.json())
+
+    @override_settings(UPGC_GOUVERNEUR_DEBIT=0)  # jetons pris hors de la transaction du test
+    def test_scraping_asynchrone(self):
+        with FauxServeurGRR(latence=0.05) as serveur, override_settings(UPGC_URL_BASE=serveur.url):
+            attendu = ExtracteurUPGC().recuperer_semaine(2, date(2026, 3, 2))
+            obtenu = async_to_sync(ExtracteurUPGC().recuperer_semaine_async)(2, date(2026, 3, 4))
+            self.assertEqual(obtenu.evenements, attendu.evenements)
+            self.assertEqual(obtenu.empreinte, attendu.empreinte)
+
+            # Deux requêtes simultanées pour la même semaine : un seul téléchargement
+            async def deux_requetes():
+                return await asyncio.gather(tasks.synchroniser_semaine_async(2, date(2026, 3, 2)),
+                                            tasks.synchroniser_semaine_async(2, date(2026, 3, 6)))
+
+            requetes = serveur.requetes
+            premier, second = async_to_sync(deux_requetes)()
+            self.assertEqual(serveur.requetes, requetes + 1)
+            self.assertEqual(premier, second)
+            self.assertEqual(premier['crees'], Cours.objects.filter(jour__gte=date(2026, 3, 2)).count())
+            self.assertTrue(premier['crees'])
+            reponse = self.client.get('/async/2/3/2026/').json()
+        self.assertEqual(reponse['source'], 'cache')
+
+    @override_settings(UPGC_TIMEOUT=0.1)
+    def test_delai_des_requetes(self):
+        with FauxServeurGRR(latence=0.5) as serveur:
+            resultat = ExtracteurUPGC(url_base=serveur.url).recuperer_semaine(2, self.lundi)
+        self.assertIn('timed out', resultat.erreur)
+
+
+class BenchmarkConcurrenceTests(TransactionTestCase):
+
+    def test_benchmark(self):
+        cours = Cours.objects.create(**evenement(date(2026, 2, 16), zone=999))
+        journal = list(ChangementCours.objects.values_list('id', flat=True))
+        with tempfile.TemporaryDirectory() as dossier:
+            sortie = Path(dossier) / 'concurrence.jsonl'
+            call_command('benchmark_concurrence', latence=0.05, scrapings=2, lectures=3, workers=1,
+                         sortie=str(sortie), stdout=StringIO())
+            run = json.loads(sortie.read_text(encoding='utf-8'))
+        self.assertEqual([r['chemin'] for r in run['resultats']], ['wsgi-1-workers', 'asgi'])
+        self.assertTrue(all(r['requetes_grr'] == 2 for r in run['resultats']))
+        # Mesure faite dans une base jetable : la base courante n'a pas été touchée
+        self.assertEqual(list(Cours.objects.filter(zone=999)), [cours])
+        self.assertEqual(list(ChangementCours.objects.values_list('id', flat=True)), journal)
+        self.assertFalse(SemaineScrapee.objects.filter(zone=999).exists())
+        self.assertEqual(connection.settings_dict['TEST']['NAME'], settings.DATABASES['default']['TEST']['NAME'])
+
+
+class BenchmarkChargeTests(TransactionTestCase):
+
+    def test_melange(self):
+        urls = charge.melange_requetes([(2, date(2026, 2, 16)), (3, date(2026, 2, 23))], 40,
+                                       aujourdhui=date(2026, 2, 18))
+        self.assertEqual(len(urls), 40)
+        self.assertEqual({t for t, _ in urls}, {'aujourdhui', 'date', 'semaine'})
+        # Seule la zone 2 est servie pour la semaine courante
+        self.assertEqual({url for t, url in urls if t == 'aujourdhui'}, {'/aujourdhui/?zone=2'})
+        self.assertTrue(all(url.endswith('&semaine=true') for t, url in urls if t == 'semaine'))
+
+    def test_benchmark(self):
+        with tempfile.TemporaryDirectory() as dossier:
+            sortie = Path(dossier) / 'charge.jsonl'
+            # La base de test est déjà vide et jetable
+            call_command('benchmark_charge', requetes=20, concurrence=3, zones='2', semaines=2, latence=0.05,
+                         ressources=4, base_courante=True, sortie=str(sortie), stdout=StringIO())
+            resultat = json.loads(sortie.read_text(encoding='utf-8'))['resultats'][0]
+        self.assertEqual(resultat['requetes'], 20)
+        self.assertEqual(resultat['requetes_grr'], 2)
+        self.assertNotIn('erreur', resultat['par_source'])
+        self.assertEqual(set(resultat['par_source']), {'cache', 'scraping'})
+        self.assertEqual(sum(m['requetes'] for m in resultat['par_source'].values()), 20)
+
+
+class RattrapageTests(TestCase):
+
+    def setUp(self):
+        self.serveur = FauxServeurGRR().demarrer()
+        self.addCleanup(self.serveur.arreter)
+        reglages = override_settings(UPGC_URL_BASE=self.serveur.url, UPGC_GOUVERNEUR_DEBIT=0)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+        self.debut, self.fin = date(2026, 2, 16), date(2026, 3, 15)
+
+    def test_plage_analysee_en_processus(self):
+        rapport = rattrapage.rattraper([2, 3], self.debut, self.fin, processus=2, lot=3)
+        self.assertEqual((rapport['semaines'], rapport['echecs'], rapport['ignorees']), (8, 0, 0))
+        self.assertEqual(SemaineScrapee.objects.count(), 8)
+        self.assertEqual(Cours.objects.count(), rapport['evenements'])
+        self.assertGreater(rapport['evenements_par_s'], 0)
+        # Mêmes cours qu'une synchronisation semaine par semaine
+        semaine = Cours.objects.filter(zone=3, jour__range=(date(2026, 3, 2), date(2026, 3, 8)))
+        rattrapes = sorted(semaine.values_list('jour', 'horaire', 'ressource', 'intitule'))
+        semaine.delete()
+        SemaineScrapee.objects.filter(zone=3, debut_semaine=date(2026, 3, 2)).delete()
+        tasks.synchroniser_semaine(3, date(2026, 3, 2))
+        self.assertEqual(sorted(semaine.values_list('jour', 'horaire', 'ressource', 'intitule')), rattrapes)
+
+    def test_reprise_apres_interruption(self):
+        ecrire = tasks.enregistrer_resultat
+        appels = []
+
+        def ecrire_puis_planter(*args):
+            appels.append(args)
+            if len(appels) == 3:
+                raise RuntimeError("arrêt brutal")
+            return ecrire(*args)
+
+        with mock.patch('core.rattrapage.enregistrer_resultat', side_effect=ecrire_puis_planter):
+            with self.assertRaises(RuntimeError):
+                rattrapage.rattraper([2], self.debut, self.fin, processus=1, telechargements=1, lot=2)
+        # Le premier lot est écrit, le second annulé
+        self.assertEqual(SemaineScrapee.objects.count(), 2)
+
+        requetes = self.serveur.requetes
+        sortie = StringIO()
+        call_command('rattraper', debut='2026-02-16', fin='2026-03-15', zones='2', processus=1, stdout=sortie)
+        self.assertEqual(self.serveur.requetes - requetes, 2)
+        self.assertIn('2 semaines déjà au registre ignorées', sortie.getvalue())
+        self.assertIn('Terminé: 2 semaines', sortie.getvalue())
+        self.assertEqual(SemaineScrapee.objects.count(), 4)
+
+
+def _incrementer_dans_un_fils(sauvegarde, fin):
+    metriques.API_REQUETES.inc(3, vue='emploi_du_temps', source='cache', code=200)
+    metriques.API_DUREE.observer(0.01, vue='emploi_du_temps')
+    metriques.sauvegarder()
+    # Le fichier d'un processus arrêté ne compte plus : rester en vie pendant la lecture
+    sauvegarde.set()
+    fin.wait(10)
+
+
+class MetriquesTests(TestCase):
+
+    def setUp(self):
+        dossier = tempfile.TemporaryDirectory()
+        self.addCleanup(dossier.cleanup)
+        reglages = override_settings(UPGC_METRIQUES_DOSSIER=dossier.name, UPGC_GOUVERNEUR_DEBIT=0)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+        metriques.reinitialiser()
+        self.addCleanup(metriques.reinitialiser)
+
+    def lire(self):
+        reponse = self.client.get('/metrics/', HTTP_ACCEPT='text/plain;version=0.0.4')
+        self.assertEqual(reponse.status_code, 200)
+        self.assertTrue(reponse['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return reponse.content.decode()
+
+    def test_requetes_de_l_api(self):
+        simuler_scraper(self, lambda zone, date_cible: [evenement(date_cible, zone=zone)])
+        self.client.get('/16/2/2026/')
+        self.client.get('/16/2/2026/')
+        self.client.get('/16/2/2026/', {'zone': 'x'})
+        texte = self.lire()
+        self.assertIn('upgc_api_requetes_total{vue="emploi_du_temps",source="scraping",code="200"} 1', texte)
+        self.assertIn('upgc_api_requetes_total{vue="emploi_du_temps",source="cache",code="200"} 1', texte)
+        self.assertIn('upgc_api_requetes_total{vue="emploi_du_temps",source="aucune",code="400"} 1', texte)
+        self.assertIn('upgc_api_duree_secondes_count{vue="emploi_du_temps"} 3', texte)
+        self.assertIn('upgc_api_evenements_renvoyes_bucket{vue="emploi_du_temps",le="1.0"} 2', texte)
+        self.assertIn('# TYPE upgc_api_rendu_json_secondes histogram', texte)
+
+    def test_phases_du_scraping(self):
+        with FauxServeurGRR() as serveur, override_settings(UPGC_URL_BASE=serveur.url):
+            tasks.synchroniser_semaine(2, date(2026, 2, 16))
+        texte = self.lire()
+        for phase in ('attente_gouverneur', 'telechargement', 'analyse_html', 'parcours_tableau',
+                      'extraction_cellules', 'enregistrement'):
+            self.assertIn(f'upgc_scraping_phase_secondes_count{{phase="{phase}"}} 1', texte)
+        self.assertIn('upgc_scraping_telechargements_total{resultat="200"} 1', texte)
+        self.assertIn('upgc_gouverneur_total{evenement="requete_immediate"} 1', texte)
+        crees = Cours.objects.count()
+        self.assertIn(f'upgc_enregistrement_cours_total{{operation="crees"}} {crees}', texte)
+
+    def test_somme_des_processus(self):
+        metriques.API_REQUETES.inc(vue='emploi_du_temps', source='cache', code=200)
+        contexte = multiprocessing.get_context('fork')
+        sauvegarde, fin = contexte.Event(), contexte.Event()
+        fils = contexte.Process(target=_incrementer_dans_un_fils, args=(sauvegarde, fin))
+        fils.start()
+        self.assertTrue(sauvegarde.wait(10))
+        try:
+            texte = self.lire()
+        finally:
+            fin.set()
+            fils.join()
+        self.assertEqual(fils.exitcode, 0)
+        # Le fils ne recompte pas la valeur héritée du parent
+        self.assertIn('upgc_api_requetes_total{vue="emploi_du_temps",source="cache",code="200"} 4', texte)
+
+    def test_croissant_apres_l_arret_d_un_fils(self):
+        dossier = Path(settings.UPGC_METRIQUES_DOSSIER)
+        metriques.API_REQUETES.inc(vue='emploi_du_temps', source='cache', code=200)
+        contexte = multiprocessing.get_context('fork')
+        sauvegarde, fin = contexte.Event(), contexte.Event()
+        fils = contexte.Process(target=_incrementer_dans_un_fils, args=(sauvegarde, fin))
+        fils.start()
+        self.assertTrue(sauvegarde.wait(10))
+        pendant = metriques.exporter()
+        fin.set()
+        fils.join()
+        # Deux lectures : le report dans le cumul, puis la lecture du cumul seul
+        for texte in (pendant, metriques.exporter(), metriques.exporter()):
+            self.assertIn('upgc_api_requetes_total{vue="emploi_du_temps",source="cache",code="200"} 4', texte)
+            self.assertIn('upgc_api_duree_secondes_count{vue="emploi_du_temps"} 1', texte)
+        self.assertEqual(sorted(f.name for f in dossier.glob('*.json')), sorted([metriques._fichier, metriques.RETRAITES]))
+
+    def test_fichier_ancien_mis_de_cote(self):
+        dossier = Path(settings.UPGC_METRIQUES_DOSSIER)
+        # Fichier d'un processus actif (le lanceur des tests) non réécrit depuis deux jours
+        ancien = dossier / f'{os.getppid()}-ancien.json'
+        ancien.write_text(json.dumps({'upgc_scraping_evenements_total': [[[], 4279]]}))
+        os.utime(ancien, (horloge.time() - 2 * 86400,) * 2)
+        self.assertIn('upgc_scraping_evenements_total 4279', self.lire())
+        self.assertFalse(ancien.exists())
+        self.assertIn('upgc_scraping_evenements_total 4279', self.lire())
+        # Le processus réécrit son fichier : la valeur mise de côté n'est pas recomptée
+        ancien.write_text(json.dumps({'upgc_scraping_evenements_total': [[[], 4280]]}))
+        self.assertIn('upgc_scraping_evenements_total 4280', self.lire())
+        self.assertIn('upgc_scraping_evenements_total 4280', self.lire())
+
+    @override_settings(UPGC_METRIQUES_DOSSIER='')
+    def test_sans_dossier(self):
+        metriques.SCRAPING_EVENEMENTS.inc(7)
+        self.assertIn('upgc_scraping_evenements_total 7', self.lire())
+
+    def test_fork_pendant_qu_un_thread_tient_le_verrou(self):
+        tenu, relacher = threading.Event(), threading.Event()
+
+        def tenir():
+            with metriques._verrou:
+                tenu.set()
+                relacher.wait()
+
+        thread = threading.Thread(target=tenir)
+        thread.start()
+        tenu.wait()
+        contexte = multiprocessing.get_context('fork')
+        sauvegarde, fin = contexte.Event(), contexte.Event()
+        fin.set()
+        try:
+            fils = contexte.Process(target=_incrementer_dans_un_fils, args=(sauvegarde, fin))
+            fils.start()
+            fils.join(timeout=10)
+            self.assertEqual(fils.exitcode, 0)
+        finally:
+            relacher.set()
+            thread.join()
+            if fils.is_alive():
+                fils.kill()
+
+
+class BudgetRequetesTests(BudgetRequetesMixin, TestCase):
+    """Nombre maximal de requêtes SQL par URL, indépendant du nombre de cours."""
+
+    BUDGET_JOUR = 4  # registre, agrégat et dernière suppression (validateurs), cours
+    BUDGET_SEMAINE = 4
+    # Verrou, réconciliation groupée, conflits, registre, lecture (savepoints compris) ;
+    # les 60 cours tiennent en deux INSERT sous la limite de paramètres de SQLite
+    BUDGET_SCRAPING = 25
+
+    def setUp(self):
+        simuler_scraper(self, lambda zone, date_cible: [
+            evenement(date_cible + timedelta(days=i % 5), zone=zone, ressource=f'Salle {i}') for i in range(60)
+        ])
+
+    def test_jour_en_cache(self):
+        self.client.get('/16/2/2026/')
+        with self.assertMaxRequetes(self.BUDGET_JOUR):
+            self.assertEqual(self.client.get('/16/2/2026/').json()['source'], 'cache')
+
+    def test_semaine_en_cache(self):
+        self.client.get('/16/2/2026/')
+        with self.assertMaxRequetes(self.BUDGET_SEMAINE):
+            self.assertEqual(self.client.get('/16/2/2026/', {'semaine': 'true'}).json()['nombre_total_evenements'], 60)
+
+    def test_semaine_absente(self):
+        with self.assertMaxRequetes(self.BUDGET_SCRAPING):
+            self.assertEqual(self.client.get('/16/2/2026/', {'semaine': 'true'}).json()['nombre_total_evenements'], 60)
+
+    def test_depassement_signale(self):
+        with self.assertRaisesMessage(AssertionError, 'requêtes SQL pour un budget de 1'):
+            with self.assertMaxRequetes(1):
+                self.client.get('/16/2/2026/')
+
+
+class ProfilageTests(TestCase):
+
+    def setUp(self):
+        Cours.objects.create(**evenement(date(2026, 2, 16)))
+        SemaineScrapee.enregistrer(2, date(2026, 2, 16), 1)
+        self.personnel = User.objects.create_user('admin', is_staff=True)
+
+    def test_rapport_pour_le_personnel(self):
+        self.client.force_login(self.personnel)
+        rapport = self.client.get('/16/2/2026/', {'profil': 'true'}).json()
+        self.assertEqual(rapport['code'], 200)
+        self.assertEqual(rapport['requetes_sql']['nombre'], 4)
+        self.assertEqual(len(rapport['requetes_sql']['liste']), 4)
+        self.assertIn('core_semainescrapee', rapport['requetes_sql']['liste'][0]['sql'])
+        self.assertTrue(any('cumtime' in ligne for ligne in rapport['profil']))
+
+    def test_entete(self):
+        self.client.force_login(self.personnel)
+        rapport = self.client.get('/16/2/2026/', HTTP_X_UPGC_PROFIL='1').json()
+        self.assertGreater(rapport['taille_octets'], 0)
+
+    def test_ignore_hors_personnel(self):
+        self.client.force_login(User.objects.create_user('etudiant'))
+        corps = self.client.get('/16/2/2026/', {'profil': 'true'}).json()
+        self.assertEqual(corps['nombre_evenements'], 1)
+        self.client.logout()
+        self.assertNotIn('profil', self.client.get('/16/2/2026/', {'profil': 'true'}).json())
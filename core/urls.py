@@ -1,5 +1,15 @@
 from django.urls import path
-from .views import EmploiDuTempsDuJourAPIView
+from .views import (
+    CalendrierICSAPIView,
+    ChangementsAPIView,
+    ConflitsAPIView,
+    EmploiDuTempsAsyncView,
+    EmploiDuTempsDuJourAPIView,
+    ExportCoursAPIView,
+    MaintenantAPIView,
+    MetriquesAPIView,
+    SallesLibresAPIView,
+)
 
 urlpatterns = [
     # 1. Emploi du temps du jour (défaut)
@@ -7,4 +17,29 @@ urlpatterns = [
     
     # 2. Emploi du temps par date (jour/mois/annee)
     path('<int:jour>/<int:mois>/<int:annee>/', EmploiDuTempsDuJourAPIView.as_view(), name='emploi-date'),
+
+    # 3. Export d'une plage de dates (JSON Lines ou CSV)
+    path('export/', ExportCoursAPIView.as_view(), name='export-cours'),
+
+    # 4. Cours en cours et à venir
+    path('maintenant/', MaintenantAPIView.as_view(), name='maintenant'),
+
+    # 5. Salles libres sur une plage horaire
+    path('salles-libres/', SallesLibresAPIView.as_view(), name='salles-libres'),
+
+    # 6. Doubles réservations (salles, enseignants, niveaux)
+    path('conflits/', ConflitsAPIView.as_view(), name='conflits'),
+
+    # 7. Flux iCalendar par niveau, salle ou enseignant
+    path('ics/', CalendrierICSAPIView.as_view(), name='calendrier-ics'),
+
+    # 8. Journal des changements pour la synchronisation des clients
+    path('changements/', ChangementsAPIView.as_view(), name='changements'),
+
+    # 9. Variante asynchrone (ASGI) des URLs 1 et 2
+    path('async/aujourdhui/', EmploiDuTempsAsyncView.as_view(), name='emploi-jour-async'),
+    path('async/<int:jour>/<int:mois>/<int:annee>/', EmploiDuTempsAsyncView.as_view(), name='emploi-date-async'),
+
+    # 10. Métriques au format Prometheus (scraping, gouverneur, API)
+    path('metrics/', MetriquesAPIView.as_view(), name='metriques'),
 ]
\ No newline at end of file
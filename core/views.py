@@ -2,52 +2,82 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from django.conf import settings
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
-from django.db import transaction
-from django.db.models import Count, Q
-from datetime import datetime, date, timedelta
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from django.views import View
+from django.db.models import Count, Max, Q
+from datetime import datetime, date, time, timedelta
+from time import perf_counter
+import csv
+import hashlib
 import logging
 
-from .models import Cours
-from .scraping import ExtracteurUPGC
-from .serializers import (
-    CoursSerializer,
-    EmploiDuTempsJourResponseSerializer,
-    EmploiDuTempsSemaineResponseSerializer,
-    ErreurResponseSerializer
-)
+from . import metriques
+from .models import CHAMPS_FILTRABLES, ORDRE_CHRONOLOGIQUE, ChangementCours, ConflitCours, Cours, SemaineScrapee, debut_semaine
+from .tasks import synchroniser_semaine, synchroniser_semaine_async
+from .fraicheur import est_perimee, revalider_en_arriere_plan
+from .gouverneur import obtenir_gouverneur
+from .calendrier import blocs_semaines, calendrier, jetons_semaines, signature_flux
+from .intervalles import MINUTES_JOUR, disponibilites, en_heure, en_minutes
+from .renderers import ORJSONRenderer, ligne_json
+from .serializers import CHAMPS_COURS_EXPORT, CHAMPS_COURS_JOUR, CHAMPS_COURS_SEMAINE
 
 logger = logging.getLogger(__name__)
 
-class EmploiDuTempsDuJourAPIView(APIView):
+
+def lire_date(valeur):
+    """Date d'un paramètre de requête, aux formats YYYY-MM-DD, DD/MM/YYYY ou DD-MM-YYYY."""
+    for fmt in ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y'):
+        try:
+            return datetime.strptime(valeur, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError("Le format de date doit être YYYY-MM-DD ou DD/MM/YYYY")
+
+
+def lire_heure(valeur):
+    """Heure d'un paramètre de requête, au format HH:MM."""
+    try:
+        return datetime.strptime(valeur, '%H:%M').time()
+    except ValueError:
+        raise ValueError("Le format de l'heure doit être HH:MM")
+
+
+def lire_plage(params):
+    """Plage ?debut=&fin= (dates incluses), obligatoire."""
+    if not params.get('debut') or not params.get('fin'):
+        raise ValueError("Les paramètres debut et fin sont obligatoires")
+    debut, fin = lire_date(params['debut']), lire_date(params['fin'])
+    if debut > fin:
+        raise ValueError("debut doit précéder fin")
+    return debut, fin
+
+
+def lire_filtres(params):
+    """Filtres ?niveau=&salle=&ressource=&enseignant=&type_cours= (répétables)."""
+    filtres = {}
+    for champ in CHAMPS_FILTRABLES:
+        valeurs = [v for v in params.getlist(champ) if v.strip()]
+        if valeurs:
+            filtres[champ] = valeurs
+    return filtres
+
+
+def corps_erreur(msg, code, details=None):
+    """Corps JSON commun à toutes les réponses d'erreur de l'API."""
+    return {'erreur': msg, 'code': code, 'details': details or {}, 'timestamp': timezone.now()}
+
+
+class EmploiDuTempsMixin:
     """
-    Endpoint principal pour l'emploi du temps.
-    Gère : Jour, Date spécifique, Semaine, Actualisation.
+    Lecture des paramètres et construction des réponses de l'emploi du temps,
+    communes aux vues DRF (WSGI) et à leur variante asynchrone (ASGI).
     """
     
-    def get(self, request, *args, **kwargs):
-        try:
-            zone = self._get_zone_param(request)
-            date_cible = self._get_date_param(request)
-            force_actualisation = self._get_bool_param(request, 'actualiser', False)
-            semaine_complete = self._get_bool_param(request, 'semaine', False)
-            
-            if semaine_complete:
-                resultat = self._recuperer_semaine_complete(zone, date_cible, force_actualisation)
-                serializer = EmploiDuTempsSemaineResponseSerializer(data=resultat)
-            else:
-                resultat = self._recuperer_emploi_du_jour(zone, date_cible, force_actualisation)
-                serializer = EmploiDuTempsJourResponseSerializer(data=resultat)
-            
-            serializer.is_valid(raise_exception=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-            
-        except ValueError as e:
-            return self._reponse_erreur(str(e), status.HTTP_400_BAD_REQUEST)
-        except Exception as e:
-            logger.error(f"Erreur serveur: {e}", exc_info=True)
-            return self._reponse_erreur(f"Erreur serveur: {str(e)}", status.HTTP_500_INTERNAL_SERVER_ERROR)
-    
     def _get_zone_param(self, request):
         return int(request.GET.get('zone', '2'))
     
@@ -66,47 +96,92 @@ class EmploiDuTempsDuJourAPIView(APIView):
         if not date_str:
             return date.today()
         
-        # Support de plusieurs formats
-        for fmt in ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y'):
-            try:
-                return datetime.strptime(date_str, fmt).date()
-            except ValueError:
-                continue
-                
-        raise ValueError("Le format de date doit être YYYY-MM-DD ou DD/MM/YYYY")
+        return lire_date(date_str)
     
     def _get_bool_param(self, request, param, default):
         val = request.GET.get(param, str(default))
         return val.lower() in ['true', '1', 'yes', 'vrai']
     
-    def _recuperer_emploi_du_jour(self, zone, date_cible, force):
-        # Note: Le modèle Cours n'a pas de champ 'zone'. On ignore le filtrage par zone en DB.
-        if not force:
-            donnees = Cours.objects.filter(jour=date_cible).order_by('horaire')
-            if donnees.exists():
-                return self._construire_reponse_jour(donnees, date_cible, zone, 'cache')
-        
-        # Scraping
-        extracteur = ExtracteurUPGC()
-        # Le scraper retourne une liste de dicts
-        nouvelles_donnees = extracteur.recuperer_emploi_du_temps(zone=zone, date_cible=date_cible)
-        
-        # Sauvegarde
-        saved_objs = self._sauvegarder_evenements(nouvelles_donnees)
-        # On filtre pour ne retourner que le jour demandé (au cas où le scraper a ramené la semaine)
-        saved_objs_jour = [c for c in saved_objs if c.jour == date_cible]
-        
-        return self._construire_reponse_jour(saved_objs_jour, date_cible, zone, 'scraping')
+    def _validateurs(self, zone, debut, fin, semaine_complete, donnees, filtres=None):
+        """
+        ETag fort et date de dernière modification des cours demandés.
+        Toute création ou modification avance la date de mise à jour maximale ; une
+        suppression ne laisse pas de cours à dater : la date de la dernière suppression
+        journalisée sur la plage est donc prise en compte, pour l'ETag comme pour
+        Last-Modified.
+        """
+        agregat = donnees.aggregate(nombre=Count('id'), maj=Max('date_maj'))
+        agregat.update(self._suppressions(zone, debut, fin).aggregate(suppression=Max('date')))
+        return self._validateurs_agregat(zone, debut, fin, semaine_complete, agregat, filtres)
+    
+    def _suppressions(self, zone, debut, fin):
+        # Suppressions de toute la plage, filtres ignorés : au pire un 200 de trop
+        return ChangementCours.objects.filter(
+            zone=zone, jour__range=(debut, fin), operation=ChangementCours.SUPPRESSION
+        ).order_by()
+    
+    def _validateurs_agregat(self, zone, debut, fin, semaine_complete, agregat, filtres=None):
+        dates = [d for d in (agregat['maj'], agregat['suppression']) if d]
+        derniere = max(dates) if dates else None
+        cle = '|'.join(str(v) for v in (
+            zone, debut, fin, semaine_complete, sorted((filtres or {}).items()), agregat['nombre'],
+            derniere.isoformat() if derniere else ''
+        ))
+        etag = quote_etag(hashlib.sha1(cle.encode()).hexdigest())
+        derniere_modification = int(derniere.timestamp()) if derniere else None
+        return etag, derniere_modification
+    
+    def _avec_validateurs(self, reponse, etag, derniere_modification):
+        reponse['ETag'] = etag
+        if derniere_modification is not None:
+            reponse['Last-Modified'] = http_date(derniere_modification)
+        patch_cache_control(reponse, public=True, max_age=settings.UPGC_CACHE_MAX_AGE)
+        # JSON et API navigable DRF partagent l'URL
+        patch_vary_headers(reponse, ['Accept'])
+        return reponse
+    
+    def _construire_reponse_jour(self, evenements, date_cible, zone, source):
+        # evenements est une liste de dicts issus de QuerySet.values()
+        return {
+            'date': date_cible.isoformat(),
+            'jour_semaine': self._get_jour_semaine_fr(date_cible),
+            'zone': zone,
+            'source': source,
+            'timestamp': timezone.now(),
+            'nombre_evenements': len(evenements),
+            'donnees': evenements
+        }
+    
+    def _mesurer(self, debut, reponse):
+        # Une série par vue, source des données ('aucune' si l'erreur précède la lecture) et code
+        metriques.API_DUREE.observer(perf_counter() - debut, vue=self.vue_metriques)
+        metriques.API_REQUETES.inc(
+            vue=self.vue_metriques, source=getattr(self, 'source', None) or 'aucune', code=reponse.status_code
+        )
+        return reponse
     
-    def _recuperer_semaine_complete(self, zone, date_ref, force):
-        start = date_ref - timedelta(days=date_ref.weekday())
+    def _construire_resultat(self, construire, *args):
+        with metriques.API_SERIALISATION.chronometrer(vue=self.vue_metriques):
+            resultat = construire(*args)
+        nombre = resultat.get('nombre_total_evenements', resultat.get('nombre_evenements'))
+        metriques.API_EVENEMENTS.observer(nombre, vue=self.vue_metriques)
+        return resultat
+    
+    def _get_jour_semaine_fr(self, d):
+        return ['Lundi','Mardi','Mercredi','Jeudi','Vendredi','Samedi','Dimanche'][d.weekday()]
+    
+    def _construire_reponse_semaine(self, zone, date_ref, lignes, source):
+        # lignes : dicts de CHAMPS_COURS_SEMAINE, triés par jour
+        start = debut_semaine(date_ref)
+        fin = start + timedelta(days=6)
+        par_jour = {}
+        for cours in lignes:
+            par_jour.setdefault(cours['jour'], []).append(cours)
+        
         semaine_data = []
         for i in range(7):
             d = start + timedelta(days=i)
-            # Pour éviter 7 appels de scraping, on pourrait scraper une fois la semaine.
-            # Mais ExtracteurUPGC.recuperer_emploi_du_temps récupère déjà la semaine (souvent).
-            # Simplification: on appelle jour par jour (le cache optimisera les appels suivants si le scraper a tout rempli)
-            res_jour = self._recuperer_emploi_du_jour(zone, d, force)
+            res_jour = self._construire_reponse_jour(par_jour.get(d, []), d, zone, source)
             semaine_data.append({
                 'date': d.isoformat(),
                 'jour_semaine': self._get_jour_semaine_fr(d),
@@ -114,62 +189,535 @@ class EmploiDuTempsDuJourAPIView(APIView):
                 'source': res_jour['source'],
                 'evenements': res_jour['donnees']
             })
-            # Après le premier jour, si le scraper a rempli la semaine, force=False devrait utiliser le cache
-            force = False 
             
         return {
             'semaine': {
                 'debut': start.isoformat(),
-                'fin': (start + timedelta(days=6)).isoformat(),
+                'fin': fin.isoformat(),
                 'numero': start.isocalendar()[1],
-                'annee': start.year
+                'annee': start.isocalendar()[0]
             },
             'zone': zone,
             'nombre_total_evenements': sum(j['nombre_evenements'] for j in semaine_data),
             'jours': semaine_data,
             'timestamp': timezone.now()
         }
+
+
+class EmploiDuTempsDuJourAPIView(EmploiDuTempsMixin, APIView):
+    """
+    Endpoint principal pour l'emploi du temps.
+    Gère : Jour, Date spécifique, Semaine, Actualisation.
+    """
     
-    def _sauvegarder_evenements(self, data_list):
-        saved = []
-        with transaction.atomic():
-            # On ne supprime pas tout, on update_or_create
-            # Pour éviter doublons, on pourrait supprimer par jour ?
-            # Cours.objects.filter(jour=...).delete() ?
-            # Le scraper précédent utilisait update_or_create. Gardons ça.
-            for item in data_list:
-                obj, _ = Cours.objects.update_or_create(
-                    jour=item['jour'],
-                    horaire=item['horaire'],
-                    ressource=item['ressource'],
-                    defaults={
-                        'type_cours': item['type_cours'],
-                        'enseignant': item['enseignant'],
-                        'intitule': item['intitule'],
-                        'niveau': item['niveau'],
-                        'salle': item['salle']
-                    }
-                )
-                saved.append(obj)
-        return saved
+    vue_metriques = 'emploi_du_temps'
     
-    def _construire_reponse_jour(self, evenements, date_cible, zone, source):
-        # evenements est une liste d'objets Cours ou QuerySet
-        serializer = CoursSerializer(evenements, many=True)
-        return {
-            'date': date_cible.isoformat(),
-            'jour_semaine': self._get_jour_semaine_fr(date_cible),
-            'zone': zone,
-            'source': source,
-            'timestamp': timezone.now(),
-            'nombre_evenements': len(evenements),
-            'donnees': serializer.data
-        }
+    def get(self, request, *args, **kwargs):
+        debut = perf_counter()
+        self.source = None
+        return self._mesurer(debut, self._emploi_du_temps(request))
     
-    def _get_jour_semaine_fr(self, d):
-        return ['Lundi','Mardi','Mercredi','Jeudi','Vendredi','Samedi','Dimanche'][d.weekday()]
+    def _emploi_du_temps(self, request):
+        try:
+            zone = self._get_zone_param(request)
+            date_cible = self._get_date_param(request)
+            force_actualisation = self._get_bool_param(request, 'actualiser', False)
+            semaine_complete = self._get_bool_param(request, 'semaine', False)
+            
+            source = self.source = self._assurer_semaine(zone, date_cible, force_actualisation)
+            if semaine_complete:
+                debut = debut_semaine(date_cible)
+                fin = debut + timedelta(days=6)
+            else:
+                debut = fin = date_cible
+            filtres = lire_filtres(request.GET)
+            donnees = Cours.objects.filter(zone=zone, jour__range=(debut, fin)).filtrer(filtres)
+            
+            # Client déjà à jour : 304 sans relire ni sérialiser les cours
+            etag, derniere_modification = self._validateurs(zone, debut, fin, semaine_complete, donnees, filtres)
+            reponse = get_conditional_response(request, etag=etag, last_modified=derniere_modification)
+            if reponse is not None:
+                return self._avec_validateurs(reponse, etag, derniere_modification)
+            
+            # Réponse construite directement depuis les lignes de la base : les données
+            # ont été validées à l'import, le renderer se charge des dates.
+            if semaine_complete:
+                resultat = self._construire_resultat(self._recuperer_semaine_complete, zone, date_cible, donnees, source)
+            else:
+                resultat = self._construire_resultat(self._recuperer_emploi_du_jour, zone, date_cible, donnees, source)
+            
+            reponse = Response(resultat, status=status.HTTP_200_OK)
+            return self._avec_validateurs(reponse, etag, derniere_modification)
+            
+        except ValueError as e:
+            return self._reponse_erreur(str(e), status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Erreur serveur: {e}", exc_info=True)
+            return self._reponse_erreur(f"Erreur serveur: {str(e)}", status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    def _recuperer_emploi_du_jour(self, zone, date_cible, donnees, source):
+        lignes = list(donnees.order_by(*ORDRE_CHRONOLOGIQUE).values(*CHAMPS_COURS_JOUR))
+        return self._construire_reponse_jour(lignes, date_cible, zone, source)
+    
+    def _recuperer_semaine_complete(self, zone, date_ref, donnees, source):
+        # Une seule vérification du registre (et au plus un scraping) pour toute la semaine,
+        # puis une seule requête pour les 7 jours.
+        lignes = donnees.order_by('jour', *ORDRE_CHRONOLOGIQUE).values(*CHAMPS_COURS_SEMAINE)
+        return self._construire_reponse_semaine(zone, date_ref, lignes, source)
+    
+    def _assurer_semaine(self, zone, date_cible, force):
+        """
+        Garantit que la semaine contenant `date_cible` est en base.
+        Le registre SemaineScrapee fait foi : une semaine déjà récupérée n'est pas
+        re-scrapée pendant la requête, même si le jour demandé est vide ; passée sa
+        durée de fraîcheur, elle est revalidée en arrière-plan. Retourne la source
+        des données : 'cache', 'stale' ou 'scraping'.
+        """
+        if force and not obtenir_gouverneur().autoriser_actualisation(zone, date_cible):
+            # Semaine scrapée à l'instant : l'actualisation est servie depuis la base
+            force = False
+        if not force:
+            registre = SemaineScrapee.pour(zone, date_cible)
+            if registre is not None:
+                if not est_perimee(registre):
+                    return 'cache'
+                # Semaine périmée : réponse immédiate depuis la base, scraping en arrière-plan
+                revalider_en_arriere_plan(zone, date_cible)
+                return 'stale'
+        
+        # Scraping de la semaine, réconciliation en base et mise à jour du registre.
+        # En cas d'échec, on sert ce que la base contient déjà.
+        synchroniser_semaine(zone, date_cible)
+        return 'scraping'
     
     def _reponse_erreur(self, msg, code, details=None):
+        return Response(corps_erreur(msg, code, details), status=code)
+
+
+class EmploiDuTempsAsyncView(EmploiDuTempsMixin, View):
+    """
+    Variante asynchrone de EmploiDuTempsDuJourAPIView (mêmes paramètres, même
+    réponse JSON), à servir par ASGI : les lectures passent par l'ORM asynchrone
+    et un scraping en cours n'occupe pas de worker, si bien que les semaines déjà
+    en base restent servies pendant les scrapings lents.
+    """
+    
+    vue_metriques = 'emploi_du_temps_async'
+    
+    async def get(self, request, *args, **kwargs):
+        debut = perf_counter()
+        self.source = None
+        return self._mesurer(debut, await self._emploi_du_temps(request))
+    
+    async def _emploi_du_temps(self, request):
+        try:
+            zone = self._get_zone_param(request)
+            date_cible = self._get_date_param(request)
+            force_actualisation = self._get_bool_param(request, 'actualiser', False)
+            semaine_complete = self._get_bool_param(request, 'semaine', False)
+            
+            source = self.source = await self._assurer_semaine(zone, date_cible, force_actualisation)
+            if semaine_complete:
+                debut = debut_semaine(date_cible)
+                fin = debut + timedelta(days=6)
+            else:
+                debut = fin = date_cible
+            filtres = lire_filtres(request.GET)
+            donnees = Cours.objects.filter(zone=zone, jour__range=(debut, fin)).filtrer(filtres)
+            
+            agregat = await donnees.aaggregate(nombre=Count('id'), maj=Max('date_maj'))
+            agregat.update(await self._suppressions(zone, debut, fin).aaggregate(suppression=Max('date')))
+            etag, derniere_modification = self._validateurs_agregat(
+                zone, debut, fin, semaine_complete, agregat, filtres
+            )
+            reponse = get_conditional_response(request, etag=etag, last_modified=derniere_modification)
+            if reponse is not None:
+                return self._avec_validateurs(reponse, etag, derniere_modification)
+            
+            # Lecture asynchrone des lignes, puis construction chronométrée comme en WSGI
+            if semaine_complete:
+                lignes = donnees.order_by('jour', *ORDRE_CHRONOLOGIQUE).values(*CHAMPS_COURS_SEMAINE)
+                lignes = [c async for c in lignes]
+                resultat = self._construire_resultat(self._construire_reponse_semaine, zone, date_cible, lignes, source)
+            else:
+                lignes = donnees.order_by(*ORDRE_CHRONOLOGIQUE).values(*CHAMPS_COURS_JOUR)
+                lignes = [c async for c in lignes]
+                resultat = self._construire_resultat(self._construire_reponse_jour, lignes, date_cible, zone, source)
+            return self._avec_validateurs(self._reponse_json(resultat), etag, derniere_modification)
+            
+        except ValueError as e:
+            return self._reponse_erreur(str(e), status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Erreur serveur: {e}", exc_info=True)
+            return self._reponse_erreur(f"Erreur serveur: {str(e)}", status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    async def _assurer_semaine(self, zone, date_cible, force):
+        """Équivalent asynchrone de EmploiDuTempsDuJourAPIView._assurer_semaine."""
+        if force and not await sync_to_async(obtenir_gouverneur().autoriser_actualisation)(zone, date_cible):
+            force = False
+        if not force:
+            registre = await SemaineScrapee.objects.filter(
+                zone=zone, debut_semaine=debut_semaine(date_cible)
+            ).afirst()
+            if registre is not None:
+                if not est_perimee(registre):
+                    return 'cache'
+                revalider_en_arriere_plan(zone, date_cible)
+                return 'stale'
+        
+        await synchroniser_semaine_async(zone, date_cible)
+        return 'scraping'
+    
+    def _reponse_json(self, donnees, code=status.HTTP_200_OK):
+        return HttpResponse(ORJSONRenderer().render(donnees), status=code,
+                            content_type=ORJSONRenderer.media_type)
+    
+    def _reponse_erreur(self, msg, code, details=None):
+        return self._reponse_json(corps_erreur(msg, code, details), code)
+
+
+class MaintenantAPIView(EmploiDuTempsDuJourAPIView):
+    """
+    Cours en cours et cours commençant dans les prochaines minutes pour une zone.
+    Paramètres : zone, dans (minutes, 30 par défaut), date et heure (HH:MM, défaut :
+    maintenant), filtres de lire_filtres. Une seule requête, par plage sur l'index
+    (zone, jour, heure_debut).
+    """
+
+    DANS_PAR_DEFAUT = 30
+
+    def get(self, request, *args, **kwargs):
+        try:
+            zone = self._get_zone_param(request)
+            maintenant = timezone.localtime()
+            jour = self._get_date_param(request) if request.GET.get('date') else maintenant.date()
+            heure = self._get_heure_param(request, maintenant)
+            dans = int(request.GET.get('dans', self.DANS_PAR_DEFAUT))
+            if not 0 <= dans <= 24 * 60:
+                raise ValueError("dans doit être compris entre 0 et 1440 minutes")
+
+            source = self._assurer_semaine(zone, jour, False)
+            limite = datetime.combine(jour, heure) + timedelta(minutes=dans)
+            limite = limite.time() if limite.date() == jour else time.max
+            cours = (
+                Cours.objects.filter(zone=zone, jour=jour, heure_debut__lte=limite, heure_fin__gt=heure)
+                .filtrer(lire_filtres(request.GET))
+                .order_by(*ORDRE_CHRONOLOGIQUE)
+                .values(*CHAMPS_COURS_JOUR)
+            )
+            en_cours, a_venir = [], []
+            for c in cours:
+                (en_cours if c['heure_debut'] <= heure else a_venir).append(c)
+
+            return Response({
+                'date': jour.isoformat(),
+                'heure': heure.strftime('%H:%M'),
+                'zone': zone,
+                'source': source,
+                'dans_minutes': dans,
+                'en_cours': en_cours,
+                'a_venir': a_venir,
+                'timestamp': timezone.now(),
+            }, status=status.HTTP_200_OK)
+
+        except ValueError as e:
+            return self._reponse_erreur(str(e), status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Erreur serveur: {e}", exc_info=True)
+            return self._reponse_erreur(f"Erreur serveur: {str(e)}", status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def _get_heure_param(self, request, maintenant):
+        valeur = request.GET.get('heure')
+        if not valeur:
+            return maintenant.time().replace(second=0, microsecond=0)
+        return lire_heure(valeur)
+
+
+class SallesLibresAPIView(EmploiDuTempsDuJourAPIView):
+    """
+    Salles (ressources) libres d'une zone pour un jour ou une semaine (?semaine=true),
+    dans une fenêtre ?debut=HH:MM&fin=HH:MM (07:00–20:00 par défaut). Pour chaque jour :
+    les salles libres sur toute la fenêtre et les intervalles libres de chaque salle
+    d'au moins ?duree= minutes. Filtre optionnel ?ressource= (répétable). Les salles
+    connues sont celles des cours de la zone à moins de HISTORIQUE_SALLES des jours
+    demandés (le semestre qui les entoure), pas de tout l'historique.
+    """
+
+    OUVERTURE = time(7, 0)
+    FERMETURE = time(20, 0)
+    HISTORIQUE_SALLES = timedelta(weeks=10)
+
+    def get(self, request, *args, **kwargs):
+        try:
+            zone = self._get_zone_param(request)
+            date_cible = self._get_date_param(request)
+            debut = en_minutes(lire_heure(request.GET['debut']) if request.GET.get('debut') else self.OUVERTURE)
+            fin = en_minutes(lire_heure(request.GET['fin']) if request.GET.get('fin') else self.FERMETURE)
+            if debut >= fin:
+                raise ValueError("debut doit précéder fin")
+            duree = int(request.GET.get('duree', 1))
+            if duree < 1:
+                raise ValueError("duree doit être d'au moins 1 minute")
+
+            source = self._assurer_semaine(zone, date_cible, False)
+            if self._get_bool_param(request, 'semaine', False):
+                premier = debut_semaine(date_cible)
+                jours = [premier + timedelta(days=i) for i in range(7)]
+            else:
+                jours = [date_cible]
+
+            return Response({
+                'zone': zone,
+                'source': source,
+                'fenetre': {'debut': en_heure(debut), 'fin': en_heure(fin)},
+                'duree_minimale': duree,
+                'jours': self._disponibilites(zone, jours, debut, fin, duree, request.GET.getlist('ressource')),
+                'timestamp': timezone.now(),
+            }, status=status.HTTP_200_OK)
+
+        except ValueError as e:
+            return self._reponse_erreur(str(e), status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Erreur serveur: {e}", exc_info=True)
+            return self._reponse_erreur(f"Erreur serveur: {str(e)}", status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def _disponibilites(self, zone, jours, debut, fin, duree, ressources_demandees):
+        filtres = {'ressource': ressources_demandees} if ressources_demandees else {}
+        # Salles connues de la zone autour des jours demandés, par nom normalisé : le coût
+        # suit la fenêtre (index zone, jour) et non la taille de l'historique
+        periode = (jours[0] - self.HISTORIQUE_SALLES, jours[-1] + self.HISTORIQUE_SALLES)
+        ressources = dict(
+            Cours.objects.filter(zone=zone, jour__range=periode).filtrer(filtres)
+            .values('ressource_norm').annotate(nom=Max('ressource')).values_list('ressource_norm', 'nom')
+        )
+        # Une seule requête pour tous les jours : cours qui touchent la fenêtre. Un
+        # horaire illisible (heures nulles) occupe la salle toute la journée.
+        heure_debut, heure_fin = time(*divmod(debut, 60)), time(*divmod(fin, 60))
+        occupations = {}
+        for ressource, jour, hd, hf in (
+            Cours.objects.filter(zone=zone, jour__range=(jours[0], jours[-1])).filtrer(filtres)
+            .filter(Q(heure_debut__lt=heure_fin, heure_fin__gt=heure_debut) | Q(heure_debut__isnull=True))
+            .values_list('ressource_norm', 'jour', 'heure_debut', 'heure_fin')
+        ):
+            intervalle = (en_minutes(hd), en_minutes(hf)) if hd and hf else (0, MINUTES_JOUR)
+            occupations.setdefault(jour, []).append((ressource, *intervalle))
+
+        resultat = []
+        for jour in jours:
+            libres = disponibilites(occupations.get(jour, ()), ressources, debut, fin, duree)
+            resultat.append({
+                'date': jour.isoformat(),
+                'jour_semaine': self._get_jour_semaine_fr(jour),
+                'salles_libres': sorted(
+                    ressources[r] for r, intervalles in libres.items() if intervalles == [(debut, fin)]
+                ),
+                'disponibilites': [
+                    {'ressource': ressources[r],
+                     'libre': [{'debut': en_heure(d), 'fin': en_heure(f)} for d, f in intervalles]}
+                    for r, intervalles in sorted(libres.items(), key=lambda item: ressources[item[0]])
+                ],
+            })
+        return resultat
+
+
+class ConflitsAPIView(EmploiDuTempsDuJourAPIView):
+    """
+    Doubles réservations enregistrées (salles, enseignants, niveaux) d'une zone.
+    Plage ?debut=&fin= (défaut : semaine de ?date), ?type= répétable. Les conflits
+    sont calculés après chaque synchronisation : cette vue ne fait que les lire.
+    """
+
+    CHAMPS_COURS = ('id', 'horaire', 'intitule', 'type_cours', 'enseignant', 'niveau', 'salle', 'ressource')
+
+    def get(self, request, *args, **kwargs):
+        try:
+            zone = self._get_zone_param(request)
+            if request.GET.get('debut') or request.GET.get('fin'):
+                debut, fin = lire_plage(request.GET)
+            else:
+                debut = debut_semaine(self._get_date_param(request))
+                fin = debut + timedelta(days=6)
+            types = request.GET.getlist('type')
+            inconnus = set(types) - {t for t, _ in ConflitCours.TYPES}
+            if inconnus:
+                raise ValueError(f"Type de conflit inconnu: {', '.join(sorted(inconnus))}")
+        except ValueError as e:
+            return self._reponse_erreur(str(e), status.HTTP_400_BAD_REQUEST)
+
+        conflits = ConflitCours.objects.filter(zone=zone, jour__range=(debut, fin))
+        if types:
+            conflits = conflits.filter(type_conflit__in=types)
+        champs = [f'{cote}__{champ}' for cote in ('cours_a', 'cours_b') for champ in self.CHAMPS_COURS]
+        resultat = []
+        for ligne in conflits.values('jour', 'debut', 'fin', 'type_conflit', 'cle', *champs):
+            conflit = {cle: ligne[cle] for cle in ('jour', 'debut', 'fin', 'type_conflit', 'cle')}
+            for cote in ('cours_a', 'cours_b'):
+                conflit[cote] = {champ: ligne[f'{cote}__{champ}'] for champ in self.CHAMPS_COURS}
+            resultat.append(conflit)
+
         return Response({
-            'erreur': msg, 'code': code, 'details': details or {}, 'timestamp': timezone.now()
-        }, status=code)
+            'zone': zone,
+            'debut': debut.isoformat(),
+            'fin': fin.isoformat(),
+            'nombre_conflits': len(resultat),
+            'conflits': resultat,
+            'timestamp': timezone.now(),
+        }, status=status.HTTP_200_OK)
+
+
+class CalendrierICSAPIView(EmploiDuTempsDuJourAPIView):
+    """
+    Flux iCalendar d'un niveau, d'une salle ou d'un enseignant (?niveau=, ?ressource=,
+    ?enseignant=, au moins un, répétables), de la semaine précédente aux ?semaines=
+    semaines à venir. Les agendas qui renvoient l'ETag reçoivent un 304 après une
+    seule requête d'agrégat ; sinon seules les semaines modifiées sont régénérées.
+    """
+
+    FILTRES_FLUX = ('niveau', 'ressource', 'enseignant')
+
+    def perform_content_negotiation(self, request, force=False):
+        # Les agendas envoient Accept: text/calendar, qu'aucun renderer DRF ne produit
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, *args, **kwargs):
+        try:
+            zone = self._get_zone_param(request)
+            filtres = lire_filtres(request.GET)
+            if not any(champ in filtres for champ in self.FILTRES_FLUX):
+                raise ValueError("Préciser au moins un niveau, une ressource ou un enseignant")
+            semaines = int(request.GET.get('semaines', settings.UPGC_ICS_SEMAINES))
+            if not 0 <= semaines <= 52:
+                raise ValueError("semaines doit être compris entre 0 et 52")
+        except ValueError as e:
+            return self._reponse_erreur(str(e), status.HTTP_400_BAD_REQUEST)
+
+        premier = debut_semaine(timezone.localdate()) - timedelta(weeks=1)
+        lundis = [premier + timedelta(weeks=i) for i in range(semaines + 2)]
+        cours = Cours.objects.filter(zone=zone, jour__range=(lundis[0], lundis[-1] + timedelta(days=6))).filtrer(filtres)
+
+        signature = signature_flux(zone, filtres)
+        jetons = jetons_semaines(cours, lundis)
+        etag = quote_etag(hashlib.sha1(repr((signature, sorted(jetons.items()))).encode()).hexdigest())
+        reponse = get_conditional_response(request, etag=etag)
+        if reponse is not None:
+            return self._avec_validateurs(reponse, etag, None)
+
+        nom = ' / '.join(v for valeurs in filtres.values() for v in valeurs)
+        corps = calendrier(f"UPGC - {nom}", blocs_semaines(cours, signature, jetons))
+        reponse = HttpResponse(corps, content_type='text/calendar; charset=utf-8')
+        reponse['Content-Disposition'] = 'inline; filename="emploi_du_temps.ics"'
+        return self._avec_validateurs(reponse, etag, None)
+
+
+class ChangementsAPIView(EmploiDuTempsDuJourAPIView):
+    """
+    Changements de cours depuis la version ?depuis= (0 : tout l'historique), par
+    ordre de version, au plus ?limite= par page. Le client rappelle l'URL avec la
+    `version` reçue tant que `suite` est vrai. Zone optionnelle.
+    """
+
+    LIMITE_PAR_DEFAUT = 500
+    LIMITE_MAX = 5000
+
+    def get(self, request, *args, **kwargs):
+        try:
+            depuis = int(request.GET.get('depuis', 0))
+            limite = int(request.GET.get('limite', self.LIMITE_PAR_DEFAUT))
+            zone = int(request.GET['zone']) if request.GET.get('zone') else None
+            if depuis < 0 or not 1 <= limite <= self.LIMITE_MAX:
+                raise ValueError(f"depuis doit être positif et limite compris entre 1 et {self.LIMITE_MAX}")
+        except ValueError as e:
+            return self._reponse_erreur(str(e), status.HTTP_400_BAD_REQUEST)
+
+        changements = ChangementCours.objects.filter(id__gt=depuis)
+        if zone is not None:
+            changements = changements.filter(zone=zone)
+        page = list(
+            changements.order_by('id')
+            .values('id', 'operation', 'zone', 'jour', 'horaire', 'ressource', 'donnees')[:limite + 1]
+        )
+        suite = len(page) > limite
+        page = page[:limite]
+        for changement in page:
+            changement['version'] = changement.pop('id')
+
+        return Response({
+            'depuis': depuis,
+            'version': page[-1]['version'] if page else depuis,
+            'suite': suite,
+            'changements': page,
+            'timestamp': timezone.now(),
+        }, status=status.HTTP_200_OK)
+
+
+class _Tampon:
+    """Pseudo-fichier pour csv.writer : renvoie la ligne au lieu de l'écrire."""
+    def write(self, valeur):
+        return valeur
+
+
+class ExportCoursAPIView(APIView):
+    """
+    Export des cours d'une plage de dates (?debut=&fin=, zone optionnelle), en JSON
+    Lines (défaut) ou CSV (?type=csv). La réponse est produite au fil d'un curseur
+    côté serveur : mémoire constante quelle que soit la taille de la plage.
+    Seule la base est lue (remplie par `python manage.py synchroniser`), sans scraping.
+    """
+
+    TYPES = {
+        'ndjson': ('application/x-ndjson; charset=utf-8', 'ndjson'),
+        'csv': ('text/csv; charset=utf-8', 'csv'),
+    }
+    TAILLE_LOT = 2000
+
+    def get(self, request, *args, **kwargs):
+        try:
+            debut, fin = lire_plage(request.GET)
+            zone = int(request.GET['zone']) if request.GET.get('zone') else None
+            type_export = request.GET.get('type', 'ndjson')
+            if type_export not in self.TYPES:
+                raise ValueError(f"Type d'export inconnu: {type_export} (choix: {', '.join(self.TYPES)})")
+        except ValueError as e:
+            return Response(corps_erreur(str(e), status.HTTP_400_BAD_REQUEST), status=status.HTTP_400_BAD_REQUEST)
+
+        cours = Cours.objects.filter(jour__range=(debut, fin)).filtrer(lire_filtres(request.GET))
+        if zone is not None:
+            cours = cours.filter(zone=zone)
+        lignes = cours.order_by('zone', 'jour', *ORDRE_CHRONOLOGIQUE, 'ressource').values_list(*CHAMPS_COURS_EXPORT)
+
+        type_contenu, extension = self.TYPES[type_export]
+        flux = self._csv(lignes) if type_export == 'csv' else self._ndjson(lignes)
+        reponse = StreamingHttpResponse(flux, content_type=type_contenu)
+        reponse['Content-Disposition'] = f'attachment; filename="cours_{debut}_{fin}.{extension}"'
+        return reponse
+
+    def perform_content_negotiation(self, request, force=False):
+        # Le format est choisi par ?type= : un en-tête Accept text/csv ne doit pas donner de 406
+        return super().perform_content_negotiation(request, force=True)
+
+    def _ndjson(self, lignes):
+        for valeurs in lignes.iterator(chunk_size=self.TAILLE_LOT):
+            yield ligne_json(dict(zip(CHAMPS_COURS_EXPORT, valeurs)))
+
+    def _csv(self, lignes):
+        ecrivain = csv.writer(_Tampon())
+        yield ecrivain.writerow(CHAMPS_COURS_EXPORT)
+        for valeurs in lignes.iterator(chunk_size=self.TAILLE_LOT):
+            yield ecrivain.writerow(
+                v.isoformat().replace('+00:00', 'Z') if isinstance(v, (date, datetime)) else v
+                for v in valeurs
+            )
+
+
+class MetriquesAPIView(APIView):
+    """
+    Compteurs et histogrammes de latence (scraping, gouverneur, API) au format texte
+    Prometheus, additionnés sur tous les processus qui partagent UPGC_METRIQUES_DOSSIER.
+    """
+
+    def perform_content_negotiation(self, request, force=False):
+        # Prometheus envoie Accept: text/plain;version=0.0.4, qu'aucun renderer DRF ne produit
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(metriques.exporter(), content_type='text/plain; version=0.0.4; charset=utf-8')
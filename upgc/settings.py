@@ -48,6 +48,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.profilage.ProfilageMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -79,6 +80,17 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # La synchronisation écrit depuis plusieurs threads : les transactions
+        # prennent le verrou d'écriture dès le BEGIN et attendent au lieu d'échouer.
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # Base de test sur fichier : la base en mémoire partagée ne sait pas
+        # attendre un verrou entre threads.
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
@@ -118,3 +130,78 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = 'static/'
+
+
+# Django REST framework : JSON rendu par orjson (repli sur l'encodeur DRF s'il manque)
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+
+# Site GRR de l'UPGC (surchargeable pour pointer vers un faux serveur local)
+
+UPGC_URL_BASE = config('UPGC_URL_BASE', default='https://upgc.mygrr.net/week_all.php')
+
+# Délai maximal (secondes) d'une requête vers le site GRR, connexion et lecture
+UPGC_TIMEOUT = config('UPGC_TIMEOUT', default=15, cast=float)
+
+# Moteur d'analyse HTML de week_all.php : 'lxml' (rapide) ou 'html.parser' (référence)
+UPGC_PARSEUR = config('UPGC_PARSEUR', default='lxml')
+
+
+# Durée (secondes) pendant laquelle clients et caches intermédiaires peuvent
+# réutiliser une réponse de l'API sans la revalider (ETag / Last-Modified)
+UPGC_CACHE_MAX_AGE = config('UPGC_CACHE_MAX_AGE', default=60, cast=int)
+
+# Semaines à venir couvertes par les flux iCalendar (/ics/), en plus de la
+# semaine précédente et de la semaine courante
+UPGC_ICS_SEMAINES = config('UPGC_ICS_SEMAINES', default=8, cast=int)
+
+
+# Synchronisation en arrière-plan (python manage.py synchroniser)
+
+UPGC_SYNC_ZONES = config('UPGC_SYNC_ZONES', default='2', cast=Csv(cast=int))
+UPGC_SYNC_SEMAINES = config('UPGC_SYNC_SEMAINES', default=2, cast=int)
+UPGC_SYNC_INTERVALLE = config('UPGC_SYNC_INTERVALLE', default=1800, cast=int)
+UPGC_SYNC_WORKERS = config('UPGC_SYNC_WORKERS', default=4, cast=int)
+
+# Scrapings simultanés d'une même semaine regroupés : attente maximale des requêtes
+# qui attendent le scraping en cours, et durée de vie du verrou partagé en base
+UPGC_SCRAPING_ATTENTE = config('UPGC_SCRAPING_ATTENTE', default=30, cast=float)
+UPGC_VERROU_DUREE = config('UPGC_VERROU_DUREE', default=120, cast=int)
+
+# Fraîcheur des semaines en base (secondes depuis le dernier scraping) : au-delà,
+# l'API sert la base ('stale') et relance le scraping en arrière-plan.
+# 0 pour les semaines passées : jamais revalidées (emploi du temps figé)
+UPGC_FRAICHEUR_COURANTE = config('UPGC_FRAICHEUR_COURANTE', default=900, cast=int)
+UPGC_FRAICHEUR_FUTURE = config('UPGC_FRAICHEUR_FUTURE', default=3600, cast=int)
+UPGC_FRAICHEUR_PASSEE = config('UPGC_FRAICHEUR_PASSEE', default=0, cast=int)
+
+# Limitation des requêtes vers le site de l'UPGC, globale : le seau à jetons est en
+# base (SeauJetonsPartage) et partagé par tous les processus (workers, synchroniser,
+# rattraper). Débit moyen (requêtes/s, 0 pour désactiver), rafale autorisée et
+# attente maximale d'un jeton.
+# Une actualisation forcée moins de UPGC_ACTUALISATION_INTERVALLE secondes après
+# le dernier scraping de la semaine est servie depuis la base.
+UPGC_GOUVERNEUR_DEBIT = config('UPGC_GOUVERNEUR_DEBIT', default=2, cast=float)
+UPGC_GOUVERNEUR_RAFALE = config('UPGC_GOUVERNEUR_RAFALE', default=5, cast=int)
+UPGC_GOUVERNEUR_ATTENTE = config('UPGC_GOUVERNEUR_ATTENTE', default=10, cast=float)
+UPGC_ACTUALISATION_INTERVALLE = config('UPGC_ACTUALISATION_INTERVALLE', default=60, cast=int)
+
+# Métriques (/metrics). Par défaut (vide), chaque processus n'expose que ses propres
+# compteurs. Avec plusieurs workers, renseigner un dossier propre au service : chaque
+# processus y recopie ses compteurs au plus toutes les UPGC_METRIQUES_INTERVALLE
+# secondes et /metrics additionne les fichiers. Les valeurs des processus arrêtés
+# sont reportées dans un cumul ; un fichier non réécrit depuis UPGC_METRIQUES_TTL
+# secondes y est mis de côté jusqu'à l'arrêt de son processus.
+UPGC_METRIQUES_DOSSIER = config('UPGC_METRIQUES_DOSSIER', default='')
+UPGC_METRIQUES_INTERVALLE = config('UPGC_METRIQUES_INTERVALLE', default=5, cast=float)
+UPGC_METRIQUES_TTL = config('UPGC_METRIQUES_TTL', default=86400, cast=int)
+
+# Profilage (?profil=true ou en-tête X-UPGC-Profil, personnel uniquement) :
+# nombre de fonctions listées dans le résumé cProfile
+UPGC_PROFILAGE_LIGNES = config('UPGC_PROFILAGE_LIGNES', default=30, cast=int)
@@ -31,23 +31,8 @@ def verify():
         print(f"Scraper returned {len(data)} items.")
         
         # 3. Save to DB (simulating view logic)
-        saved_count = 0
-        for item in data:
-            Cours.objects.update_or_create(
-                jour=item['jour'],
-                horaire=item['horaire'],
-                ressource=item['ressource'],
-                defaults={
-                    'type_cours': item['type_cours'],
-                    'enseignant': item['enseignant'],
-                    'intitule': item['intitule'],
-                    'niveau': item['niveau'],
-                    'salle': item['salle']
-                }
-            )
-            saved_count += 1
-            
-        print(f"Saved {saved_count} items to database.")
+        bilan = Cours.objects.reconcilier_semaine(2, today, data)
+        print(f"Reconciled {len(data)} items: {bilan}")
         
         # 4. Verify DB count
         final_count = Cours.objects.count()